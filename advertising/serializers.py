@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import Advertisement
 
-class AdvertisementSerializer(serializers.ModelSerializer):
+class AdvertisementSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Advertisement
         fields = '__all__'
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils import timezone
 
-from .models import Alarm
+from .models import Alarm, FailedNotification, NotificationRule
 
 @admin.register(Alarm)
 class AlarmAdmin(admin.ModelAdmin):
@@ -41,3 +41,24 @@ class AlarmAdmin(admin.ModelAdmin):
         return timezone.datetime.fromtimestamp(obj.time).strftime('%Y-%m-%d %H:%M:%S')
     formatted_alarm_time.admin_order_field = 'time'
     formatted_alarm_time.short_description = 'Alarm Time'
+
+
+@admin.register(NotificationRule)
+class NotificationRuleAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the NotificationRule model.
+    Displays the account, alarm codes, webhook and status in the list view.
+    """
+    list_display = ['user', 'alarm_codes', 'webhook_url', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['user__user__username', 'webhook_url']
+
+
+@admin.register(FailedNotification)
+class FailedNotificationAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the FailedNotification model (dead-letter queue).
+    """
+    list_display = ['webhook_url', 'user', 'attempts', 'failed_at', 'error']
+    search_fields = ['webhook_url']
+    ordering = ['-failed_at',]
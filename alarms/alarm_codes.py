@@ -62,3 +62,11 @@ class AlarmCodes(models.TextChoices):
     AUXILIARY_ACTIVITIES = "AUXILIARYACTIVITIES", "Actividades Auxiliares"
     SLEEPING = "SLEEPING", "Descanso"
     EXCEPTIONAL_CASES = "EXCEPTIONALCASES", "Casos excepcionales"
+
+
+CRITICAL_ALARM_CODES = (
+    AlarmCodes.SOS,
+    AlarmCodes.CRASH,
+    AlarmCodes.TURNOVER,
+    AlarmCodes.REMOVE,
+)
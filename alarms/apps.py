@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AlarmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'alarms'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals
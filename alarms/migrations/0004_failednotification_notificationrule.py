@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_alter_customuser_photo'),
+        ('alarms', '0003_alter_alarm_alarm_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FailedNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('webhook_url', models.URLField(help_text='URL that should have received the notification.', max_length=500)),
+                ('payload', models.JSONField(help_text='Body of the notification.')),
+                ('error', models.TextField(blank=True, help_text='Last error returned when delivering the notification.')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Number of delivery attempts.')),
+                ('failed_at', models.PositiveBigIntegerField(help_text='Time when the notification was moved to the dead-letter queue.')),
+            ],
+            options={
+                'verbose_name': 'Failed notification',
+                'verbose_name_plural': 'Failed notifications',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alarm_codes', models.CharField(default='SOS,CRASH,TURNOVER,REMOVE', help_text='Comma separated alarm codes that trigger the notification.', max_length=255)),
+                ('webhook_url', models.URLField(help_text='URL that receives the notifications.', max_length=500)),
+                ('is_active', models.BooleanField(default=True, help_text='Whether the rule is currently applied.')),
+                ('user', models.ForeignKey(help_text='Account that owns the rule.', on_delete=django.db.models.deletion.CASCADE, related_name='notification_rules', to='users.customuser')),
+            ],
+            options={
+                'verbose_name': 'Notification rule',
+                'verbose_name_plural': 'Notification rules',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alarms', '0004_failednotification_notificationrule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alarm',
+            index=models.Index(fields=['device', '-time'], name='alarm_device_time_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_auth_user_search_indexes'),
+        ('alarms', '0005_alarm_alarm_device_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='failednotification',
+            name='user',
+            field=models.ForeignKey(help_text='Account whose rule the notification was sent for.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='failed_notifications', to='users.customuser'),
+        ),
+    ]
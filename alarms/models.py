@@ -3,7 +3,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from devices.models import Device
-from .alarm_codes import AlarmCodes
+from users.models import CustomUser
+from .alarm_codes import AlarmCodes, CRITICAL_ALARM_CODES
 
 MAX_DIGITS = 10
 MAX_DECIMAL_PLACES = 7
@@ -93,6 +94,90 @@ class Alarm(Coordinates):
     class Meta:
         verbose_name = _("Alarm")
         verbose_name_plural = _("Alarms")
+        indexes = [
+            models.Index(fields=["device", "-time"], name="alarm_device_time_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Alarm(code={self.alarm_code})"
+
+
+class NotificationRule(models.Model):
+    """
+    Model to represent a notification rule of an account. When an alarm whose code
+    is listed in the rule is registered for a device associated with the account,
+    a notification is delivered to the rule's webhook.
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="notification_rules",
+        help_text=_("Account that owns the rule."),
+    )
+    alarm_codes = models.CharField(
+        max_length=255,
+        default=",".join(CRITICAL_ALARM_CODES),
+        help_text=_("Comma separated alarm codes that trigger the notification."),
+    )
+    webhook_url = models.URLField(
+        max_length=500,
+        help_text=_("URL that receives the notifications."),
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text=_("Whether the rule is currently applied."),
+    )
+
+    class Meta:
+        verbose_name = _("Notification rule")
+        verbose_name_plural = _("Notification rules")
+
+    @property
+    def codes(self) -> set:
+        """Returns the alarm codes of the rule as a set."""
+        return {code.strip() for code in self.alarm_codes.split(",") if code.strip()}
+
+    def __str__(self) -> str:
+        return f"NotificationRule(user={self.user_id}, codes={self.alarm_codes})"
+
+
+class FailedNotification(models.Model):
+    """
+    Model to represent a notification that could not be delivered after
+    all the retries (dead-letter queue). It keeps the payload so that
+    it can be delivered again later.
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="failed_notifications",
+        help_text=_("Account whose rule the notification was sent for."),
+    )
+    webhook_url = models.URLField(
+        max_length=500,
+        help_text=_("URL that should have received the notification."),
+    )
+    payload = models.JSONField(
+        help_text=_("Body of the notification."),
+    )
+    error = models.TextField(
+        blank=True,
+        help_text=_("Last error returned when delivering the notification."),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("Number of delivery attempts."),
+    )
+    failed_at = models.PositiveBigIntegerField(
+        help_text=_("Time when the notification was moved to the dead-letter queue.")
+    )
+
+    class Meta:
+        verbose_name = _("Failed notification")
+        verbose_name_plural = _("Failed notifications")
+
+    def __str__(self) -> str:
+        return f"FailedNotification(url={self.webhook_url}, attempts={self.attempts})"
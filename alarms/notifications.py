@@ -0,0 +1,216 @@
+import json
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep, time
+from typing import Dict, List, Tuple
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from devices.contacts import get_contacts
+
+from .models import Alarm, FailedNotification, NotificationRule
+from .utils import check_webhook_url
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe histogram of delivery latencies in milliseconds.
+
+    Each bucket counts the deliveries whose latency is lower than or equal to
+    its upper bound; the last bucket ('+Inf') counts the remaining ones.
+    """
+
+    def __init__(self, buckets: Tuple[int, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Removes every observation."""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._total = 0.0
+            self._count = 0
+
+    def observe(self, latency_ms: float):
+        """Registers a new latency."""
+        with self._lock:
+            self._counts[bisect_left(self.buckets, latency_ms)] += 1
+            self._total += latency_ms
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """Returns the current state of the histogram."""
+        with self._lock:
+            labels = [str(bucket) for bucket in self.buckets] + ["+Inf"]
+            return {
+                "buckets": dict(zip(labels, self._counts)),
+                "count": self._count,
+                "sum": round(self._total, 3),
+            }
+
+
+def serialize_alarm(alarm: Alarm) -> dict:
+    """Returns the representation of an alarm sent in the notifications."""
+    return {
+        "id": alarm.id,
+        "imei": alarm.device_id,
+        "alarm_code": alarm.alarm_code,
+        "time": alarm.time,
+        "lat": alarm.lat,
+        "lng": alarm.lng,
+        "address": alarm.address,
+        "speed": alarm.speed,
+    }
+
+
+class NotificationDispatcher:
+    """
+    Delivers the alarms that match the accounts' notification rules to their webhooks.
+
+    Alarms are grouped per recipient (account and webhook) during a short window,
+    so that bursts of alarms produce a single request. The grouped notifications
+    are delivered concurrently by a pool of threads, retried with an exponential
+    backoff and stored as FailedNotification when every attempt fails.
+    """
+
+    def __init__(self):
+        self.window = settings.ALARM_NOTIFICATION_WINDOW
+        self.max_attempts = settings.ALARM_NOTIFICATION_MAX_ATTEMPTS
+        self.timeout = settings.ALARM_NOTIFICATION_TIMEOUT
+        self.backoff = settings.ALARM_NOTIFICATION_BACKOFF
+        self.public_webhooks_only = settings.ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY
+        self.histogram = LatencyHistogram()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.ALARM_NOTIFICATION_MAX_WORKERS,
+            thread_name_prefix="alarm-notifications",
+        )
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], List[Tuple[float, Alarm]]] = defaultdict(list)
+
+    def match(self, alarm: Alarm) -> List[NotificationRule]:
+        """
+        Returns the active rules of the accounts associated with
+        the alarm's device that include the alarm code.
+        """
+        contacts = get_contacts([alarm.device_id]).get(alarm.device_id, [])
+        users = [contact["user"] for contact in contacts]
+        if not users:
+            return []
+        rules = NotificationRule.objects.filter(user_id__in=users, is_active=True)
+        return [rule for rule in rules if alarm.alarm_code in rule.codes]
+
+    def submit(self, alarm: Alarm):
+        """
+        Queues the alarm for every matching rule. The notifications of a recipient
+        are sent together once the grouping window is over.
+        """
+        received_at = monotonic()
+        for rule in self.match(alarm):
+            recipient = (str(rule.user_id), rule.webhook_url)
+            with self._lock:
+                is_first = not self._pending[recipient]
+                self._pending[recipient].append((received_at, alarm))
+            if is_first:
+                timer = threading.Timer(self.window, self.flush, args=(recipient,))
+                timer.daemon = True
+                timer.start()
+
+    def flush(self, recipient: Tuple[str, str]):
+        """Sends the alarms grouped for the recipient."""
+        with self._lock:
+            grouped = self._pending.pop(recipient, [])
+        if not grouped:
+            return
+
+        user, webhook_url = recipient
+        alarms = [alarm for _, alarm in grouped]
+        try:
+            payload = {
+                "user": user,
+                "alarms": [serialize_alarm(alarm) for alarm in alarms],
+                "contacts": get_contacts(alarm.device_id for alarm in alarms),
+            }
+        finally:
+            # The timer thread ends here, so its connection is not reused.
+            connection.close()
+        received_at = min(received for received, _ in grouped)
+        self._executor.submit(self.deliver, user, webhook_url, payload, received_at)
+
+    def deliver(self, user: str, webhook_url: str, payload: dict, received_at: float) -> bool:
+        """
+        Posts the payload to the webhook, retrying on failure.
+        If all the attempts fail, the notification goes to the dead-letter queue.
+        The host is checked again before every attempt, since it may resolve to
+        other addresses than when the rule was saved, and redirects are not followed.
+        """
+        body = json.dumps(payload, cls=DjangoJSONEncoder)
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if self.public_webhooks_only:
+                    check_webhook_url(webhook_url)
+                response = requests.post(
+                    webhook_url,
+                    data=body,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout,
+                    allow_redirects=False,
+                )
+                response.raise_for_status()
+                if response.is_redirect:
+                    raise requests.HTTPError(
+                        f"Unexpected redirect to {response.headers['location']}",
+                        response=response,
+                    )
+            except (requests.RequestException, ValueError) as e:
+                error = str(e)
+                logger.warning(
+                    "Attempt %s to notify %s failed: %s", attempt, webhook_url, e
+                )
+                if attempt < self.max_attempts:
+                    sleep(self.backoff * 2 ** (attempt - 1))
+                continue
+
+            self.histogram.observe((monotonic() - received_at) * 1000)
+            return True
+
+        FailedNotification.objects.create(
+            user_id=user,
+            webhook_url=webhook_url,
+            payload=json.loads(body),
+            error=error,
+            attempts=self.max_attempts,
+            failed_at=int(time()),
+        )
+        return False
+
+    def retry(self, failed: FailedNotification):
+        """Delivers again a notification from the dead-letter queue."""
+        failed.delete()
+        self._executor.submit(
+            self.deliver, failed.user_id, failed.webhook_url, failed.payload, monotonic()
+        )
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """Returns the dispatcher of the current process, creating it on first use."""
+    global _dispatcher  # pylint: disable=global-statement
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
@@ -4,12 +4,17 @@ from typing import Optional
 from time import time
 
 import requests
+from django.conf import settings
 from django.db.models import Q
 from rest_framework import serializers
 
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from devices.models import Device
+from users.models import CustomUser
 
-from .models import Alarm
+from .alarm_codes import AlarmCodes
+from .models import Alarm, FailedNotification, NotificationRule
+from .utils import check_webhook_url
 
 def get_address(lat: str, lng: str):
     """
@@ -48,7 +53,7 @@ def get_address(lat: str, lng: str):
     return None
 
 
-class AlarmSerializer(serializers.ModelSerializer):
+class AlarmSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the Alarm model. This serializer only supports read and create operations.
     Update and partial update operations are not allowed.
@@ -115,3 +120,58 @@ class AlarmSerializer(serializers.ModelSerializer):
         Overwrites the partial_update method to prevent partial updates.
         """
         raise NotImplementedError("Partial update operation is not allowed.")
+
+
+class NotificationRuleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the NotificationRule model.
+    Validates that every alarm code of the rule exists, that the rule belongs
+    to the requesting user's account or to one below it, and that the webhook
+    does not point to the internal network.
+    """
+
+    class Meta:
+        model = NotificationRule
+        fields = ["id", "user", "alarm_codes", "webhook_url", "is_active"]
+        read_only_fields = ("id",)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is not None and "user" in fields:
+            fields["user"].queryset = CustomUser.objects.managed_by(request.user)
+        return fields
+
+    def validate_webhook_url(self, value: str):
+        """
+        Validates that the webhook uses https and resolves to public addresses.
+        """
+        if settings.ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY:
+            try:
+                check_webhook_url(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e)) from e
+        return value
+
+    def validate_alarm_codes(self, value: str):
+        """
+        Validates that the alarm codes are a comma separated list of known codes.
+        """
+        codes = [code.strip() for code in value.split(",") if code.strip()]
+        unknown = [code for code in codes if code not in AlarmCodes.values]
+        if not codes or unknown:
+            raise serializers.ValidationError(
+                f"Invalid alarm codes: {', '.join(unknown) or value}"
+            )
+        return ",".join(codes)
+
+
+class FailedNotificationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the FailedNotification model. It is read-only.
+    """
+
+    class Meta:
+        model = FailedNotification
+        fields = ["id", "user", "webhook_url", "payload", "error", "attempts", "failed_at"]
+        read_only_fields = fields
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Alarm
+from .notifications import get_dispatcher
+
+
+@receiver(post_save, sender=Alarm)
+def dispatch_alarm_notifications(sender, instance: Alarm, created: bool, **kwargs):
+    """
+    Sends the new alarms to the notification dispatcher once
+    the transaction that registered them is committed.
+    """
+    if created:
+        transaction.on_commit(lambda: get_dispatcher().submit(instance))
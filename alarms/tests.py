@@ -1,3 +1,271 @@
-from django.test import TestCase
+import json
+import queue
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from time import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from devices.models import Device, UserDevice
+from users.models import CustomUser
+from wt_iopgps.testing import create_account
+
+from .models import Alarm, FailedNotification, NotificationRule
+from .notifications import NotificationDispatcher
+from .utils import check_webhook_url
+
+PUBLIC_ADDRESS = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 443))]
+
+
+class WebhookSink:
+    """
+    Local HTTP server that records the notifications it receives.
+    The paths starting with '/fail' answer with an error.
+    """
+
+    def __init__(self):
+        self.received = queue.Queue()
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                sink.received.put((self.path, json.loads(self.rfile.read(length))))
+                self.send_response(500 if self.path.startswith("/fail") else 200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def get(self, timeout: float = 5):
+        return self.received.get(timeout=timeout)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(
+    ALARM_NOTIFICATION_WINDOW=0.2,
+    ALARM_NOTIFICATION_MAX_ATTEMPTS=2,
+    ALARM_NOTIFICATION_BACKOFF=0,
+    ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY=False,
+)
+class NotificationDispatcherTests(TestCase):
+    """
+    The dispatcher delivers the alarms that match the rules to a local HTTP sink.
+    """
+
+    def setUp(self):
+        self.sink = WebhookSink()
+        self.addCleanup(self.sink.close)
+        self.account = create_account("owner")
+        self.recipient = str(self.account.uuid)
+        self.device = Device.objects.create(imei="123456789012345", user_name="owner")
+        UserDevice.objects.create(user=self.account, device=self.device)
+        self.alarms = [self.create_alarm(code) for code in ("SOS", "CRASH", "ACCON")]
+        self.dispatcher = NotificationDispatcher()
+
+    def create_alarm(self, alarm_code: str) -> Alarm:
+        return Alarm.objects.create(
+            device=self.device,
+            alarm_code=alarm_code,
+            alarm_type=1,
+            device_type=1,
+            time=int(time()),
+        )
+
+    def test_alarms_of_a_recipient_are_grouped(self):
+        NotificationRule.objects.create(
+            user=self.account, webhook_url=self.sink.url("/hook"), alarm_codes="SOS,CRASH"
+        )
+        for alarm in self.alarms:
+            self.dispatcher.submit(alarm)
+
+        path, payload = self.sink.get()
+        self.assertEqual(path, "/hook")
+        self.assertEqual(payload["user"], str(self.account.uuid))
+        self.assertEqual([alarm["alarm_code"] for alarm in payload["alarms"]], ["SOS", "CRASH"])
+        self.assertEqual(payload["contacts"][self.device.imei][0]["user"], str(self.account.uuid))
+        self.assertTrue(self.sink.received.empty())
+
+    def test_inactive_rules_are_ignored(self):
+        NotificationRule.objects.create(
+            user=self.account, webhook_url=self.sink.url("/hook"), is_active=False
+        )
+        self.assertEqual(self.dispatcher.match(self.alarms[0]), [])
+
+    def test_delivery_latency_is_measured(self):
+        self.assertTrue(self.dispatcher.deliver(self.recipient, self.sink.url("/hook"), {}, 0))
+        snapshot = self.dispatcher.histogram.snapshot()
+        self.assertEqual(snapshot["count"], 1)
+        self.assertEqual(sum(snapshot["buckets"].values()), 1)
+
+    def test_failed_delivery_goes_to_the_dead_letter_queue(self):
+        url = self.sink.url("/fail")
+        with self.assertLogs("alarms.notifications", "WARNING"):
+            self.assertFalse(self.dispatcher.deliver(self.recipient, url, {"alarms": []}, 0))
+        self.assertEqual([self.sink.get()[0] for _ in range(2)], ["/fail", "/fail"])
+        failed = FailedNotification.objects.get()
+        self.assertEqual(failed.user, self.account)
+        self.assertEqual(failed.webhook_url, url)
+        self.assertEqual(failed.payload, {"alarms": []})
+        self.assertEqual(failed.attempts, 2)
+        self.assertEqual(self.dispatcher.histogram.snapshot()["count"], 0)
+
+    @override_settings(ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY=True)
+    def test_internal_webhooks_are_not_called(self):
+        dispatcher = NotificationDispatcher()
+        with self.assertLogs("alarms.notifications", "WARNING"):
+            self.assertFalse(dispatcher.deliver(self.recipient, self.sink.url("/hook"), {}, 0))
+        self.assertTrue(self.sink.received.empty())
+        self.assertIn("https", FailedNotification.objects.get().error)
+
+
+class CheckWebhookUrlTests(TestCase):
+    """
+    Only https webhooks on public addresses are accepted.
+    """
+
+    def test_public_https_url(self):
+        with mock.patch("socket.getaddrinfo", return_value=PUBLIC_ADDRESS):
+            check_webhook_url("https://hooks.example.com/alarms")
+
+    def test_rejected_urls(self):
+        for url in (
+            "http://hooks.example.com/alarms",
+            "ftp://hooks.example.com/alarms",
+            "https://127.0.0.1/alarms",
+            "https://localhost/alarms",
+            "https://10.0.0.8/alarms",
+            "https://169.254.169.254/latest/meta-data",
+            "https://[::1]/alarms",
+            "https://[::ffff:192.168.1.1]/alarms",
+        ):
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                check_webhook_url(url)
+
+
+class NotificationRuleViewSetTests(TestCase):
+    """
+    The rules are scoped to the authenticated user's account and the accounts below it.
+    """
+
+    url = "/api/v1/alarms/notification-rules/"
+
+    def setUp(self):
+        self.admin = create_account("admin")
+        self.child = create_account("child")
+        self.child.parent_accounts.add(self.admin)
+        self.stranger = create_account("stranger")
+        self.rules = {
+            account: NotificationRule.objects.create(
+                user=account, webhook_url="https://hooks.example.com/alarms"
+            )
+            for account in (self.admin, self.child, self.stranger)
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin.user)
+
+    def create_rule(self, account: CustomUser, webhook_url: str):
+        return self.client.post(
+            self.url,
+            {"user": str(account.uuid), "webhook_url": webhook_url, "alarm_codes": "SOS"},
+            format="json",
+        )
+
+    def test_list_only_shows_managed_accounts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(
+            [rule["id"] for rule in response.json()],
+            [self.rules[self.admin].id, self.rules[self.child].id],
+        )
+
+    def test_rules_of_other_accounts_are_not_found(self):
+        detail = f"{self.url}{self.rules[self.stranger].id}/"
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        self.assertEqual(self.client.delete(detail).status_code, 404)
+        self.assertTrue(NotificationRule.objects.filter(user=self.stranger).exists())
+
+    def test_create_for_a_managed_account(self):
+        with mock.patch("socket.getaddrinfo", return_value=PUBLIC_ADDRESS):
+            response = self.create_rule(self.child, "https://hooks.example.com/child")
+        self.assertEqual(response.status_code, 201)
+
+    def test_create_for_another_account(self):
+        with mock.patch("socket.getaddrinfo", return_value=PUBLIC_ADDRESS):
+            response = self.create_rule(self.stranger, "https://hooks.example.com/alarms")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("user", response.json())
+
+    def test_move_rule_to_another_account(self):
+        response = self.client.patch(
+            f"{self.url}{self.rules[self.child].id}/",
+            {"user": str(self.stranger.uuid)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_internal_webhooks_are_rejected(self):
+        for webhook_url in ("http://hooks.example.com/alarms", "https://127.0.0.1:8000/admin"):
+            with self.subTest(webhook_url=webhook_url):
+                response = self.create_rule(self.admin, webhook_url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("webhook_url", response.json())
+
+
+class FailedNotificationViewSetTests(TestCase):
+    """
+    The failed notifications are scoped to the authenticated user's account
+    and the accounts below it.
+    """
+
+    url = "/api/v1/alarms/failed-notifications/"
+
+    def setUp(self):
+        self.owner = create_account("owner")
+        self.stranger = create_account("stranger")
+        self.failed = FailedNotification.objects.create(
+            user=self.owner,
+            webhook_url="https://hooks.example.com/alarms",
+            payload={"alarms": []},
+            attempts=2,
+            failed_at=int(time()),
+        )
+        self.client = APIClient()
+
+    def test_list(self):
+        for account, ids in ((self.owner, [self.failed.id]), (self.stranger, [])):
+            with self.subTest(account=account.user.username):
+                self.client.force_authenticate(account.user)
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([failed["id"] for failed in response.json()], ids)
+
+    def test_other_accounts_cannot_retry_or_delete(self):
+        self.client.force_authenticate(self.stranger.user)
+        detail = f"{self.url}{self.failed.id}/"
+        with mock.patch("alarms.views.get_dispatcher") as get_dispatcher:
+            self.assertEqual(self.client.get(detail).status_code, 404)
+            self.assertEqual(self.client.post(f"{detail}retry/").status_code, 404)
+            self.assertEqual(self.client.delete(detail).status_code, 404)
+        get_dispatcher.return_value.retry.assert_not_called()
+        self.assertTrue(FailedNotification.objects.filter(pk=self.failed.pk).exists())
+
+    def test_retry(self):
+        self.client.force_authenticate(self.owner.user)
+        with mock.patch("alarms.views.get_dispatcher") as get_dispatcher:
+            response = self.client.post(f"{self.url}{self.failed.id}/retry/")
+        self.assertEqual(response.status_code, 202)
+        get_dispatcher.return_value.retry.assert_called_once_with(self.failed)
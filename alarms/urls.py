@@ -1,8 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AlarmViewSet
+from .views import AlarmViewSet, FailedNotificationViewSet, NotificationRuleViewSet
 
 router = DefaultRouter()
+router.register(
+    r"alarms/notification-rules", NotificationRuleViewSet, basename="notification-rule"
+)
+router.register(
+    r"alarms/failed-notifications",
+    FailedNotificationViewSet,
+    basename="failed-notification",
+)
 router.register(r"alarms", AlarmViewSet, basename="alarm")
 
 urlpatterns = [
@@ -1,4 +1,8 @@
+import ipaddress
+import socket
 from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
 from django.utils import timezone
 
 def fix_range_times(
@@ -37,3 +41,33 @@ def fix_range_times(
         start_time, end_time = end_time, start_time
 
     return start_time, end_time
+
+
+def check_webhook_url(url: str) -> None:
+    """
+    Checks that a webhook can be called without reaching the internal network:
+    it must use https and its host must only resolve to public addresses.
+
+    Args:
+        - url (str): The url of the webhook.
+
+    Raises:
+        - ValueError: If the url is not allowed, with the reason.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise ValueError("The webhook must use https.")
+    if not parts.hostname:
+        raise ValueError("The webhook has no host.")
+    try:
+        addresses = socket.getaddrinfo(
+            parts.hostname, parts.port or 443, proto=socket.IPPROTO_TCP
+        )
+    except (socket.gaierror, UnicodeError, ValueError) as e:
+        raise ValueError(f"The host of the webhook could not be resolved: {e}") from e
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError("The host of the webhook is not a public address.")
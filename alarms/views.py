@@ -2,13 +2,22 @@ from datetime import timedelta
 from typing import Optional
 
 from django.utils import timezone
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.request import Request
 
-from .models import Alarm, Device
-from .serializers import AlarmSerializer, get_address
+from users.models import CustomUser
+
+from .models import Alarm, Device, FailedNotification, NotificationRule
+from .notifications import get_dispatcher
+from .serializers import (
+    AlarmSerializer,
+    FailedNotificationSerializer,
+    NotificationRuleSerializer,
+    get_address,
+)
 from .utils import fix_range_times
 
 
@@ -125,3 +134,63 @@ class AlarmViewSet(viewsets.ModelViewSet):
         Returns a 405 error for any delete request.
         """
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class NotificationRuleViewSet(viewsets.ModelViewSet):
+    """
+    A viewset for viewing and editing the notification rules of the accounts.
+    Only the rules of the authenticated user's account and of the accounts
+    below it are available. They can be filtered by account with the 'user' parameter.
+    """
+
+    serializer_class = NotificationRuleSerializer
+
+    def get_queryset(self):
+        """
+        Get the queryset of the rules, optionally filtered by the account's uuid.
+        """
+        queryset = NotificationRule.objects.filter(
+            user__in=CustomUser.objects.managed_by(self.request.user)
+        )
+        user: Optional[str] = self.request.query_params.get("user", None)
+        if user is not None:
+            queryset = queryset.filter(user_id=user)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def metrics(self, request: Request):
+        """
+        Returns the histogram of the delivery latencies (in milliseconds)
+        of the notifications sent by this process.
+        """
+        return Response(get_dispatcher().histogram.snapshot())
+
+
+class FailedNotificationViewSet(
+    viewsets.ReadOnlyModelViewSet,
+    mixins.DestroyModelMixin,
+):
+    """
+    A viewset for the notifications that could not be delivered (dead-letter queue).
+    They can be inspected, discarded or delivered again, only for the accounts
+    the authenticated user manages.
+    """
+
+    serializer_class = FailedNotificationSerializer
+
+    def get_queryset(self):
+        """
+        Get the queryset of the failed notifications of the managed accounts.
+        """
+        return FailedNotification.objects.filter(
+            user__in=CustomUser.objects.managed_by(self.request.user)
+        ).order_by("-failed_at")
+
+    @action(detail=True, methods=["post"])
+    def retry(self, request: Request, pk=None):
+        """
+        Removes the notification from the dead-letter queue and delivers it again.
+        If the delivery fails, it returns to the queue.
+        """
+        get_dispatcher().retry(self.get_object())
+        return Response(status=status.HTTP_202_ACCEPTED)
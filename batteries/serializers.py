@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from vehicles.models import Battery
 
-class BatterySerializer(serializers.ModelSerializer):
+class BatterySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Battery
         fields = '__all__'
+        expandable_fields = {"vehicle": "vehicles.serializers.VehicleSerializer"}
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DevicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'devices'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals
@@ -0,0 +1,93 @@
+from typing import Dict, Iterable, List
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from users.models import PhoneNumber
+from .models import UserDevice
+
+CONTACTS_CACHE_PREFIX = "devices:contacts:"
+CONTACTS_CACHE_TIMEOUT = 60 * 60
+
+
+def contacts_cache_key(imei: str) -> str:
+    """Returns the cache key that stores the contacts of a device."""
+    return f"{CONTACTS_CACHE_PREFIX}{imei}"
+
+
+def invalidate_contacts(imeis: Iterable[str]) -> None:
+    """
+    Removes the cached contacts of the given devices so that
+    the next lookup reads them again from the database.
+    """
+    keys = [contacts_cache_key(imei) for imei in imeis if imei]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _load_contacts(imeis: List[str]) -> Dict[str, list]:
+    """
+    Loads the users and phone numbers associated with the given devices.
+
+    Only two queries are made regardless of the number of devices: one for
+    the UserDevice rows (joined with their users) and one for the phone numbers.
+    """
+    user_devices = (
+        UserDevice.objects.filter(device_id__in=imeis, user__isnull=False)
+        .select_related("user")
+        .prefetch_related(
+            Prefetch(
+                "user__phonenumber_set",
+                queryset=PhoneNumber.objects.order_by("id"),
+            )
+        )
+        .order_by("id")
+    )
+
+    contacts: Dict[str, list] = {imei: [] for imei in imeis}
+    for user_device in user_devices:
+        contacts[user_device.device_id].append(
+            {
+                "user": str(user_device.user.uuid),
+                "phone_numbers": [
+                    {"phone_number": str(phone.phone_number)}
+                    for phone in user_device.user.phonenumber_set.all()
+                    if phone.phone_number
+                ],
+            }
+        )
+    return contacts
+
+
+def get_contacts(imeis: Iterable[str]) -> Dict[str, list]:
+    """
+    Resolves the users (with their phone numbers) responsible for each device.
+
+    Cached devices are served from the cache and the rest are loaded in a
+    single batch, so the cost does not depend on the number of devices.
+
+    Args:
+        - imeis (Iterable[str]): The IMEIs of the devices to resolve.
+
+    Returns:
+        - dict: A mapping IMEI -> list of {"user", "phone_numbers"} entries.
+            Unknown devices are mapped to an empty list.
+    """
+    imeis = list(dict.fromkeys(imei for imei in imeis if imei))
+    if not imeis:
+        return {}
+
+    keys = {contacts_cache_key(imei): imei for imei in imeis}
+    cached = cache.get_many(list(keys))
+    contacts = {keys[key]: value for key, value in cached.items()}
+
+    missing = [imei for imei in imeis if imei not in contacts]
+    if missing:
+        loaded = _load_contacts(missing)
+        cache.set_many(
+            {contacts_cache_key(imei): value for imei, value in loaded.items()},
+            CONTACTS_CACHE_TIMEOUT,
+        )
+        contacts.update(loaded)
+
+    return {imei: contacts[imei] for imei in imeis}
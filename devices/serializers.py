@@ -1,11 +1,11 @@
 from rest_framework import serializers
-from users.models import PhoneNumber
 
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from users.serializers import PhoneNumberSerializer
 from .models import Device, UserDevice
 
 
-class DeviceSerializer(serializers.ModelSerializer):
+class DeviceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the Device model. This serializer includes all fields in the Device model
     and supports all CRUD (Create, Retrieve, Update, Delete) operations.
@@ -16,7 +16,7 @@ class DeviceSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class UserDeviceSerializer(serializers.ModelSerializer):
+class UserDeviceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the UserDevice model. This serializer includes the user and device fields,
     which are foreign keys to the CustomUser and Device models respectively.
@@ -33,7 +33,7 @@ class UserDeviceSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserPhoneDeviceSerializer(serializers.ModelSerializer):
+class UserPhoneDeviceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     A serializer for the UserDevice model.
 
@@ -56,5 +56,19 @@ class UserPhoneDeviceSerializer(serializers.ModelSerializer):
         Returns:
             list: A list of phone numbers associated with the user of the UserDevice.
         """
-        phone_numbers = PhoneNumber.objects.filter(user=obj.user)
-        return PhoneNumberSerializer(phone_numbers, many=True).data
+        if obj.user is None:
+            return []
+        # Uses the phone numbers prefetched by the view instead of querying per row.
+        return PhoneNumberSerializer(obj.user.phonenumber_set.all(), many=True).data
+
+
+class DeviceContactsRequestSerializer(serializers.Serializer):
+    """
+    Validates the batch of IMEIs whose contacts are requested.
+    """
+
+    imeis = serializers.ListField(
+        child=serializers.CharField(max_length=15),
+        allow_empty=False,
+        max_length=1000,
+    )
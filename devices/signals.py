@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import PhoneNumber
+from .contacts import invalidate_contacts
+from .models import UserDevice
+
+
+@receiver(pre_save, sender=UserDevice)
+def remember_previous_device(sender, instance: UserDevice, **kwargs):
+    """
+    Stores the device the association pointed to before the update,
+    so its cached contacts can be invalidated as well.
+    """
+    instance._previous_device_id = (
+        sender.objects.filter(pk=instance.pk).values_list("device_id", flat=True).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=UserDevice)
+@receiver(post_delete, sender=UserDevice)
+def invalidate_user_device_contacts(sender, instance: UserDevice, **kwargs):
+    """Invalidates the cached contacts of the devices affected by the change."""
+    invalidate_contacts(
+        [instance.device_id, getattr(instance, "_previous_device_id", None)]
+    )
+
+
+@receiver(pre_save, sender=PhoneNumber)
+def remember_previous_owner(sender, instance: PhoneNumber, **kwargs):
+    """
+    Stores the user the phone number belonged to before the update,
+    so the cached contacts of their devices can be invalidated as well.
+    """
+    instance._previous_user_id = (
+        sender.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=PhoneNumber)
+@receiver(post_delete, sender=PhoneNumber)
+def invalidate_phone_number_contacts(sender, instance: PhoneNumber, **kwargs):
+    """Invalidates the cached contacts of every device used by the phone's owners."""
+    invalidate_contacts(
+        UserDevice.objects.filter(
+            user_id__in=[instance.user_id, getattr(instance, "_previous_user_id", None)]
+        ).values_list("device_id", flat=True)
+    )
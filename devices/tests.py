@@ -1,3 +1,96 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import PhoneNumber
+from wt_iopgps.testing import create_account
+
+from .contacts import get_contacts
+from .models import Device, UserDevice
+
+PHONE = "+14155552671"
+
+
+class ContactsTests(TestCase):
+    """
+    The contacts of the devices are resolved in a fixed number of queries,
+    and the cached ones follow the changes of the phone numbers.
+    """
+
+    url = "/api/v1/devices/contacts/"
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.owner = create_account("owner")
+        self.other = create_account("other")
+        self.device = self.create_device("000000000000001", self.owner)
+        self.other_device = self.create_device("000000000000002", self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner.user)
+
+    def create_device(self, imei: str, account) -> Device:
+        device = Device.objects.create(imei=imei, user_name=f"device{imei}")
+        UserDevice.objects.create(user=account, device=device)
+        return device
+
+    def phone_numbers(self, device: Device) -> list:
+        return [
+            phone["phone_number"]
+            for contact in get_contacts([device.imei])[device.imei]
+            for phone in contact["phone_numbers"]
+        ]
+
+    def test_queries_do_not_depend_on_the_devices(self):
+        imeis = []
+        for number in range(3, 103):
+            imeis.append(self.create_device(f"{number:015d}", self.owner).imei)
+            PhoneNumber.objects.create(user=self.owner, phone_number=PHONE)
+        for count in (1, 10, 100):
+            with self.subTest(count=count):
+                cache.clear()
+                # The devices with their users, and the phone numbers.
+                with self.assertNumQueries(2):
+                    response = self.client.post(
+                        self.url, {"imeis": imeis[:count]}, format="json"
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()), count)
+                with self.assertNumQueries(0):
+                    self.client.post(self.url, {"imeis": imeis[:count]}, format="json")
+
+    def test_unknown_devices_have_no_contacts(self):
+        response = self.client.post(self.url, {"imeis": ["999999999999999"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"999999999999999": []})
+
+    def test_phone_number_changes_are_seen(self):
+        self.assertEqual(self.phone_numbers(self.device), [])
+        phone = PhoneNumber.objects.create(user=self.owner, phone_number=PHONE)
+        self.assertEqual(self.phone_numbers(self.device), [PHONE])
+
+        phone.delete()
+        self.assertEqual(self.phone_numbers(self.device), [])
+
+    def test_reassigned_phone_number_leaves_the_previous_owner(self):
+        phone = PhoneNumber.objects.create(user=self.owner, phone_number=PHONE)
+        self.assertEqual(self.phone_numbers(self.device), [PHONE])
+        self.assertEqual(self.phone_numbers(self.other_device), [])
+
+        phone.user = self.other
+        phone.save()
+        self.assertEqual(self.phone_numbers(self.device), [])
+        self.assertEqual(self.phone_numbers(self.other_device), [PHONE])
+
+    def test_reassigned_device_changes_the_contacts_of_both(self):
+        users = lambda device: [
+            contact["user"] for contact in get_contacts([device.imei])[device.imei]
+        ]
+        self.assertEqual(users(self.device), [str(self.owner.uuid)])
+        self.assertEqual(users(self.other_device), [str(self.other.uuid)])
+
+        user_device = UserDevice.objects.get(device=self.device)
+        user_device.device = self.other_device
+        user_device.save()
+        self.assertEqual(users(self.device), [])
+        self.assertEqual(users(self.other_device), [str(self.owner.uuid), str(self.other.uuid)])
@@ -2,11 +2,14 @@ from collections import namedtuple
 
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.request import Request
 
+from .contacts import get_contacts
 from .models import Device, UserDevice, CustomUser
 from .serializers import (
+    DeviceContactsRequestSerializer,
     DeviceSerializer,
     UserDeviceSerializer,
     UserPhoneDeviceSerializer
@@ -150,6 +153,17 @@ class DeviceViewSet(viewsets.ModelViewSet):
         # If the imei does not exist or the user does not exist, we return an error
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False, methods=["post"])
+    def contacts(self, request: Request):
+        """
+        Resolves the users and phone numbers responsible for a batch of devices.
+        The body must contain an 'imeis' list and the response maps
+        each IMEI to the users associated with it and their phone numbers.
+        """
+        serializer = DeviceContactsRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(get_contacts(serializer.validated_data["imeis"]))
+
 class UserPhoneDeviceList(viewsets.ReadOnlyModelViewSet):
     """
     A viewset for read-only operations on UserDevice instances.
@@ -171,5 +185,7 @@ class UserPhoneDeviceList(viewsets.ReadOnlyModelViewSet):
         """
         imei = self.kwargs.get('imei', None)
         if imei is not None:
-            return UserDevice.objects.filter(device__imei=imei)
+            return UserDevice.objects.filter(device__imei=imei).select_related(
+                "user"
+            ).prefetch_related("user__phonenumber_set")
         return UserDevice.objects.none()
@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
+from uploads.serializers import ImageVariantsField
 from .models import License
 
-class LicenseSerializer(serializers.ModelSerializer):
+class LicenseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    front_image_variants = ImageVariantsField(source="front_image")
+    back_image_variants = ImageVariantsField(source="back_image")
+
     class Meta:
         model = License
         fields = '__all__'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MaintenanceManual, MaintenanceOperation
+from .models import MaintenanceDueEntry, MaintenanceManual, MaintenanceOperation
 
 
 @admin.register(MaintenanceManual)
@@ -24,3 +24,17 @@ class MaintenanceOperationAdmin(admin.ModelAdmin):
         "description",
         "frequency",
     ]
+
+
+@admin.register(MaintenanceDueEntry)
+class MaintenanceDueEntryAdmin(admin.ModelAdmin):
+    list_display = [
+        "vehicle",
+        "operation",
+        "status",
+        "due_distance",
+        "due_time",
+        "alert_distance",
+        "alert_time",
+        "alerted_at",
+    ]
@@ -0,0 +1,349 @@
+"""
+Maintenance advance alerts.
+
+The next occurrence of every operation of every vehicle is kept in the
+MaintenanceDueEntry table with the odometer and time at which its advance
+alert must fire (the due distance and time minus the manual's advance_alerts).
+The entries are refreshed only for the vehicles and operations affected by
+each change: a new reading, a completed work order or an edited manual. The
+changes only mark the affected vehicles (MaintenanceDueRefresh), and the
+AlertScheduler refreshes the marked vehicles, so the requests that make
+them never evaluate the schedule.
+
+Distance thresholds are checked when the entries of a vehicle are refreshed,
+since the odometer only moves with new readings. Time thresholds are fired by
+the AlertScheduler, which keeps the upcoming ones in a heap read from the
+index, so a restarted scheduler picks up where the previous one stopped.
+"""
+import heapq
+import logging
+from time import sleep, time
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+
+from vehicles.models import UserVehicle, Vehicle
+from work_orders.models import StatusChoices, WorkOrder
+
+from .enums import DueStatus, Tasks
+from .models import MaintenanceDueEntry, MaintenanceDueRefresh
+from .schedule import get_due_list
+
+logger = logging.getLogger(__name__)
+
+# Sent with the `entry` (MaintenanceDueEntry) whose advance alert fired.
+maintenance_alert = Signal()
+
+REBUILD_BATCH_SIZE = 500
+OCCURRENCE_FIELDS = ("due_distance", "due_time")
+UPDATE_FIELDS = (
+    "status",
+    "odometer",
+    "last_done",
+    "due_distance",
+    "due_time",
+    "alert_distance",
+    "alert_time",
+    "alerted_at",
+    "work_order",
+)
+
+
+def refresh_entries(
+    vehicles, operations: Optional[Iterable[int]] = None, now: Optional[int] = None
+) -> int:
+    """
+    Recomputes the due entries of some vehicles and fires the advance alerts
+    they have crossed. An entry keeps its alert until its due point moves to
+    a later occurrence, so the alert fires once per occurrence.
+
+    Args:
+        - vehicles (QuerySet): The vehicles whose entries are recomputed.
+        - operations (Iterable[int], optional): Only recompute these operations.
+        - now (int, optional): The unix time to evaluate the schedule at. Now by default.
+
+    Returns:
+        - int: The number of alerts fired.
+    """
+    now = int(time()) if now is None else now
+    operations = None if operations is None else set(operations)
+    computed = [
+        entry
+        for entry in get_due_list(vehicles, now, statuses=DueStatus.values)
+        if operations is None or entry["operation"] in operations
+    ]
+
+    current = MaintenanceDueEntry.objects.filter(vehicle__in=vehicles.values("pk"))
+    if operations is not None:
+        current = current.filter(operation__in=operations)
+    existing = {
+        (str(row["vehicle_id"]), row["operation_id"]): row
+        for row in current.values(
+            "id", "vehicle_id", "operation_id", "alerted_at", "work_order_id",
+            *OCCURRENCE_FIELDS,
+        )
+    }
+
+    objs = []
+    for entry in computed:
+        key = (entry["vehicle"], entry["operation"])
+        obj = MaintenanceDueEntry(
+            vehicle_id=entry["vehicle"],
+            operation_id=entry["operation"],
+            status=entry["status"],
+            odometer=entry["odometer"],
+            last_done=entry["last_done"],
+            due_distance=entry["next_due_distance"],
+            due_time=entry["next_due_time"],
+            alert_distance=entry["alert_distance"],
+            alert_time=entry["alert_time"],
+        )
+        previous = existing.pop(key, None)
+        if previous is not None and not is_later_occurrence(previous, obj):
+            obj.alerted_at = previous["alerted_at"]
+            obj.work_order_id = previous["work_order_id"]
+        objs.append(obj)
+
+    with transaction.atomic():
+        if existing:
+            MaintenanceDueEntry.objects.filter(
+                pk__in=[row["id"] for row in existing.values()]
+            ).delete()
+        MaintenanceDueEntry.objects.bulk_create(
+            objs,
+            batch_size=REBUILD_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["vehicle", "operation"],
+            update_fields=UPDATE_FIELDS,
+        )
+    return fire_alerts(current.crossed(now), now)
+
+
+def is_later_occurrence(previous: dict, entry: MaintenanceDueEntry) -> bool:
+    """
+    Returns whether the due point of an entry moved past its previous one, which
+    happens when the operation is completed. A due distance or time that becomes
+    known (e.g. with the first reading of the vehicle) or earlier (e.g. with a
+    shorter frequency) belongs to the same occurrence, whose alert already fired.
+    """
+    return any(
+        previous[field] is not None
+        and getattr(entry, field) is not None
+        and getattr(entry, field) > previous[field]
+        for field in OCCURRENCE_FIELDS
+    )
+
+
+def mark_for_refresh(vehicle_ids: Iterable) -> None:
+    """Marks the vehicles whose due entries the AlertScheduler must refresh."""
+    MaintenanceDueRefresh.objects.bulk_create(
+        [MaintenanceDueRefresh(vehicle_id=vehicle_id) for vehicle_id in set(vehicle_ids)],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_marked(batch_size: int = REBUILD_BATCH_SIZE, now: Optional[int] = None) -> int:
+    """
+    Refreshes the due entries of the vehicles marked by mark_for_refresh(),
+    a batch at a time. The marks are removed in the transaction that refreshes
+    their vehicles, so a reading registered meanwhile marks the vehicle again.
+
+    Returns:
+        - int: The number of alerts fired.
+    """
+    fired = 0
+    while True:
+        with transaction.atomic():
+            vehicle_ids = list(
+                MaintenanceDueRefresh.objects.select_for_update()
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not vehicle_ids:
+                return fired
+            MaintenanceDueRefresh.objects.filter(pk__in=vehicle_ids).delete()
+            fired += refresh_entries(Vehicle.objects.filter(pk__in=vehicle_ids), now=now)
+
+
+def rebuild_entries(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """
+    Recomputes the due entries of every vehicle, a batch of vehicles at a time.
+    It is only needed to build the index for the first time.
+
+    Returns:
+        - int: The number of alerts fired.
+    """
+    fired = 0
+    vehicle_ids = list(Vehicle.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(vehicle_ids), batch_size):
+        fired += refresh_entries(
+            Vehicle.objects.filter(pk__in=vehicle_ids[start:start + batch_size])
+        )
+    return fired
+
+
+def get_owner_id(vehicle_id):
+    """Returns the id of the first user who registered the vehicle, if any."""
+    return (
+        UserVehicle.objects.filter(vehicle_id=vehicle_id)
+        .order_by("id")
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+def create_work_order(entry: MaintenanceDueEntry, now: int) -> Optional[WorkOrder]:
+    """
+    Returns a work order for the operation of an entry, reusing the one already
+    open for the vehicle and operation, or creating it for the vehicle's owner.
+    Vehicles without owner get no work order.
+    """
+    open_order = (
+        WorkOrder.objects.filter(vehicle_id=entry.vehicle_id, operation_id=entry.operation_id)
+        .exclude(completion__status=StatusChoices.COMPLETED)
+        .order_by("-issue_date_unix")
+        .first()
+    )
+    if open_order is not None:
+        return open_order
+    owner_id = get_owner_id(entry.vehicle_id)
+    if owner_id is None:
+        return None
+    operation = entry.operation
+    return WorkOrder.objects.create(
+        responsible_id=owner_id,
+        created_by_id=owner_id,
+        vehicle_id=entry.vehicle_id,
+        issue_date_unix=now,
+        maintenance_type="Preventive",
+        work_type=f"{operation.system} - {operation.subsystem}: {Tasks(operation.task).label}",
+        operation=operation,
+    )
+
+
+def fire_alerts(entries, now: Optional[int] = None) -> int:
+    """
+    Fires the advance alerts of some entries: marks them as alerted, creates
+    their work orders when MAINTENANCE_AUTO_WORK_ORDERS is enabled and sends
+    the maintenance_alert signal. Each entry is claimed with a conditional
+    update, so an alert never fires twice even if several processes race.
+
+    Returns:
+        - int: The number of alerts fired.
+    """
+    now = int(time()) if now is None else now
+    fired = 0
+    for entry in entries.select_related("vehicle", "operation"):
+        overdue = (entry.due_time is not None and entry.due_time <= now) or (
+            entry.due_distance is not None
+            and entry.odometer is not None
+            and entry.due_distance <= entry.odometer
+        )
+        entry.status = DueStatus.OVERDUE if overdue else DueStatus.DUE_SOON
+        entry.alerted_at = now
+        claimed = MaintenanceDueEntry.objects.filter(
+            pk=entry.pk, alerted_at__isnull=True
+        ).update(alerted_at=now, status=entry.status)
+        if not claimed:
+            continue
+        if settings.MAINTENANCE_AUTO_WORK_ORDERS:
+            entry.work_order = create_work_order(entry, now)
+            if entry.work_order is not None:
+                entry.save(update_fields=["work_order"])
+        logger.info(
+            "Maintenance alert for vehicle %s: operation %s is %s",
+            entry.vehicle_id,
+            entry.operation_id,
+            entry.status,
+        )
+        maintenance_alert.send(sender=MaintenanceDueEntry, entry=entry)
+        fired += 1
+    return fired
+
+
+class AlertScheduler:
+    """
+    Fires the advance alerts that are due by time, and refreshes the entries of
+    the vehicles marked for refresh every `refresh_interval` seconds.
+
+    The upcoming alert times are held in a heap of (alert time, entry id) that
+    only covers the next `interval` seconds; the index is read again once that
+    window has passed, which also picks up the entries refreshed meanwhile by
+    other processes. Every alert is checked against the index when popped,
+    since its entry may have been recomputed or already fired.
+    """
+
+    def __init__(self, interval: Optional[int] = None, refresh_interval: Optional[float] = None):
+        self.interval = interval or settings.MAINTENANCE_SCHEDULER_INTERVAL
+        self.refresh_interval = refresh_interval or settings.MAINTENANCE_REFRESH_INTERVAL
+        self.loaded_until = 0
+        self._heap: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def load(self, now: int) -> int:
+        """
+        Fires the alerts already crossed, which were missed while no scheduler
+        was running, and rebuilds the heap with the upcoming ones.
+
+        Returns:
+            - int: The number of alerts fired.
+        """
+        fired = fire_alerts(MaintenanceDueEntry.objects.crossed(now), now)
+        self.loaded_until = now + self.interval
+        self._heap = list(
+            MaintenanceDueEntry.objects.pending()
+            .filter(alert_time__gt=now, alert_time__lte=self.loaded_until)
+            .values_list("alert_time", "id")
+        )
+        heapq.heapify(self._heap)
+        return fired
+
+    def next_time(self) -> Optional[int]:
+        """Returns the time of the next alert in the heap, if any."""
+        return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now: int) -> int:
+        """
+        Fires the alerts of the heap whose time has come.
+
+        Returns:
+            - int: The number of alerts fired.
+        """
+        ids = []
+        while self._heap and self._heap[0][0] <= now:
+            ids.append(heapq.heappop(self._heap)[1])
+        if not ids:
+            return 0
+        return fire_alerts(
+            MaintenanceDueEntry.objects.filter(pk__in=ids).crossed(now), now
+        )
+
+    def run(self, once: bool = False) -> int:
+        """
+        Fires the alerts as they come due until interrupted.
+
+        Args:
+            - once (bool): Only fire the alerts already due and return.
+
+        Returns:
+            - int: The number of alerts fired.
+        """
+        fired = refresh_marked() + self.load(int(time()))
+        while not once:
+            wake = min(
+                self.next_time() or self.loaded_until,
+                self.loaded_until,
+                time() + self.refresh_interval,
+            )
+            sleep(max(0.0, wake - time()))
+            fired += refresh_marked()
+            now = int(time())
+            if now >= self.loaded_until:
+                fired += self.load(now)
+            else:
+                fired += self.run_pending(now)
+        return fired
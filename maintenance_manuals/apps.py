@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MaintenanceManualsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'maintenance_manuals'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals
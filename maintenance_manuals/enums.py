@@ -43,3 +43,36 @@ class Tasks(models.TextChoices):
     CHECK = "CK", _("Check.")
     TEST = "TS", _("Test.")
     SERVICE = "SV", _("Service.")
+
+
+class DueStatus(models.TextChoices):
+    """
+    Enumeration of the statuses of a maintenance operation of a vehicle.
+    """
+
+    OK = "ok", _("OK")
+    DUE_SOON = "due_soon", _("Due soon")
+    OVERDUE = "overdue", _("Overdue")
+
+
+# Factors that convert the units of the frequency strings to meters.
+# The regular expression of the frequencies also accepts the decametre and
+# hectometre, and 'nm' is read as nautical miles, not nanometres.
+DISTANCE_FACTORS = {
+    "m": 1.0,
+    "dam": 10.0,
+    "hm": 100.0,
+    "km": 1000.0,
+    "mi": 1609.344,
+    "nm": 1852.0,
+    "nmi": 1852.0,
+}
+# Factors that convert the units of the frequency strings to seconds.
+# Months and years are the average Gregorian ones.
+TIME_FACTORS = {
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+    "m": 2629746,
+    "y": 31556952,
+}
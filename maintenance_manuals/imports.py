@@ -0,0 +1,153 @@
+import re
+from typing import List
+
+from django.core.validators import RegexValidator
+from django.db import transaction
+from rest_framework import serializers
+
+from vehicles.models import Vehicle, VehicleType
+
+from .alerts import mark_for_refresh
+from .enums import Tasks
+from .manual_cache import invalidate_manuals
+from .models import (
+    DEFAULT_FREQUENCY_VALUE,
+    FRECUENCY_VALIDATOR,
+    MaintenanceManual,
+    MaintenanceOperation,
+)
+from .schedule import parse_frequency
+
+IMPORT_BATCH_SIZE = 500
+# Compiled once for every row of every import.
+FREQUENCY_PATTERN = re.compile(FRECUENCY_VALIDATOR)
+
+
+class FrequencyField(serializers.CharField):
+    """
+    CharField for the frequency strings. Besides matching FRECUENCY_VALIDATOR,
+    the units must be known by the maintenance schedule.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_length", 64)
+        super().__init__(**kwargs)
+        self.validators.append(
+            RegexValidator(FREQUENCY_PATTERN, "Enter a frequency such as '10000km,6000mi,6m'.")
+        )
+
+    def run_validators(self, value):
+        super().run_validators(value)
+        try:
+            parse_frequency(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e)) from e
+
+
+class ManualImportSerializer(serializers.Serializer):
+    """
+    Validates the fields of the manual created by an import.
+    """
+
+    start_date = serializers.DateField()
+    advance_alerts = FrequencyField(default=DEFAULT_FREQUENCY_VALUE)
+    minimum_frequency = FrequencyField(default=DEFAULT_FREQUENCY_VALUE)
+    end_of_cycle = FrequencyField(default=DEFAULT_FREQUENCY_VALUE)
+
+
+class OperationImportRowSerializer(serializers.Serializer):
+    """
+    Validates a row of a maintenance manual import file.
+    """
+
+    system = serializers.CharField(max_length=50)
+    subsystem = serializers.CharField(max_length=50)
+    task = serializers.ChoiceField(choices=Tasks.choices)
+    frequency = FrequencyField()
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    help_me = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def to_internal_value(self, data):
+        # Empty CSV cells are treated as missing values.
+        if isinstance(data, dict):
+            data = {key: value for key, value in data.items() if value not in ("", None)}
+        return super().to_internal_value(data)
+
+
+class ManualImporter:
+    """
+    Creates a maintenance manual of a vehicle type with its operations from the
+    rows of an import file.
+
+    Every row is validated in a single pass and the import is all or nothing:
+    if any row is invalid nothing is created and every error is reported. The
+    operations are inserted with `bulk_create` in the same transaction as the
+    manual. Since `bulk_create` sends no signals, the cached manuals of the
+    vehicle type and the due entries of its vehicles are refreshed explicitly
+    once the transaction is committed.
+    """
+
+    def __init__(self, vehicle_type: VehicleType, batch_size: int = IMPORT_BATCH_SIZE):
+        self.vehicle_type = vehicle_type
+        self.batch_size = batch_size
+        self.errors: List[dict] = []
+
+    def add_error(self, row: int, errors):
+        """Registers the errors of a row (numbered from 1, 0 for the manual)."""
+        self.errors.append({"row": row, "errors": errors})
+
+    def validate(self, rows: List[dict]) -> List[dict]:
+        """Returns the validated data of the valid rows."""
+        valid = []
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                self.add_error(number, {"non_field_errors": ["Expected an object."]})
+                continue
+            serializer = OperationImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                self.add_error(number, serializer.errors)
+        return valid
+
+    def run(self, manual_data: dict, rows: List[dict]) -> dict:
+        """
+        Imports the manual and its operations and returns a report with the
+        manual created (None if the import failed), the number of operations
+        created and the errors of the rows.
+
+        Args:
+            - manual_data (dict): The start_date, advance_alerts, minimum_frequency
+                and end_of_cycle of the manual.
+            - rows (list): The operations, with system, subsystem, task, frequency
+                and optionally description and help_me.
+        """
+        manual_serializer = ManualImportSerializer(data=manual_data)
+        if not manual_serializer.is_valid():
+            self.add_error(0, manual_serializer.errors)
+        if not rows:
+            self.add_error(0, {"non_field_errors": ["The file has no operations."]})
+        operations = self.validate(rows)
+        if self.errors:
+            return {"manual": None, "total": len(rows), "created": 0, "errors": self.errors}
+
+        with transaction.atomic():
+            manual = MaintenanceManual.objects.create(
+                vehicle_type=self.vehicle_type, **manual_serializer.validated_data
+            )
+            created = MaintenanceOperation.objects.bulk_create(
+                [MaintenanceOperation(manual=manual, **data) for data in operations],
+                batch_size=self.batch_size,
+            )
+            # The signals of the operations are skipped by bulk_create.
+            mark_for_refresh(
+                Vehicle.objects.filter(vehicle_type=self.vehicle_type).values_list("pk", flat=True)
+            )
+            transaction.on_commit(lambda: invalidate_manuals([self.vehicle_type.id]))
+
+        return {
+            "manual": str(manual.muid),
+            "total": len(rows),
+            "created": len(created),
+            "errors": [],
+        }
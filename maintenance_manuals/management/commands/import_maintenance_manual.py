@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from maintenance_manuals.imports import ManualImporter
+from users.imports import read_rows
+from vehicles.models import VehicleType
+
+
+class Command(BaseCommand):
+    """
+    Creates a maintenance manual of a vehicle type with its operations from a
+    CSV or JSON file. Nothing is created if any row is invalid.
+    """
+
+    help = "Creates a maintenance manual with its operations from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or JSON file with the operations.")
+        parser.add_argument(
+            "--vehicle-type", type=int, required=True, help="Id of the vehicle type."
+        )
+        parser.add_argument(
+            "--start-date", required=True, help="Start date of the maintenance cycle (YYYY-MM-DD)."
+        )
+        parser.add_argument("--advance-alerts", help="Advance alerts, such as '500km,-,2w'.")
+        parser.add_argument("--minimum-frequency", help="Minimum frequency of the operations.")
+        parser.add_argument("--end-of-cycle", help="End of the maintenance cycle.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="Format of the file. By default it is taken from the file extension.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            vehicle_type = VehicleType.objects.get(id=options["vehicle_type"])
+        except VehicleType.DoesNotExist as e:
+            raise CommandError(f"Vehicle type {options['vehicle_type']} does not exist.") from e
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            with path.open("rb") as file:
+                rows = read_rows(file, file_format)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(str(e)) from e
+
+        manual_data = {
+            field: options[field]
+            for field in ("start_date", "advance_alerts", "minimum_frequency", "end_of_cycle")
+            if options[field] is not None
+        }
+        report = ManualImporter(vehicle_type).run(manual_data, rows)
+        for error in report["errors"]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        if report["errors"]:
+            raise CommandError(f"The manual was not imported: {len(report['errors'])} errors.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Manual {report['manual']} created with {report['created']} operations."
+            )
+        )
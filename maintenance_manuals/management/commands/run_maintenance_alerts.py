@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from maintenance_manuals.alerts import AlertScheduler, rebuild_entries
+
+
+class Command(BaseCommand):
+    """
+    Runs the scheduler of the maintenance advance alerts, which also refreshes
+    the due entries of the vehicles with new readings. The alerts crossed
+    while it was stopped fire as soon as it starts.
+    """
+
+    help = "Fires the maintenance advance alerts as they come due."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute the due entries of every vehicle before starting.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Refresh the marked vehicles, fire the alerts already due and exit.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="Seconds between reads of the due index.",
+        )
+
+    def handle(self, *args, **options):
+        fired = 0
+        if options["rebuild"]:
+            fired += rebuild_entries()
+        fired += AlertScheduler(options["interval"]).run(options["once"])
+        self.stdout.write(self.style.SUCCESS(f"{fired} maintenance alerts fired."))
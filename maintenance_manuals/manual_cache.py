@@ -0,0 +1,91 @@
+import hashlib
+from typing import Iterable, List, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import MaintenanceManual
+from .serializers import MaintenanceManualSerializer
+
+MANUALS_CACHE_PREFIX = "maintenance:manuals:"
+
+
+def version_cache_key(vehicle_type_id) -> str:
+    """Returns the cache key that stores the current version of the manuals of a vehicle type."""
+    return f"{MANUALS_CACHE_PREFIX}version:{vehicle_type_id}"
+
+
+def manuals_cache_key(vehicle_type_id, version: str) -> str:
+    """Returns the cache key that stores a version of the manuals of a vehicle type."""
+    return f"{MANUALS_CACHE_PREFIX}{vehicle_type_id}:{version}"
+
+
+def manuals_etag(vehicle_type_id, version: str, base_url: str) -> str:
+    """
+    Returns the ETag of a version of the manuals of a vehicle type, whose file
+    URLs are made absolute with the given base URL.
+    """
+    host = hashlib.sha256(base_url.encode()).hexdigest()[:12]
+    return f'"{vehicle_type_id}-{version}-{host}"'
+
+
+def get_version(vehicle_type_id) -> str:
+    """
+    Returns the current version of the manuals of a vehicle type. Versions are
+    random, so a version lost by the cache never reuses the ETag of older data.
+    """
+    key = version_cache_key(vehicle_type_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        # Another process may have set it meanwhile.
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_manuals(vehicle_type_ids: Iterable) -> None:
+    """
+    Moves the manuals of the given vehicle types to a new version, so the
+    serialized ones are no longer read and expire on their own.
+    """
+    versions = {
+        version_cache_key(vehicle_type_id): uuid4().hex
+        for vehicle_type_id in set(vehicle_type_ids)
+        if vehicle_type_id
+    }
+    if versions:
+        cache.set_many(versions, None)
+
+
+def get_manuals(vehicle_type_id) -> Tuple[str, List[dict]]:
+    """
+    Returns the current version of the manuals of a vehicle type and the
+    manuals serialized with their operations, from the cache when possible.
+    They are serialized without a request, so the URLs of their files are the
+    storage ones until absolute_file_urls() adds the host of a request.
+    """
+    version = get_version(vehicle_type_id)
+    key = manuals_cache_key(vehicle_type_id, version)
+    manuals = cache.get(key)
+    if manuals is None:
+        queryset = MaintenanceManual.objects.filter(
+            vehicle_type=vehicle_type_id
+        ).prefetch_related("manual_tasks")
+        manuals = MaintenanceManualSerializer(queryset, many=True).data
+        cache.set(key, manuals, settings.MAINTENANCE_MANUALS_CACHE_TIMEOUT)
+    return version, manuals
+
+
+def absolute_file_urls(manuals: List[dict], request) -> List[dict]:
+    """
+    Returns the manuals with the URLs of their files made absolute for the request,
+    as the serializer does when it has the request, without changing the given ones.
+    """
+    return [
+        {**manual, "manual_file": request.build_absolute_uri(manual["manual_file"])}
+        if manual.get("manual_file")
+        else manual
+        for manual in manuals
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0007_vehicle_current_condition'),
+        ('work_orders', '0002_workorder_operation'),
+        ('maintenance_manuals', '0004_remove_maintenancemanual_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceDueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('due_soon', 'Due soon'), ('overdue', 'Overdue')], default='ok', help_text='Whether the operation was overdue or due soon when last evaluated.', max_length=20, verbose_name='Status')),
+                ('odometer', models.FloatField(blank=True, help_text='The odometer of the vehicle when last evaluated, in meters.', null=True, verbose_name='Odometer')),
+                ('last_done', models.PositiveBigIntegerField(blank=True, help_text='The unix time the operation was last completed, if ever.', null=True, verbose_name='Last done')),
+                ('due_distance', models.FloatField(blank=True, help_text='The odometer, in meters, at which the operation is due.', null=True, verbose_name='Due distance')),
+                ('due_time', models.BigIntegerField(blank=True, help_text='The unix time at which the operation is due.', null=True, verbose_name='Due time')),
+                ('alert_distance', models.FloatField(blank=True, help_text='The odometer, in meters, at which the advance alert fires.', null=True, verbose_name='Alert distance')),
+                ('alert_time', models.BigIntegerField(blank=True, help_text='The unix time at which the advance alert fires.', null=True, verbose_name='Alert time')),
+                ('alerted_at', models.PositiveBigIntegerField(blank=True, help_text='The unix time the advance alert fired for the current due date.', null=True, verbose_name='Alerted at')),
+                ('operation', models.ForeignKey(help_text='The operation of the maintenance manual.', on_delete=django.db.models.deletion.CASCADE, related_name='due_entries', to='maintenance_manuals.maintenanceoperation')),
+                ('vehicle', models.ForeignKey(help_text='The vehicle that must undergo the operation.', on_delete=django.db.models.deletion.CASCADE, related_name='maintenance_due', to='vehicles.vehicle')),
+                ('work_order', models.ForeignKey(blank=True, help_text='The work order created by the advance alert.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='due_entries', to='work_orders.workorder')),
+            ],
+            options={
+                'verbose_name': 'Maintenance due entry',
+                'verbose_name_plural': 'Maintenance due entries',
+                'indexes': [models.Index(fields=['alerted_at', 'alert_time'], name='maintenance_due_alert_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='maintenancedueentry',
+            constraint=models.UniqueConstraint(fields=('vehicle', 'operation'), name='maintenance_due_entry_unique'),
+        ),
+    ]
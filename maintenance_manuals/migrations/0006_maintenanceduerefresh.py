@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0008_vehicletype_lookup_index'),
+        ('maintenance_manuals', '0005_maintenancedueentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceDueRefresh',
+            fields=[
+                ('vehicle', models.OneToOneField(help_text='The vehicle whose due entries are outdated.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='maintenance_due_refresh', serialize=False, to='vehicles.vehicle')),
+            ],
+            options={
+                'verbose_name': 'Maintenance due refresh',
+                'verbose_name_plural': 'Maintenance due refreshes',
+            },
+        ),
+    ]
@@ -3,10 +3,10 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 
-from vehicles.models import VehicleType
+from vehicles.models import Vehicle, VehicleType
 
 from .utils import path_and_rename
-from .enums import Tasks
+from .enums import DueStatus, Tasks
 
 
 DISTANCE_VALIDATOR = r"(\d+(([hkn]{0,1}|da)m(i){0,1})|\-)"
@@ -139,3 +139,144 @@ class MaintenanceOperation(models.Model):
 
     def __str__(self):
         return f"{self.task} every {self.frequency}"
+
+
+class MaintenanceDueEntryQuerySet(models.QuerySet):
+    """
+    QuerySet for the MaintenanceDueEntry model.
+    """
+
+    def pending(self):
+        """Returns the entries whose advance alert has not fired yet."""
+        return self.filter(alerted_at__isnull=True)
+
+    def crossed(self, now: int):
+        """
+        Returns the pending entries whose advance alert is due: the time has
+        reached its alert time or the odometer has reached its alert distance.
+        """
+        return self.pending().filter(
+            models.Q(alert_time__lte=now)
+            | models.Q(alert_distance__lte=models.F("odometer"))
+        )
+
+
+class MaintenanceDueEntry(models.Model):
+    """
+    Represents the next occurrence of a maintenance operation for a vehicle:
+    when it is due and when its advance alert must fire. The entries are a
+    precomputed index of the maintenance schedule, refreshed only for the
+    vehicles and operations affected by each change.
+    """
+
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name="maintenance_due",
+        help_text=_("The vehicle that must undergo the operation."),
+    )
+    operation = models.ForeignKey(
+        MaintenanceOperation,
+        on_delete=models.CASCADE,
+        related_name="due_entries",
+        help_text=_("The operation of the maintenance manual."),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=DueStatus.choices,
+        default=DueStatus.OK,
+        help_text=_("Whether the operation was overdue or due soon when last evaluated."),
+    )
+    odometer = models.FloatField(
+        _("Odometer"),
+        null=True,
+        blank=True,
+        help_text=_("The odometer of the vehicle when last evaluated, in meters."),
+    )
+    last_done = models.PositiveBigIntegerField(
+        _("Last done"),
+        null=True,
+        blank=True,
+        help_text=_("The unix time the operation was last completed, if ever."),
+    )
+    due_distance = models.FloatField(
+        _("Due distance"),
+        null=True,
+        blank=True,
+        help_text=_("The odometer, in meters, at which the operation is due."),
+    )
+    due_time = models.BigIntegerField(
+        _("Due time"),
+        null=True,
+        blank=True,
+        help_text=_("The unix time at which the operation is due."),
+    )
+    alert_distance = models.FloatField(
+        _("Alert distance"),
+        null=True,
+        blank=True,
+        help_text=_("The odometer, in meters, at which the advance alert fires."),
+    )
+    alert_time = models.BigIntegerField(
+        _("Alert time"),
+        null=True,
+        blank=True,
+        help_text=_("The unix time at which the advance alert fires."),
+    )
+    alerted_at = models.PositiveBigIntegerField(
+        _("Alerted at"),
+        null=True,
+        blank=True,
+        help_text=_("The unix time the advance alert fired for the current due date."),
+    )
+    work_order = models.ForeignKey(
+        "work_orders.WorkOrder",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="due_entries",
+        help_text=_("The work order created by the advance alert."),
+    )
+
+    objects = MaintenanceDueEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Maintenance due entry")
+        verbose_name_plural = _("Maintenance due entries")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vehicle", "operation"], name="maintenance_due_entry_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["alerted_at", "alert_time"], name="maintenance_due_alert_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle}: {self.operation} - {self.status}"
+
+
+class MaintenanceDueRefresh(models.Model):
+    """
+    Marks a vehicle whose due entries must be recomputed. The requests that
+    register readings only insert the mark, and the AlertScheduler refreshes
+    the marked vehicles, so the schedule is never evaluated during a request.
+    """
+
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="maintenance_due_refresh",
+        help_text=_("The vehicle whose due entries are outdated."),
+    )
+
+    class Meta:
+        verbose_name = _("Maintenance due refresh")
+        verbose_name_plural = _("Maintenance due refreshes")
+
+    def __str__(self):
+        return f"{self.vehicle_id}"
@@ -0,0 +1,358 @@
+"""
+Maintenance schedule engine.
+
+The frequencies of the manuals and operations are strings such as
+'10000km,6000mi,6m': two distances (usually the same one in two units) and a
+time, any of them '-' when it does not apply. They are parsed once into
+Frequency tuples (meters and seconds), and each manual is compiled with its
+operations and cached until any of its strings changes.
+
+An operation is due when the vehicle has traveled its distance or its time has
+passed since the operation was last performed, whichever comes first. The last
+time an operation was performed is the latest completed work order linked to
+it; operations never performed count from the start date of the manual. The
+odometer at those moments is interpolated from the vehicle's readings.
+"""
+import logging
+import re
+import threading
+from datetime import datetime
+from functools import lru_cache
+from time import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db.models import F, OuterRef, Subquery, Value, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from mileage.models import Mileage
+from mileage.series import annotate_odometer, odometer_at
+from vehicles.models import Vehicle
+from work_orders.models import StatusChoices, WorkOrderCompletion
+
+from .enums import DISTANCE_FACTORS, TIME_FACTORS, DueStatus
+from .models import FRECUENCY_VALIDATOR, MaintenanceManual
+
+logger = logging.getLogger(__name__)
+
+OK = DueStatus.OK.value
+DUE_SOON = DueStatus.DUE_SOON.value
+OVERDUE = DueStatus.OVERDUE.value
+
+QUANTITY_PATTERN = re.compile(r"^(\d+)([a-z]+)$")
+
+
+class Frequency(NamedTuple):
+    """A parsed frequency: a distance in meters and a time in seconds (None if not set)."""
+
+    distance: Optional[float]
+    time: Optional[int]
+
+
+class CompiledOperation(NamedTuple):
+    """An operation of a manual with its interval already parsed."""
+
+    id: int
+    system: str
+    subsystem: str
+    task: str
+    interval: Frequency
+
+
+class CompiledManual(NamedTuple):
+    """A manual with its start time, advance alerts and operations already parsed."""
+
+    muid: str
+    vehicle_type_id: int
+    start_time: int
+    advance: Frequency
+    operations: Tuple[CompiledOperation, ...]
+
+
+def _parse_quantity(value: str, factors: dict):
+    if value == "-":
+        return None
+    match = QUANTITY_PATTERN.match(value)
+    if match is None or match.group(2) not in factors:
+        raise ValueError(f"Unknown quantity: {value}")
+    # A frequency of zero would make the operation due all the time.
+    return int(match.group(1)) * factors[match.group(2)] or None
+
+
+@lru_cache(maxsize=4096)
+def parse_frequency(value: str) -> Frequency:
+    """
+    Parses a frequency string. When both distances are set, the shorter one is used.
+
+    Raises:
+        - ValueError: If the string does not match FRECUENCY_VALIDATOR or uses an unknown unit.
+    """
+    if not re.match(FRECUENCY_VALIDATOR, value):
+        raise ValueError(f"Invalid frequency: {value}")
+    first, second, period = value.split(",")
+    distances = [
+        distance
+        for distance in (
+            _parse_quantity(first, DISTANCE_FACTORS),
+            _parse_quantity(second, DISTANCE_FACTORS),
+        )
+        if distance is not None
+    ]
+    return Frequency(
+        min(distances) if distances else None, _parse_quantity(period, TIME_FACTORS)
+    )
+
+
+def _shortest(*values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def time_of_date(date) -> int:
+    """Returns the unix time of the start of a date in the current time zone."""
+    return int(timezone.make_aware(datetime.combine(date, datetime.min.time())).timestamp())
+
+
+_compiled: Dict[str, Tuple[tuple, CompiledManual]] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_manual(manual: MaintenanceManual) -> CompiledManual:
+    """
+    Returns the compiled form of a manual, whose operations must be prefetched.
+    The interval of each operation is never longer than the minimum frequency
+    of the manual. Operations with invalid frequencies are skipped.
+    """
+    operations = list(manual.manual_tasks.all())
+    signature = (
+        manual.vehicle_type_id,
+        manual.start_date,
+        manual.advance_alerts,
+        manual.minimum_frequency,
+        tuple(
+            (op.id, op.system, op.subsystem, op.task, op.frequency) for op in operations
+        ),
+    )
+    key = str(manual.muid)
+    with _compiled_lock:
+        cached = _compiled.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        advance = parse_frequency(manual.advance_alerts)
+        minimum = parse_frequency(manual.minimum_frequency)
+    except ValueError as e:
+        logger.warning("Maintenance manual %s is ignored: %s", key, e)
+        advance, minimum, operations = Frequency(None, None), Frequency(None, None), []
+    compiled_operations = []
+    for op in operations:
+        try:
+            frequency = parse_frequency(op.frequency)
+        except ValueError as e:
+            logger.warning("Maintenance operation %s is ignored: %s", op.id, e)
+            continue
+        interval = Frequency(
+            _shortest(frequency.distance, minimum.distance),
+            _shortest(frequency.time, minimum.time),
+        )
+        if interval.distance is None and interval.time is None:
+            continue
+        compiled_operations.append(
+            CompiledOperation(op.id, op.system, op.subsystem, op.task, interval)
+        )
+    compiled = CompiledManual(
+        key,
+        manual.vehicle_type_id,
+        time_of_date(manual.start_date),
+        advance,
+        tuple(compiled_operations),
+    )
+    with _compiled_lock:
+        _compiled[key] = (signature, compiled)
+    return compiled
+
+
+def get_status(
+    advance: Frequency,
+    remaining_distance: Optional[float],
+    remaining_time: Optional[int],
+) -> str:
+    """Returns whether an operation is overdue, due soon or neither."""
+    if (remaining_distance is not None and remaining_distance <= 0) or (
+        remaining_time is not None and remaining_time <= 0
+    ):
+        return OVERDUE
+    if (
+        remaining_distance is not None
+        and advance.distance is not None
+        and remaining_distance <= advance.distance
+    ) or (
+        remaining_time is not None
+        and advance.time is not None
+        and remaining_time <= advance.time
+    ):
+        return DUE_SOON
+    return OK
+
+
+def _baseline(row: dict, at: int) -> Optional[float]:
+    # Vehicles tracked only after the moment count from their first reading.
+    value = odometer_at(row, at)
+    if value is None and row["odometer_after_value"] is not None:
+        value = float(row["odometer_after_value"])
+    return value
+
+
+def get_due_list(
+    vehicles=None, now: Optional[int] = None, statuses: Iterable[str] = (DUE_SOON, OVERDUE)
+) -> List[dict]:
+    """
+    Computes the maintenance schedule of a fleet in bulk and returns the
+    operations with the given statuses, the overdue ones first.
+
+    The number of queries does not depend on the number of vehicles: the
+    manuals and their operations, the vehicles with their current odometer,
+    their odometer at each distinct start date of the manuals, and the last
+    completion of every operation with the odometer at that moment.
+
+    Args:
+        - vehicles (QuerySet, optional): The vehicles to evaluate. Every vehicle by default.
+        - now (int, optional): The unix time to evaluate the schedule at. Now by default.
+        - statuses (Iterable[str]): The statuses to return ('ok', 'due_soon', 'overdue').
+
+    Returns:
+        - list: The entries with the vehicle, operation, status, next due distance
+            (meters) and time, what remains until them, and the distance and time
+            at which the advance alert is due.
+    """
+    now = int(time()) if now is None else now
+    statuses = set(statuses)
+    vehicles = Vehicle.objects.all() if vehicles is None else vehicles
+
+    manuals: Dict[int, List[CompiledManual]] = {}
+    queryset = MaintenanceManual.objects.filter(
+        vehicle_type__in=vehicles.values("vehicle_type")
+    ).prefetch_related("manual_tasks")
+    for manual in queryset:
+        compiled = compile_manual(manual)
+        if compiled.operations:
+            manuals.setdefault(compiled.vehicle_type_id, []).append(compiled)
+    if not manuals:
+        return []
+
+    vehicles = vehicles.filter(vehicle_type__in=list(manuals))
+    current = Mileage.objects.distances().filter(
+        vehicle=OuterRef("pk"), canonical_mileage__isnull=False
+    ).order_by("-unix_time_registered", "-id")
+    rows = list(
+        vehicles.annotate(
+            current_odometer=Subquery(current.values("canonical_mileage")[:1])
+        ).values("vuid", "plate", "vehicle_type_id", "current_odometer")
+    )
+
+    start_odometers: Dict[tuple, Optional[float]] = {}
+    start_times: Dict[int, List[int]] = {}
+    for type_manuals in manuals.values():
+        for manual in type_manuals:
+            start_times.setdefault(manual.start_time, []).append(manual.vehicle_type_id)
+    for start_time, vehicle_types in start_times.items():
+        baselines = annotate_odometer(
+            vehicles.filter(vehicle_type__in=vehicle_types), "pk", Value(start_time)
+        ).values(
+            "vuid",
+            "odometer_before_time",
+            "odometer_before_value",
+            "odometer_after_time",
+            "odometer_after_value",
+        )
+        for row in baselines:
+            start_odometers[row["vuid"], start_time] = _baseline(row, start_time)
+
+    completions = annotate_odometer(
+        WorkOrderCompletion.objects.filter(
+            status=StatusChoices.COMPLETED,
+            work_order__operation__isnull=False,
+            work_order__vehicle__in=vehicles.values("pk"),
+        ).alias(
+            position=Window(
+                RowNumber(),
+                partition_by=[F("work_order__vehicle"), F("work_order__operation")],
+                order_by=[F("change_date_unix").desc(), F("id").desc()],
+            )
+        ).filter(position=1),
+        "work_order__vehicle",
+        "change_date_unix",
+    ).values(
+        "work_order__vehicle",
+        "work_order__operation",
+        "change_date_unix",
+        "odometer_before_time",
+        "odometer_before_value",
+        "odometer_after_time",
+        "odometer_after_value",
+    )
+    last_done = {
+        (row["work_order__vehicle"], row["work_order__operation"]): (
+            row["change_date_unix"],
+            _baseline(row, row["change_date_unix"]),
+        )
+        for row in completions
+    }
+
+    entries = []
+    for vehicle in rows:
+        vuid = vehicle["vuid"]
+        vehicle_id = str(vuid)
+        odometer = vehicle["current_odometer"]
+        odometer = None if odometer is None else float(odometer)
+        for manual in manuals[vehicle["vehicle_type_id"]]:
+            start_odometer = start_odometers.get((vuid, manual.start_time))
+            for op in manual.operations:
+                done = last_done.get((vuid, op.id))
+                base_time, base_odometer = done or (manual.start_time, start_odometer)
+                due_distance = due_time = remaining_distance = remaining_time = None
+                alert_distance = alert_time = None
+                if op.interval.distance is not None and base_odometer is not None:
+                    due_distance = base_odometer + op.interval.distance
+                    alert_distance = due_distance - (manual.advance.distance or 0)
+                    if odometer is not None:
+                        remaining_distance = due_distance - odometer
+                if op.interval.time is not None:
+                    due_time = base_time + op.interval.time
+                    alert_time = due_time - (manual.advance.time or 0)
+                    remaining_time = due_time - now
+                status = get_status(manual.advance, remaining_distance, remaining_time)
+                if status not in statuses:
+                    continue
+                entries.append(
+                    {
+                        "vehicle": vehicle_id,
+                        "plate": vehicle["plate"],
+                        "manual": manual.muid,
+                        "operation": op.id,
+                        "system": op.system,
+                        "subsystem": op.subsystem,
+                        "task": op.task,
+                        "status": status,
+                        "last_done": done[0] if done else None,
+                        "odometer": odometer,
+                        "next_due_distance": due_distance,
+                        "next_due_time": due_time,
+                        "remaining_distance": remaining_distance,
+                        "remaining_time": remaining_time,
+                        "alert_distance": alert_distance,
+                        "alert_time": alert_time,
+                    }
+                )
+
+    entries.sort(
+        key=lambda entry: (
+            entry["status"] != OVERDUE,
+            entry["remaining_time"] if entry["remaining_time"] is not None else float("inf"),
+            entry["remaining_distance"]
+            if entry["remaining_distance"] is not None
+            else float("inf"),
+        )
+    )
+    return entries
@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import MaintenanceManual, MaintenanceOperation
 
-class MaintenanceOperationSerializer(serializers.ModelSerializer):
+class MaintenanceOperationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = MaintenanceOperation
         fields = '__all__'
 
-class MaintenanceManualSerializer(serializers.ModelSerializer):
+class MaintenanceManualSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     manual_tasks = MaintenanceOperationSerializer(many=True, read_only=True)
 
     class Meta:
@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from mileage.enums import DISTANCE_UNITS
+from mileage.models import Mileage
+from vehicles.models import Vehicle
+from work_orders.models import WorkOrder, WorkOrderCompletion
+
+from .alerts import mark_for_refresh
+from .manual_cache import invalidate_manuals
+from .models import MaintenanceManual, MaintenanceOperation
+
+
+@receiver(post_save, sender=Mileage)
+@receiver(post_delete, sender=Mileage)
+def refresh_reading_entries(sender, instance: Mileage, **kwargs):
+    """Marks the vehicle whose odometer changed for the scheduler to refresh."""
+    if instance.unit in DISTANCE_UNITS:
+        mark_for_refresh([instance.vehicle_id])
+
+
+@receiver(post_save, sender=Vehicle)
+def refresh_vehicle_entries(sender, instance: Vehicle, **kwargs):
+    """Marks the vehicle for the scheduler to refresh, since its type may have changed."""
+    mark_for_refresh([instance.pk])
+
+
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_delete, sender=WorkOrder)
+def refresh_work_order_entries(sender, instance: WorkOrder, created: bool = False, **kwargs):
+    """
+    Marks the work order's vehicle for the scheduler to refresh. New work orders
+    are skipped, since only their completion changes the schedule.
+    """
+    if not created:
+        mark_for_refresh([instance.vehicle_id])
+
+
+@receiver(post_save, sender=WorkOrderCompletion)
+@receiver(post_delete, sender=WorkOrderCompletion)
+def refresh_completion_entries(sender, instance: WorkOrderCompletion, **kwargs):
+    """Marks the vehicle of the work order for the scheduler to refresh."""
+    vehicle_id = (
+        WorkOrder.objects.filter(pk=instance.work_order_id, operation__isnull=False)
+        .values_list("vehicle_id", flat=True)
+        .first()
+    )
+    if vehicle_id is not None:
+        mark_for_refresh([vehicle_id])
+
+
+@receiver(post_save, sender=MaintenanceManual)
+def refresh_manual_entries(sender, instance: MaintenanceManual, **kwargs):
+    """
+    Marks the vehicles of the manual's type, and those of its previous type if
+    it changed, for the scheduler to refresh.
+    """
+    if not instance.manual_tasks.exists():
+        return
+    vehicles = Vehicle.objects.filter(
+        Q(vehicle_type=instance.vehicle_type_id) | Q(maintenance_due__operation__manual=instance)
+    )
+    mark_for_refresh(vehicles.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=MaintenanceOperation)
+def refresh_operation_entries(sender, instance: MaintenanceOperation, **kwargs):
+    """Marks the vehicles of the operation's manual type for the scheduler to refresh."""
+    vehicles = Vehicle.objects.filter(
+        Q(vehicle_type__vehicle_type_manual=instance.manual_id)
+        | Q(maintenance_due__operation=instance)
+    )
+    mark_for_refresh(vehicles.values_list("pk", flat=True))
+
+
+def schedule_invalidation(vehicle_type_ids):
+    """Invalidates the cached manuals once the transaction that changed them is committed."""
+    vehicle_type_ids = list(vehicle_type_ids)
+    transaction.on_commit(lambda: invalidate_manuals(vehicle_type_ids))
+
+
+@receiver(pre_save, sender=MaintenanceManual)
+def invalidate_previous_manual_type(sender, instance: MaintenanceManual, **kwargs):
+    """Invalidates the cached manuals of the vehicle type the manual belonged to."""
+    if not instance._state.adding:
+        schedule_invalidation(
+            MaintenanceManual.objects.filter(pk=instance.pk).values_list(
+                "vehicle_type_id", flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=MaintenanceManual)
+@receiver(post_delete, sender=MaintenanceManual)
+def invalidate_manual_type(sender, instance: MaintenanceManual, **kwargs):
+    """Invalidates the cached manuals of the manual's vehicle type."""
+    schedule_invalidation([instance.vehicle_type_id])
+
+
+@receiver(pre_save, sender=MaintenanceOperation)
+def invalidate_previous_operation_type(sender, instance: MaintenanceOperation, **kwargs):
+    """Invalidates the cached manuals of the vehicle type the operation belonged to."""
+    if not instance._state.adding:
+        schedule_invalidation(
+            MaintenanceManual.objects.filter(manual_tasks=instance.pk).values_list(
+                "vehicle_type_id", flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=MaintenanceOperation)
+@receiver(post_delete, sender=MaintenanceOperation)
+def invalidate_operation_type(sender, instance: MaintenanceOperation, **kwargs):
+    """Invalidates the cached manuals of the vehicle type of the operation's manual."""
+    schedule_invalidation(
+        MaintenanceManual.objects.filter(pk=instance.manual_id).values_list(
+            "vehicle_type_id", flat=True
+        )
+    )
@@ -1,3 +1,365 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from time import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mileage.models import Mileage
+from work_orders.models import StatusChoices, WorkOrder, WorkOrderCompletion
+from wt_iopgps.testing import create_account, create_vehicle, create_vehicle_type
+
+from .alerts import maintenance_alert, refresh_marked
+from .enums import DueStatus
+from .models import (
+    MaintenanceDueEntry,
+    MaintenanceDueRefresh,
+    MaintenanceManual,
+    MaintenanceOperation,
+)
+from .schedule import Frequency, compile_manual, get_due_list, get_status, parse_frequency
+
+DAY = 24 * 3600
+
+
+class ManualImportViewTests(TestCase):
+    """
+    Manuals are imported with all their operations or not at all.
+    """
+
+    def setUp(self):
+        self.vehicle_type = create_vehicle_type()
+        self.url = f"/api/v1/vehicles/types/{self.vehicle_type.id}/manuals/import/"
+        self.client = APIClient()
+        self.client.force_authenticate(create_account("admin").user)
+
+    def operation(self, **kwargs) -> dict:
+        return {
+            "system": "Engine",
+            "subsystem": "Oil",
+            "task": "R",
+            "frequency": "10000km,-,6m",
+            **kwargs,
+        }
+
+    def test_operations_in_the_body(self):
+        response = self.client.post(
+            self.url,
+            {"start_date": "2024-01-01", "operations": [self.operation(), self.operation()]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(
+            MaintenanceOperation.objects.filter(manual__vehicle_type=self.vehicle_type).count(), 2
+        )
+
+    def test_invalid_rows_are_reported(self):
+        response = self.client.post(
+            self.url,
+            {
+                "start_date": "2024-01-01",
+                "operations": [self.operation(), self.operation(frequency="often"), 1],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [2, 3])
+        self.assertFalse(MaintenanceManual.objects.exists())
+
+    def test_body_that_is_not_an_object(self):
+        for body in ([1], [self.operation()], "operations"):
+            with self.subTest(body=body):
+                response = self.client.post(self.url, body, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+        self.assertFalse(MaintenanceManual.objects.exists())
+
+
+class MaintenanceAlertTests(TestCase):
+    """
+    The advance alert of an occurrence fires once, from the scheduler.
+    """
+
+    def setUp(self):
+        self.vehicle_type = create_vehicle_type()
+        manual = MaintenanceManual.objects.create(
+            vehicle_type=self.vehicle_type,
+            start_date=date.today() - timedelta(days=200),
+            advance_alerts="500km,-,2w",
+        )
+        self.operation = MaintenanceOperation.objects.create(
+            manual=manual, system="Engine", subsystem="Oil", task="R", frequency="5000km,-,6m"
+        )
+        self.vehicle = create_vehicle(self.vehicle_type)
+        self.alerts = []
+        receiver = lambda sender, entry, **kwargs: self.alerts.append(entry.pk)
+        maintenance_alert.connect(receiver, weak=False)
+        self.addCleanup(maintenance_alert.disconnect, receiver)
+
+    def add_reading(self, kilometers: int, days_ago: float = 0):
+        return Mileage.objects.create(
+            vehicle=self.vehicle,
+            mileage=Decimal(kilometers),
+            unit="km",
+            unix_time_registered=int(time() - days_ago * DAY),
+        )
+
+    def test_readings_are_refreshed_by_the_scheduler(self):
+        MaintenanceDueRefresh.objects.all().delete()
+        with mock.patch("maintenance_manuals.alerts.get_due_list") as get_due_list:
+            self.add_reading(1000)
+        get_due_list.assert_not_called()
+        self.assertTrue(MaintenanceDueRefresh.objects.filter(vehicle=self.vehicle).exists())
+
+        refresh_marked()
+        self.assertFalse(MaintenanceDueRefresh.objects.exists())
+        self.assertEqual(MaintenanceDueEntry.objects.get().odometer, 1000 * 1000)
+
+    def test_known_distance_does_not_fire_the_alert_again(self):
+        # The new vehicle is overdue by time, and has no odometer yet.
+        refresh_marked()
+        entry = MaintenanceDueEntry.objects.get()
+        self.assertIsNone(entry.due_distance)
+        self.assertEqual(self.alerts, [entry.pk])
+
+        self.add_reading(1000, days_ago=1)
+        refresh_marked()
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.due_distance)
+        self.assertIsNotNone(entry.alerted_at)
+        self.assertEqual(self.alerts, [entry.pk])
+
+    def test_later_occurrence_fires_again(self):
+        refresh_marked()
+        entry = MaintenanceDueEntry.objects.get()
+        # The alert fired for an earlier occurrence.
+        MaintenanceDueEntry.objects.filter(pk=entry.pk).update(due_time=entry.due_time - DAY)
+        MaintenanceDueRefresh.objects.create(vehicle=self.vehicle)
+        refresh_marked()
+        self.assertEqual(self.alerts, [entry.pk, entry.pk])
+
+    def test_changes_are_refreshed_by_the_scheduler(self):
+        account = create_account("owner")
+        work_order = WorkOrder.objects.create(
+            responsible=account,
+            created_by=account,
+            vehicle=self.vehicle,
+            issue_date_unix=int(time()),
+            maintenance_type="Preventive",
+            work_type="Engine - Oil",
+            operation=self.operation,
+        )
+        changes = {
+            "completion": lambda: WorkOrderCompletion.objects.create(
+                work_order=work_order,
+                status=StatusChoices.COMPLETED,
+                change_registered_by=account,
+                change_date_unix=int(time()),
+            ),
+            "manual": lambda: self.operation.manual.save(),
+            "operation": lambda: self.operation.save(),
+        }
+        for change, make in changes.items():
+            with self.subTest(change=change):
+                MaintenanceDueRefresh.objects.all().delete()
+                with mock.patch("maintenance_manuals.alerts.get_due_list") as get_due_list:
+                    with self.captureOnCommitCallbacks(execute=True):
+                        make()
+                get_due_list.assert_not_called()
+                self.assertTrue(
+                    MaintenanceDueRefresh.objects.filter(vehicle=self.vehicle).exists()
+                )
+
+
+class CachedManualsTests(TestCase):
+    """
+    The manuals of a vehicle type are the same from the cache and from the database.
+    """
+
+    def setUp(self):
+        self.vehicle_type = create_vehicle_type()
+        self.url = f"/api/v1/vehicles/types/{self.vehicle_type.id}/manuals/"
+        MaintenanceManual.objects.create(
+            vehicle_type=self.vehicle_type, start_date=date.today(), manual_file="blobs/manual.pdf"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(create_account("driver").user)
+
+    def get_files(self, url: str, host: str = "testserver"):
+        response = self.client.get(url, HTTP_HOST=host)
+        self.assertEqual(response.status_code, 200)
+        return response, [manual["manual_file"] for manual in response.json()]
+
+    def test_file_urls_are_absolute(self):
+        file_url = "http://testserver/media/blobs/manual.pdf"
+        for source, url in (
+            ("cache miss", self.url),
+            ("cache hit", self.url),
+            ("database", f"{self.url}?fields=manual_file"),
+        ):
+            with self.subTest(source=source):
+                self.assertEqual(self.get_files(url)[1], [file_url])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "api.example.com"])
+    def test_etag_depends_on_the_host(self):
+        response, files = self.get_files(self.url)
+        other_response, other_files = self.get_files(self.url, host="api.example.com")
+        self.assertEqual(other_files, ["http://api.example.com/media/blobs/manual.pdf"])
+        self.assertNotEqual(response["ETag"], other_response["ETag"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_HOST="api.example.com", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(files, ["http://testserver/media/blobs/manual.pdf"])
+
+    def test_unknown_vehicle_type(self):
+        response = self.client.get(f"/api/v1/vehicles/types/{self.vehicle_type.id + 1}/manuals/")
+        self.assertEqual(response.status_code, 404)
+
+
+class ParseFrequencyTests(TestCase):
+    """
+    The frequency strings are parsed into meters and seconds.
+    """
+
+    def test_frequencies(self):
+        for value, frequency in (
+            ("10000km,6000mi,6m", Frequency(6000 * 1609.344, 6 * 2629746)),
+            ("5hm,-,2w", Frequency(500.0, 2 * 604800)),
+            ("-,1nmi,-", Frequency(1852.0, None)),
+            ("-,-,-", Frequency(None, None)),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(parse_frequency(value), frequency)
+
+    def test_zero_is_not_set(self):
+        self.assertEqual(parse_frequency("0km,-,0d"), Frequency(None, None))
+        self.assertEqual(parse_frequency("0km,10km,-"), Frequency(10000.0, None))
+
+    def test_invalid_frequencies(self):
+        for value in ("", "10km", "10km,-,-,-", "-10km,-,-", "10km,-,6s", "10hmi,-,-"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_frequency(value)
+
+
+class CompileManualTests(TestCase):
+    """
+    The manuals are compiled once, and again when any of their strings changes.
+    """
+
+    def setUp(self):
+        self.manual = MaintenanceManual.objects.create(
+            vehicle_type=create_vehicle_type(),
+            start_date=date.today(),
+            minimum_frequency="-,-,1y",
+        )
+        self.operation = MaintenanceOperation.objects.create(
+            manual=self.manual, system="Engine", subsystem="Oil", task="R", frequency="5000km,-,2y"
+        )
+
+    def compile(self):
+        return compile_manual(
+            MaintenanceManual.objects.prefetch_related("manual_tasks").get(pk=self.manual.pk)
+        )
+
+    def test_compiled_once(self):
+        compiled = self.compile()
+        self.assertIs(self.compile(), compiled)
+        # The minimum frequency of the manual shortens the interval.
+        self.assertEqual(compiled.operations[0].interval, Frequency(5000000.0, 31556952))
+
+    def test_recompiled_when_the_signature_changes(self):
+        compiled = self.compile()
+        self.operation.frequency = "1000km,-,-"
+        self.operation.save()
+        recompiled = self.compile()
+        self.assertIsNot(recompiled, compiled)
+        self.assertEqual(recompiled.operations[0].interval, Frequency(1000000.0, 31556952))
+
+        self.manual.advance_alerts = "100km,-,1w"
+        self.manual.save()
+        self.assertEqual(self.compile().advance, Frequency(100000.0, 604800))
+
+    def test_invalid_operations_are_skipped(self):
+        MaintenanceOperation.objects.filter(pk=self.operation.pk).update(frequency="often")
+        with self.assertLogs("maintenance_manuals.schedule", "WARNING"):
+            self.assertEqual(self.compile().operations, ())
+
+
+class DueListTests(TestCase):
+    """
+    The operations are due soon within the advance alerts and overdue once
+    their distance or time is reached, for any number of vehicles.
+    """
+
+    def setUp(self):
+        self.now = int(time())
+        self.vehicle_type = create_vehicle_type()
+        manual = MaintenanceManual.objects.create(
+            vehicle_type=self.vehicle_type,
+            start_date=date.today() - timedelta(days=10),
+            advance_alerts="500km,-,-",
+        )
+        MaintenanceOperation.objects.create(
+            manual=manual, system="Engine", subsystem="Oil", task="R", frequency="5000km,-,-"
+        )
+        self.vehicle = self.create_vehicle(0)
+
+    def create_vehicle(self, number: int):
+        vehicle = create_vehicle(self.vehicle_type, imei=f"{number:015d}", plate=f"P{number}")
+        # The first reading is the baseline of the operations.
+        self.add_reading(vehicle, 0, self.now - 5 * DAY)
+        return vehicle
+
+    def add_reading(self, vehicle, kilometers: int, registered: int):
+        Mileage.objects.create(
+            vehicle=vehicle,
+            mileage=Decimal(kilometers),
+            unit="km",
+            unix_time_registered=registered,
+        )
+
+    def test_distance_boundaries(self):
+        for offset, (kilometers, status) in enumerate(
+            (
+                (4499, DueStatus.OK),
+                (4500, DueStatus.DUE_SOON),
+                (4999, DueStatus.DUE_SOON),
+                (5000, DueStatus.OVERDUE),
+            )
+        ):
+            with self.subTest(kilometers=kilometers):
+                self.add_reading(self.vehicle, kilometers, self.now - DAY + offset)
+                [entry] = get_due_list(now=self.now, statuses=DueStatus.values)
+                self.assertEqual(entry["status"], status)
+                self.assertEqual(entry["remaining_distance"], (5000 - kilometers) * 1000)
+
+    def test_time_boundaries(self):
+        advance = Frequency(None, DAY)
+        for remaining_time, status in (
+            (DAY + 1, DueStatus.OK),
+            (DAY, DueStatus.DUE_SOON),
+            (1, DueStatus.DUE_SOON),
+            (0, DueStatus.OVERDUE),
+        ):
+            with self.subTest(remaining_time=remaining_time):
+                self.assertEqual(get_status(advance, None, remaining_time), status)
+
+    def test_queries_do_not_depend_on_the_fleet_size(self):
+        created = 1
+        for count in (1, 10, 50):
+            for number in range(created, count):
+                self.create_vehicle(number)
+            created = count
+            with self.subTest(count=count):
+                # The manuals, their operations, the vehicles with their odometer,
+                # the odometers at the start date and the last completions.
+                with self.assertNumQueries(5):
+                    entries = get_due_list(now=self.now, statuses=DueStatus.values)
+                self.assertEqual(len(entries), count)
@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    MaintenanceDueViewSet,
     MaintenanceManualViewSet,
     MaintenanceOperationViewSet,
     VehicleManualReadAndCreateView,
@@ -11,6 +12,7 @@ from .views import (
 router = DefaultRouter()
 router.register(r"manuals", MaintenanceManualViewSet, basename="manuals")
 router.register(r"operations", MaintenanceOperationViewSet, basename="operations")
+router.register(r"maintenance/due", MaintenanceDueViewSet, basename="maintenance-due")
 
 router2 = DefaultRouter()
 router2.register(r"manuals", VehicleManualReadAndCreateView, basename="types")
@@ -1,9 +1,20 @@
-from typing import Optional
+from typing import Optional, Tuple
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets
+from django.utils.http import parse_etags
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from vehicles.models import VehicleType
+from users.models import CustomUser
+from vehicles.models import Vehicle, VehicleType
+from users.imports import read_rows
+from wt_iopgps.sparse_fields import get_request_options
+from .imports import ManualImporter
+from .manual_cache import absolute_file_urls, get_manuals, manuals_etag
 from .models import MaintenanceManual, MaintenanceOperation
+from .schedule import DUE_SOON, OK, OVERDUE, get_due_list
 from .serializers import MaintenanceManualSerializer, MaintenanceOperationSerializer
 
 class MaintenanceManualViewSet(viewsets.ModelViewSet):
@@ -13,7 +24,8 @@ class MaintenanceManualViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = MaintenanceManualSerializer
-    queryset = MaintenanceManual.objects.all()
+    # The serializer nests the operations of each manual.
+    queryset = MaintenanceManual.objects.prefetch_related("manual_tasks")
 
 
 class MaintenanceOperationViewSet(viewsets.ModelViewSet):
@@ -26,40 +38,118 @@ class MaintenanceOperationViewSet(viewsets.ModelViewSet):
     serializer_class = MaintenanceOperationSerializer
 
 
+class CachedManualsMixin:
+    """
+    Serves the list of manuals of a vehicle type from the versioned cache, with an
+    ETag so that clients holding the current version get a 304 Not Modified.
+    Requests with sparse fieldsets are served from the database.
+    """
+
+    # The URL parameters that identify the vehicle type, named as its fields.
+    vehicle_type_kwargs: Tuple[str, ...]
+
+    def get_vehicle_type(self) -> Optional[VehicleType]:
+        """
+        Returns the vehicle type identified by the URL parameters, or None if
+        any of them is not set. If the vehicle type does not exist, it raises a 404 error.
+        """
+        lookups = {field: self.kwargs.get(field) for field in self.vehicle_type_kwargs}
+        if not all(lookups.values()):
+            return None
+        return get_object_or_404(VehicleType, **lookups)
+
+    def get_queryset(self):
+        vehicle_type = self.get_vehicle_type()
+        if vehicle_type is None:
+            return MaintenanceManual.objects.none()
+        return MaintenanceManual.objects.filter(vehicle_type=vehicle_type).prefetch_related(
+            "manual_tasks"
+        )
+
+    def list(self, request: Request, *args, **kwargs):
+        fields, expand = get_request_options(request)
+        vehicle_type = self.get_vehicle_type()
+        if fields is not None or expand or vehicle_type is None:
+            return super().list(request, *args, **kwargs)
+        version, manuals = get_manuals(vehicle_type.id)
+        headers = {
+            "ETag": manuals_etag(vehicle_type.id, version, request.build_absolute_uri("/"))
+        }
+        etags = parse_etags(request.headers.get("If-None-Match", ""))
+        if headers["ETag"] in etags or "*" in etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(absolute_file_urls(manuals, request), headers=headers)
+
+
 class VehicleManualReadAndCreateView(
-    viewsets.ReadOnlyModelViewSet, viewsets.mixins.CreateModelMixin
+    CachedManualsMixin, viewsets.ReadOnlyModelViewSet, viewsets.mixins.CreateModelMixin
 ):
     serializer_class = MaintenanceManualSerializer
+    vehicle_type_kwargs = ("id",)
 
-    def get_queryset(self):
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request: Request, *args, **kwargs):
         """
-        This method retrieves the queryset of Manual objects for the vehicle specified by the 'pk' parameter in the URL,
-        which corresponds to the 'id' of the vehicle type. If the 'id' is None or does not exist, it returns an empty queryset.
+        Creates a manual of the vehicle type with its operations from a CSV or JSON
+        'file' (system, subsystem, task, frequency, description), or from a JSON body
+        with the fields of the manual and its 'operations'. Nothing is created if any
+        row is invalid, and the errors of every row are reported.
         """
-        vid: Optional[str] = self.kwargs.get("id", None)
-        if vid is not None:
-            vehicletype = get_object_or_404(VehicleType, id=vid)
-            return MaintenanceManual.objects.filter(vehicle_type=vehicletype)
-        return MaintenanceManual.objects.none()
+        if not isinstance(request.data, dict):
+            return Response(
+                {"error": "A CSV/JSON file or an object with the list of operations is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        file = request.FILES.get("file")
+        if file is not None:
+            file_format = request.data.get("format") or file.name.rsplit(".", 1)[-1].lower()
+            try:
+                rows = read_rows(file, file_format)
+            except (ValueError, UnicodeDecodeError) as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data.get("operations"), list):
+            rows = request.data["operations"]
+        else:
+            return Response(
+                {"error": "A CSV/JSON file or a list of operations is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        manual_data = {
+            field: request.data[field]
+            for field in ("start_date", "advance_alerts", "minimum_frequency", "end_of_cycle")
+            if field in request.data
+        }
+        report = ManualImporter(self.get_vehicle_type()).run(manual_data, rows)
+        if report["errors"]:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
 
 
 class VehicleManualReadView(
-    viewsets.ReadOnlyModelViewSet,
+    CachedManualsMixin, viewsets.ReadOnlyModelViewSet,
 ):
     serializer_class = MaintenanceManualSerializer
+    # Served by the (year, brand, model) index of the vehicle types.
+    vehicle_type_kwargs = ("year", "brand", "model")
 
-    def get_queryset(self):
-        """
-        This method retrieves the queryset of Manual objects for the vehicle specified by the 'year', 'brand', and 'model' parameters in the URL.
-        If any of these parameters are None or do not exist, it returns an empty queryset.
-        """
-        year: Optional[str] = self.kwargs.get("year", None)
-        brand: Optional[str] = self.kwargs.get("brand", None)
-        model: Optional[str] = self.kwargs.get("model", None)
 
-        if year and brand and model:
-            vehicletype = get_object_or_404(
-                VehicleType, year=year, brand=brand, model=model
+class MaintenanceDueViewSet(viewsets.ViewSet):
+    """
+    Lists the maintenance operations of the fleet that are due soon or overdue.
+    ?user=<uuid> restricts the list to the vehicles of a user and
+    ?status=overdue,due_soon,ok selects the statuses (due soon and overdue by default).
+    """
+
+    def list(self, request: Request):
+        vehicles = Vehicle.objects.all()
+        user: Optional[str] = request.query_params.get("user", None)
+        if user is not None:
+            user = get_object_or_404(CustomUser, uuid=user)
+            vehicles = vehicles.filter(uservehicle__user=user)
+        statuses = request.query_params.get("status", f"{DUE_SOON},{OVERDUE}").split(",")
+        if not set(statuses) <= {OK, DUE_SOON, OVERDUE}:
+            raise ValidationError(
+                {"detail": f"status must be a list of {OK}, {DUE_SOON} or {OVERDUE}."}
             )
-            return MaintenanceManual.objects.filter(vehicle_type=vehicletype)
-        return MaintenanceManual.objects.none()
+        return Response(get_due_list(vehicles, statuses=statuses))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MileageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mileage'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -17,3 +19,29 @@ class OdometerUnits(models.TextChoices):
     WEEKS = "w", _("Weeks")
     MONTHS = "mo", _("Months")
     YEARS = "y", _("Years")
+
+
+# Factor that converts a reading in each unit to its canonical unit:
+# meters for the distance units and seconds for the time (hour meter) units.
+# Months and years are the average Gregorian ones.
+UNIT_FACTORS = {
+    OdometerUnits.METERS: Decimal("1"),
+    OdometerUnits.KILOMETERS: Decimal("1000"),
+    OdometerUnits.MILES: Decimal("1609.344"),
+    OdometerUnits.NAUTICAL_MILES: Decimal("1852"),
+    OdometerUnits.MINUTES: Decimal("60"),
+    OdometerUnits.HOURS: Decimal("3600"),
+    OdometerUnits.DAYS: Decimal("86400"),
+    OdometerUnits.WEEKS: Decimal("604800"),
+    OdometerUnits.MONTHS: Decimal("2629746"),
+    OdometerUnits.YEARS: Decimal("31556952"),
+}
+DISTANCE_UNITS = frozenset(
+    {
+        OdometerUnits.METERS,
+        OdometerUnits.KILOMETERS,
+        OdometerUnits.MILES,
+        OdometerUnits.NAUTICAL_MILES,
+    }
+)
+TIME_UNITS = frozenset(UNIT_FACTORS) - DISTANCE_UNITS
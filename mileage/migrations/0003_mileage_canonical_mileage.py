@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mileage', '0002_alter_mileage_unit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mileage',
+            name='canonical_mileage',
+            field=models.DecimalField(decimal_places=3, editable=False, help_text='The mileage in meters, or in seconds for the time units.', max_digits=20, null=True, verbose_name='Canonical mileage'),
+        ),
+    ]
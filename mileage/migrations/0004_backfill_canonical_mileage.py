@@ -0,0 +1,53 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:15
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+BATCH_SIZE = 10000
+
+# Copy of mileage.enums.UNIT_FACTORS at the time of this migration.
+UNIT_FACTORS = {
+    'm': Decimal('1'),
+    'km': Decimal('1000'),
+    'mi': Decimal('1609.344'),
+    'nmi': Decimal('1852'),
+    'min': Decimal('60'),
+    'h': Decimal('3600'),
+    'd': Decimal('86400'),
+    'w': Decimal('604800'),
+    'mo': Decimal('2629746'),
+    'y': Decimal('31556952'),
+}
+
+
+def backfill_canonical_mileage(apps, schema_editor):
+    Mileage = apps.get_model('mileage', 'Mileage')
+    canonical = models.Case(
+        *[
+            models.When(unit=unit, then=models.F('mileage') * models.Value(factor))
+            for unit, factor in UNIT_FACTORS.items()
+        ],
+        output_field=models.DecimalField(max_digits=20, decimal_places=3),
+    )
+    bounds = Mileage.objects.aggregate(first=models.Min('id'), last=models.Max('id'))
+    if bounds['first'] is None:
+        return
+    # Each batch is committed on its own, so the table is never locked for long.
+    for start in range(bounds['first'], bounds['last'] + 1, BATCH_SIZE):
+        Mileage.objects.filter(
+            id__gte=start, id__lt=start + BATCH_SIZE, canonical_mileage__isnull=True
+        ).update(canonical_mileage=canonical)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('mileage', '0003_mileage_canonical_mileage'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_canonical_mileage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mileage', '0004_backfill_canonical_mileage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mileage',
+            index=models.Index(fields=['vehicle', 'unix_time_registered'], name='mileage_vehicle_time_idx'),
+        ),
+    ]
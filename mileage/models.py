@@ -1,9 +1,92 @@
+from decimal import Decimal
+from typing import Iterable, List
+
 from django.db import models
+from django.db.models import Case, F, Value, When, Window
+from django.db.models.functions import RowNumber
 from django.utils.translation import gettext_lazy as _
 
-from .enums import OdometerUnits
+from .enums import DISTANCE_UNITS, TIME_UNITS, UNIT_FACTORS, OdometerUnits
 from vehicles.models import Vehicle
 
+CANONICAL_MAX_DIGITS = 20
+CANONICAL_DECIMAL_PLACES = 3
+CANONICAL_QUANTUM = Decimal(1).scaleb(-CANONICAL_DECIMAL_PLACES)
+
+
+def to_canonical(value, unit: str) -> Decimal:
+    """Converts a reading to meters (distance units) or seconds (time units)."""
+    return (Decimal(value) * UNIT_FACTORS[unit]).quantize(CANONICAL_QUANTUM)
+
+
+def convert(values: Iterable, from_unit: str, to_unit: str) -> List[Decimal]:
+    """
+    Converts many readings between two units of the same kind with a single factor.
+
+    Raises:
+        - ValueError: If one unit measures distance and the other time.
+    """
+    if (from_unit in DISTANCE_UNITS) != (to_unit in DISTANCE_UNITS):
+        raise ValueError(f"Cannot convert {from_unit} to {to_unit}.")
+    factor = UNIT_FACTORS[from_unit] / UNIT_FACTORS[to_unit]
+    return [Decimal(value) * factor for value in values]
+
+
+def canonical_expression(value: str = "mileage", unit: str = "unit") -> Case:
+    """
+    SQL expression that converts the readings to their canonical unit,
+    so whole querysets are converted by the database in a single statement.
+    """
+    return Case(
+        *[
+            When(**{unit: choice}, then=F(value) * Value(factor))
+            for choice, factor in UNIT_FACTORS.items()
+        ],
+        output_field=models.DecimalField(
+            max_digits=CANONICAL_MAX_DIGITS, decimal_places=CANONICAL_DECIMAL_PLACES
+        ),
+    )
+
+
+class MileageQuerySet(models.QuerySet):
+    """
+    QuerySet for the Mileage model with helpers to read
+    the readings in a common unit.
+    """
+
+    def distances(self):
+        """Returns the readings of odometers (distance units)."""
+        return self.filter(unit__in=DISTANCE_UNITS)
+
+    def durations(self):
+        """Returns the readings of hour meters (time units)."""
+        return self.filter(unit__in=TIME_UNITS)
+
+    def in_unit(self, unit: str):
+        """
+        Returns the readings of the same kind as the unit, annotated with
+        their value in that unit (`value`), converted by the database.
+        """
+        units = DISTANCE_UNITS if unit in DISTANCE_UNITS else TIME_UNITS
+        return self.filter(unit__in=units).annotate(
+            value=F("canonical_mileage") / Value(UNIT_FACTORS[unit])
+        )
+
+    def latest_per_vehicle(self):
+        """
+        Returns the latest reading of each vehicle in a single query.
+        It is usually combined with distances() or durations(), since the
+        canonical values of both kinds cannot be compared with each other.
+        """
+        return self.alias(
+            position=Window(
+                RowNumber(),
+                partition_by=[F("vehicle_id")],
+                order_by=[F("unix_time_registered").desc(), F("id").desc()],
+            )
+        ).filter(position=1)
+
+
 class Mileage(models.Model):
     """
     Represents the odometer of a vehicle.
@@ -28,15 +111,41 @@ class Mileage(models.Model):
         choices=OdometerUnits.choices,
         help_text=_("The unit of measure of the mileage.")
     )
+    canonical_mileage = models.DecimalField(
+        _('Canonical mileage'),
+        max_digits=CANONICAL_MAX_DIGITS,
+        decimal_places=CANONICAL_DECIMAL_PLACES,
+        null=True,
+        editable=False,
+        help_text=_("The mileage in meters, or in seconds for the time units.")
+    )
     unix_time_registered = models.PositiveBigIntegerField(
         _('Date'),
         blank=False,
         help_text=_("The date when the mileage was registered.")
     )
 
+    objects = MileageQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Mileage")
         verbose_name_plural = _("Mileages")
+        indexes = [
+            models.Index(
+                fields=["vehicle", "unix_time_registered"], name="mileage_vehicle_time_idx"
+            ),
+        ]
 
     def __str__(self):
         return f'{self.vehicle}: {self.mileage} {self.unit} - {self.unix_time_registered}'
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the reading with its canonical value. Readings created with
+        bulk_create() must set canonical_mileage with to_canonical().
+        """
+        self.canonical_mileage = to_canonical(self.mileage, self.unit)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"mileage", "unit"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "canonical_mileage"}
+        super().save(*args, **kwargs)
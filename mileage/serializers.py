@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import Mileage
 
-class MileageSerializer(serializers.ModelSerializer):
+class MileageSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Mileage
         fields = '__all__'
+        expandable_fields = {"vehicle": "vehicles.serializers.VehicleSerializer"}
@@ -0,0 +1,169 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .enums import DISTANCE_UNITS, TIME_UNITS
+from .models import Mileage
+
+SERIES_CACHE_PREFIX = "mileage:series:"
+SERIES_CACHE_TIMEOUT = 60 * 60
+DISTANCE = "distance"
+TIME = "time"
+KINDS = {DISTANCE: DISTANCE_UNITS, TIME: TIME_UNITS}
+
+
+def interpolate(time: int, start: int, low: float, end: int, high: float) -> float:
+    """Returns the value at the given time on the line between two readings."""
+    if end == start:
+        return high
+    return low + (high - low) * (time - start) / (end - start)
+
+
+class OdometerSeries:
+    """
+    The readings of a vehicle sorted by time, held as parallel arrays of times
+    (unix seconds), canonical values (meters, or seconds for hour meters) and
+    reading ids. Readings registered at the same time keep the last one.
+
+    Values between two readings are linearly interpolated. Before the first
+    reading the value is unknown (None) and after the last one it is held,
+    since the odometer cannot have gone back.
+    """
+
+    def __init__(self, times: Iterable[int], values: Iterable[float], ids: Iterable[int]):
+        self.times = array("q")
+        self.values = array("d")
+        self.ids = array("q")
+        for time, value, pk in zip(times, values, ids):
+            if self.times and self.times[-1] == time:
+                self.values[-1] = value
+                self.ids[-1] = pk
+            else:
+                self.times.append(time)
+                self.values.append(value)
+                self.ids.append(pk)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def load(cls, vehicle_id, kind: str = DISTANCE) -> "OdometerSeries":
+        """Loads the readings of a vehicle of the given kind ('distance' or 'time')."""
+        rows = list(
+            Mileage.objects.filter(
+                vehicle_id=vehicle_id, unit__in=KINDS[kind], canonical_mileage__isnull=False
+            )
+            .order_by("unix_time_registered", "id")
+            .values_list("unix_time_registered", "canonical_mileage", "id")
+        )
+        times, values, ids = zip(*rows) if rows else ((), (), ())
+        return cls(times, map(float, values), ids)
+
+    def value_at(self, time: int) -> Optional[float]:
+        """Returns the value at the given time, interpolated between the surrounding readings."""
+        index = bisect_right(self.times, time)
+        if index == 0:
+            return None
+        if index == len(self.times) or self.times[index - 1] == time:
+            return self.values[index - 1]
+        return interpolate(
+            time,
+            self.times[index - 1],
+            self.values[index - 1],
+            self.times[index],
+            self.values[index],
+        )
+
+    def values_at(self, times: Iterable[int]) -> List[Optional[float]]:
+        """Returns the values at each of the given times."""
+        return [self.value_at(time) for time in times]
+
+    def non_monotonic(self) -> List[int]:
+        """
+        Returns the ids of the readings lower than the previous one,
+        which usually are typos or readings of a replaced odometer.
+        """
+        return [
+            self.ids[index]
+            for index in range(1, len(self.values))
+            if self.values[index] < self.values[index - 1]
+        ]
+
+
+def series_cache_key(vehicle_id, kind: str) -> str:
+    """Returns the cache key that stores a series of a vehicle."""
+    return f"{SERIES_CACHE_PREFIX}{kind}:{vehicle_id}"
+
+
+def invalidate_series(vehicle_id) -> None:
+    """Removes the cached series of a vehicle."""
+    cache.delete_many([series_cache_key(vehicle_id, kind) for kind in KINDS])
+
+
+def get_series(vehicle_id, kind: str = DISTANCE) -> OdometerSeries:
+    """Returns the series of a vehicle from the cache, loading it on a miss."""
+    key = series_cache_key(vehicle_id, kind)
+    series = cache.get(key)
+    if series is None:
+        series = OdometerSeries.load(vehicle_id, kind)
+        cache.set(key, series, SERIES_CACHE_TIMEOUT)
+    return series
+
+
+def annotate_odometer(queryset, vehicle, time, prefix: str = "odometer", kind: str = DISTANCE):
+    """
+    Annotates each row of a queryset with the readings of a vehicle that surround
+    a time: `<prefix>_before_time/value` (the last reading at or before it) and
+    `<prefix>_after_time/value` (the first one after it). Each one is read by a
+    correlated subquery through the (vehicle, unix_time_registered) index, so
+    the odometer at a different time can be resolved for every row in one query.
+    Use odometer_at() to interpolate the value from the annotations.
+
+    Args:
+        - queryset: The rows to annotate.
+        - vehicle: The field of the rows with the vehicle, or an expression.
+        - time: The field of the rows with the unix time, or an expression.
+        - prefix (str): The prefix of the annotations.
+        - kind (str): 'distance' (odometer) or 'time' (hour meter).
+    """
+    vehicle = OuterRef(vehicle) if isinstance(vehicle, str) else vehicle
+    time = OuterRef(time) if isinstance(time, str) else time
+    readings = Mileage.objects.filter(
+        vehicle=vehicle, unit__in=KINDS[kind], canonical_mileage__isnull=False
+    )
+    before = readings.filter(unix_time_registered__lte=time).order_by(
+        "-unix_time_registered", "-id"
+    )
+    after = readings.filter(unix_time_registered__gt=time).order_by(
+        "unix_time_registered", "-id"
+    )
+    return queryset.annotate(
+        **{
+            f"{prefix}_before_time": Subquery(before.values("unix_time_registered")[:1]),
+            f"{prefix}_before_value": Subquery(before.values("canonical_mileage")[:1]),
+            f"{prefix}_after_time": Subquery(after.values("unix_time_registered")[:1]),
+            f"{prefix}_after_value": Subquery(after.values("canonical_mileage")[:1]),
+        }
+    )
+
+
+def odometer_at(row, time: int, prefix: str = "odometer") -> Optional[float]:
+    """
+    Returns the value at the given time from a row annotated by annotate_odometer(),
+    which may be a model instance or a dictionary, following the same rules as
+    OdometerSeries.value_at().
+    """
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+    before_time = get(f"{prefix}_before_time")
+    if before_time is None:
+        return None
+    before_value = float(get(f"{prefix}_before_value"))
+    after_time = get(f"{prefix}_after_time")
+    if after_time is None or before_time == time:
+        return before_value
+    return interpolate(
+        time, before_time, before_value, after_time, float(get(f"{prefix}_after_value"))
+    )
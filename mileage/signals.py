@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Mileage
+from .series import invalidate_series
+
+
+@receiver(post_save, sender=Mileage)
+@receiver(post_delete, sender=Mileage)
+def invalidate_mileage_series(sender, instance: Mileage, **kwargs):
+    """Invalidates the cached series of the reading's vehicle."""
+    invalidate_series(instance.vehicle_id)
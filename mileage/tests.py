@@ -1,3 +1,209 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Value
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wt_iopgps.testing import create_account, create_vehicle
+
+from vehicles.models import Vehicle
+
+from .models import Mileage, canonical_expression, convert, to_canonical
+from .series import TIME, OdometerSeries, annotate_odometer, get_series, odometer_at
+
+
+class CanonicalMileageTests(TestCase):
+    """
+    The readings are converted to meters (or seconds) by Python and by the database alike.
+    """
+
+    def setUp(self):
+        self.vehicle = create_vehicle()
+
+    def create(self, mileage: str, unit: str, time: int = 1) -> Mileage:
+        return Mileage.objects.create(
+            vehicle=self.vehicle,
+            mileage=Decimal(mileage),
+            unit=unit,
+            unix_time_registered=time,
+        )
+
+    def test_saved_readings(self):
+        for mileage, unit, canonical in (
+            ("12.5", "km", "12500.000"),
+            ("1", "mi", "1609.344"),
+            ("2", "h", "7200.000"),
+        ):
+            with self.subTest(unit=unit):
+                reading = self.create(mileage, unit)
+                reading.refresh_from_db()
+                self.assertEqual(reading.canonical_mileage, Decimal(canonical))
+
+    def test_updated_unit(self):
+        reading = self.create("1", "km")
+        reading.unit = "mi"
+        reading.save(update_fields=["unit"])
+        reading.refresh_from_db()
+        self.assertEqual(reading.canonical_mileage, Decimal("1609.344"))
+
+    def test_database_conversion_matches_python(self):
+        readings = Mileage.objects.bulk_create(
+            Mileage(
+                vehicle=self.vehicle, mileage=Decimal(mileage), unit=unit, unix_time_registered=1
+            )
+            for mileage, unit in (("12.5", "km"), ("0.01", "mi"), ("3", "nmi"), ("90", "min"))
+        )
+        self.assertFalse(Mileage.objects.filter(canonical_mileage__isnull=False).exists())
+        Mileage.objects.update(canonical_mileage=canonical_expression())
+        for reading in readings:
+            with self.subTest(unit=reading.unit):
+                reading.refresh_from_db()
+                self.assertEqual(
+                    reading.canonical_mileage, to_canonical(reading.mileage, reading.unit)
+                )
+
+    def test_unknown_units_have_no_canonical_value(self):
+        Mileage.objects.bulk_create(
+            [Mileage(vehicle=self.vehicle, mileage=Decimal("1"), unit="", unix_time_registered=1)]
+        )
+        Mileage.objects.update(canonical_mileage=canonical_expression())
+        self.assertIsNone(Mileage.objects.get().canonical_mileage)
+        self.assertFalse(Mileage.objects.distances().exists())
+        self.assertFalse(Mileage.objects.durations().exists())
+
+    def test_in_unit(self):
+        self.create("1", "mi")
+        self.create("1000", "m")
+        self.create("1", "h")
+        self.assertEqual(
+            sorted(Mileage.objects.in_unit("km").values_list("value", flat=True)),
+            [Decimal("1"), Decimal("1.609344")],
+        )
+        self.assertEqual(
+            list(Mileage.objects.in_unit("min").values_list("value", flat=True)), [60]
+        )
+
+    def test_convert(self):
+        self.assertEqual(
+            convert(["1", "2"], "mi", "m"), [Decimal("1609.344"), Decimal("3218.688")]
+        )
+        with self.assertRaises(ValueError):
+            convert(["1"], "km", "h")
+
+
+class LatestPerVehicleTests(TestCase):
+    """
+    The latest reading of every vehicle is selected in a single query.
+    """
+
+    def setUp(self):
+        self.vehicles = [create_vehicle(imei=f"00000000000000{number}") for number in range(3)]
+        self.readings = {}
+        for number, vehicle in enumerate(self.vehicles):
+            for time, unit in ((10, "km"), (30, "km"), (20, "km"), (40, "h")):
+                self.readings[vehicle, time, unit] = Mileage.objects.create(
+                    vehicle=vehicle,
+                    mileage=Decimal(number * 100 + time),
+                    unit=unit,
+                    unix_time_registered=time,
+                )
+
+    def test_latest_distance_of_each_vehicle(self):
+        with self.assertNumQueries(1):
+            latest = list(Mileage.objects.distances().latest_per_vehicle())
+        self.assertCountEqual(
+            latest, [self.readings[vehicle, 30, "km"] for vehicle in self.vehicles]
+        )
+
+    def test_latest_reading_of_each_vehicle(self):
+        self.assertCountEqual(
+            Mileage.objects.latest_per_vehicle(),
+            [self.readings[vehicle, 40, "h"] for vehicle in self.vehicles],
+        )
+
+    def test_ties_are_broken_by_the_newest_row(self):
+        newest = Mileage.objects.create(
+            vehicle=self.vehicles[0], mileage=Decimal("1"), unit="km", unix_time_registered=30
+        )
+        self.assertIn(newest, Mileage.objects.distances().latest_per_vehicle())
+        self.assertNotIn(
+            self.readings[self.vehicles[0], 30, "km"],
+            Mileage.objects.distances().latest_per_vehicle(),
+        )
+
+    def test_latest_action(self):
+        client = APIClient()
+        client.force_authenticate(create_account("driver").user)
+        for kind, unit, time in (("", "km", 30), ("?kind=time", "h", 40)):
+            with self.subTest(kind=kind):
+                response = client.get(f"/api/v1/mileages/latest/{kind}")
+                self.assertEqual(response.status_code, 200)
+                self.assertCountEqual(
+                    [reading["id"] for reading in response.json()],
+                    [self.readings[vehicle, time, unit].id for vehicle in self.vehicles],
+                )
+
+
+class OdometerSeriesTests(TestCase):
+    """
+    The odometer is interpolated between the readings, from the series in memory
+    and from the annotations of a queryset alike.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.vehicle = create_vehicle()
+        # Kilometers at each time, with a lower (non-monotonic) reading at 400.
+        for time, kilometers in ((100, "1"), (200, "3"), (300, "4"), (400, "2")):
+            self.add_reading(time, kilometers)
+        self.add_reading(250, "5", unit="h")
+
+    def add_reading(self, time: int, mileage: str, unit: str = "km") -> Mileage:
+        return Mileage.objects.create(
+            vehicle=self.vehicle, mileage=Decimal(mileage), unit=unit, unix_time_registered=time
+        )
+
+    def annotated_value(self, time: int):
+        row = annotate_odometer(
+            Vehicle.objects.filter(pk=self.vehicle.pk), "pk", Value(time)
+        ).get()
+        return odometer_at(row, time)
+
+    def test_interpolation(self):
+        series = OdometerSeries.load(self.vehicle.pk)
+        self.assertEqual(len(series), 4)
+        for time, value in ((100, 1000), (150, 2000), (200, 3000), (275, 3750), (399, 2020)):
+            with self.subTest(time=time):
+                self.assertAlmostEqual(series.value_at(time), value)
+                self.assertAlmostEqual(self.annotated_value(time), value)
+
+    def test_edges(self):
+        series = OdometerSeries.load(self.vehicle.pk)
+        # Unknown before the first reading, held after the last one.
+        self.assertEqual(series.values_at([0, 99, 400, 10**10]), [None, None, 2000, 2000])
+        self.assertIsNone(self.annotated_value(99))
+        self.assertEqual(self.annotated_value(10**10), 2000)
+
+    def test_readings_at_the_same_time_keep_the_last_one(self):
+        series = OdometerSeries([1, 2, 2, 3], [10, 20, 25, 30], [1, 2, 3, 4])
+        self.assertEqual(list(series.times), [1, 2, 3])
+        self.assertEqual(list(series.ids), [1, 3, 4])
+        self.assertEqual(series.value_at(2), 25)
+
+    def test_non_monotonic_readings(self):
+        series = OdometerSeries.load(self.vehicle.pk)
+        lower = Mileage.objects.get(unix_time_registered=400)
+        self.assertEqual(series.non_monotonic(), [lower.pk])
+
+    def test_time_series(self):
+        series = OdometerSeries.load(self.vehicle.pk, TIME)
+        self.assertEqual(series.values_at([249, 250, 251]), [None, 5 * 3600, 5 * 3600])
 
-# Create your tests here.
+    def test_cached_series_follows_new_readings(self):
+        self.assertEqual(len(get_series(self.vehicle.pk)), 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_series(self.vehicle.pk)), 4)
+        self.add_reading(500, "6")
+        self.assertEqual(get_series(self.vehicle.pk).value_at(500), 6000)
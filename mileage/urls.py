@@ -1,12 +1,13 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, SimpleRouter
 from .views import MileageViewSet, VehicleMileageReadAndCreate
 
 
 router = DefaultRouter()
 router.register(r'mileages', MileageViewSet, basename='mileages')
 
-router2 = DefaultRouter()
+# No root view: it would shadow the vehicle detail route (vehicles/<vuid>/).
+router2 = SimpleRouter()
 router2.register(r'mileages', VehicleMileageReadAndCreate, basename='vehicles')
 
 urlpatterns = [
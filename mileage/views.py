@@ -1,15 +1,36 @@
 from typing import Optional
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from vehicles.models import Vehicle
+from .enums import UNIT_FACTORS
 from .models import Mileage
+from .series import DISTANCE, KINDS, TIME, get_series
 from .serializers import MileageSerializer
 
 class MileageViewSet(viewsets.ModelViewSet):
     queryset = Mileage.objects.all()
     serializer_class = MileageSerializer
 
+    @action(detail=False, methods=["get"])
+    def latest(self, request: Request):
+        """
+        Returns the latest odometer reading of every vehicle. With ?kind=time,
+        the latest hour meter reading is returned instead.
+        """
+        readings = Mileage.objects.latest_per_vehicle()
+        if request.query_params.get("kind") == "time":
+            readings = readings.durations()
+        else:
+            readings = readings.distances()
+        readings = self.filter_queryset(readings.order_by("vehicle_id"))
+        serializer = self.get_serializer(readings, many=True)
+        return Response(serializer.data)
+
 class VehicleMileageReadAndCreate(
     viewsets.ReadOnlyModelViewSet,
     viewsets.mixins.CreateModelMixin
@@ -28,3 +49,43 @@ class VehicleMileageReadAndCreate(
             vehicle = get_object_or_404(Vehicle, vuid=vuid)
             return Mileage.objects.filter(vehicle=vehicle)
         return Mileage.objects.none()
+
+    @action(detail=False, methods=["get"])
+    def series(self, request: Request, vuid: Optional[str] = None):
+        """
+        Returns the odometer readings of the vehicle as arrays of times and values,
+        and the ids of the readings lower than the previous one. With ?at=t1,t2,...
+        the values at those unix times are returned instead, interpolated between
+        the readings. ?kind=time reads the hour meter and ?unit= converts the values
+        (meters or hours by default).
+        """
+        vehicle = get_object_or_404(Vehicle, vuid=vuid)
+        kind = request.query_params.get("kind", DISTANCE)
+        if kind not in KINDS:
+            raise ValidationError({"detail": f"kind must be {DISTANCE} or {TIME}."})
+        unit = request.query_params.get("unit", "m" if kind == DISTANCE else "h")
+        if unit not in KINDS[kind]:
+            raise ValidationError({"detail": f"{unit} is not a unit of {kind}."})
+        try:
+            times = [int(time) for time in request.query_params["at"].split(",")]
+        except KeyError:
+            times = None
+        except ValueError as e:
+            raise ValidationError({"detail": "at must be a list of unix times."}) from e
+
+        series = get_series(vehicle.vuid, kind)
+        factor = float(UNIT_FACTORS[unit])
+        data = {
+            "vehicle": vehicle.vuid,
+            "unit": unit,
+            "non_monotonic": series.non_monotonic(),
+        }
+        if times is None:
+            data["times"] = list(series.times)
+            data["values"] = [value / factor for value in series.values]
+        else:
+            data["values"] = [
+                {"time": time, "value": None if value is None else value / factor}
+                for time, value in zip(times, series.values_at(times))
+            ]
+        return Response(data)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
+from uploads.serializers import ImageVariantsField
 from .models import (
     Incident,
     MovementOrder,
@@ -7,25 +9,27 @@ from .models import (
 )
 
 
-class MovementOrderSerializer(serializers.ModelSerializer):
+class MovementOrderSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = MovementOrder
         fields = "__all__"
 
 
-class MovementOrderStateSerializer(serializers.ModelSerializer):
+class MovementOrderStateSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = MovementOrderState
         fields = "__all__"
 
 
-class IncidentSerializer(serializers.ModelSerializer):
+class IncidentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField(source="image")
+
     class Meta:
         model = Incident
         fields = "__all__"
 
 
-class ClosureMovementOrderSerializer(serializers.ModelSerializer):
+class ClosureMovementOrderSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = ClosureMovementOrder
         fields = "__all__"
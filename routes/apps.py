@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RoutesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'routes'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals
@@ -0,0 +1,133 @@
+"""
+Derived geometry of the routes.
+
+The positions of a route are reduced to a RouteGeometry: the distance from
+the start to each position (from which the legs are derived), the total
+length, the bounding box and the Google encoded polyline of the path. It is
+recomputed whenever the positions of the route change, so clients read the
+shape of a route from one short string instead of the list of positions.
+"""
+import struct
+from collections import defaultdict
+from math import asin, cos, radians, sin, sqrt
+from typing import Iterable, List, Sequence, Tuple
+
+from django.db import transaction
+
+from .models import Route, RouteGeometry, RoutePosition
+
+# Mean radius of the Earth in meters (IUGG).
+EARTH_RADIUS = 6371008.8
+POLYLINE_PRECISION = 5
+GEOMETRY_PARAM = "geometry"
+GEOMETRY_FIELDS = [
+    "polyline",
+    "length",
+    "distances",
+    "min_lat",
+    "min_lng",
+    "max_lat",
+    "max_lng",
+]
+
+Point = Tuple[float, float]
+
+
+def haversine(start: Point, end: Point) -> float:
+    """Returns the great-circle distance in meters between two (lat, lng) points."""
+    lat1, lng1, lat2, lng2 = map(radians, (*start, *end))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(sqrt(a))
+
+
+def cumulative_distances(points: Sequence[Point]) -> List[float]:
+    """Returns the distance in meters from the first point to each point along the path."""
+    distances = [0.0] * len(points)
+    for index in range(1, len(points)):
+        distances[index] = distances[index - 1] + haversine(points[index - 1], points[index])
+    return distances
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(points: Iterable[Point], precision: int = POLYLINE_PRECISION) -> str:
+    """Encodes the (lat, lng) points with the Google encoded polyline algorithm."""
+    factor = 10 ** precision
+    encoded = []
+    previous_lat = previous_lng = 0
+    for lat, lng in points:
+        lat, lng = round(lat * factor), round(lng * factor)
+        encoded.append(_encode_value(lat - previous_lat))
+        encoded.append(_encode_value(lng - previous_lng))
+        previous_lat, previous_lng = lat, lng
+    return "".join(encoded)
+
+
+def pack_distances(distances: Sequence[float]) -> bytes:
+    """Packs the distances as little-endian 32-bit floats."""
+    return struct.pack(f"<{len(distances)}f", *distances)
+
+
+def unpack_distances(data: bytes) -> List[float]:
+    """Unpacks the distances packed by pack_distances()."""
+    data = bytes(data)
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+def build_geometry(route_id, points: Sequence[Point]) -> RouteGeometry:
+    """Returns the (unsaved) geometry of a route from its points in order."""
+    distances = cumulative_distances(points)
+    lats = [lat for lat, _ in points]
+    lngs = [lng for _, lng in points]
+    return RouteGeometry(
+        route_id=route_id,
+        polyline=encode_polyline(points),
+        length=distances[-1],
+        distances=pack_distances(distances),
+        min_lat=min(lats),
+        min_lng=min(lngs),
+        max_lat=max(lats),
+        max_lng=max(lngs),
+    )
+
+
+def refresh_geometries(route_ids: Iterable) -> None:
+    """
+    Recomputes the geometry of the given routes from their positions in one
+    query. The routes without positions with coordinates have no geometry.
+    """
+    route_ids = set(route_ids)
+    points = defaultdict(list)
+    rows = (
+        RoutePosition.objects.filter(
+            route__in=route_ids, position__lat__isnull=False, position__lng__isnull=False
+        )
+        .order_by("route", "order")
+        .values_list("route_id", "position__lat", "position__lng")
+    )
+    for route_id, lat, lng in rows:
+        points[route_id].append((float(lat), float(lng)))
+    existing = set(Route.objects.filter(pk__in=route_ids).values_list("pk", flat=True))
+    with transaction.atomic():
+        RouteGeometry.objects.filter(route__in=existing - set(points)).delete()
+        RouteGeometry.objects.bulk_create(
+            [build_geometry(route_id, points[route_id]) for route_id in existing & set(points)],
+            update_conflicts=True,
+            unique_fields=["route"],
+            update_fields=GEOMETRY_FIELDS,
+        )
+
+
+def is_geometry_requested(request) -> bool:
+    """Returns whether the request asks for the geometry of the routes (?geometry=true)."""
+    if request is None:
+        return False
+    return request.query_params.get(GEOMETRY_PARAM, "").lower() in ("true", "1")
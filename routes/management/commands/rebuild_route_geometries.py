@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from routes.geometry import refresh_geometries
+from routes.models import Route
+
+REBUILD_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the geometry of every route. The geometry is kept up to date
+    when the positions change, and the migration 0005 computes it for the
+    routes created before it existed, so this is only needed if the
+    computation changes.
+    """
+
+    help = "Recomputes the geometry of every route from its positions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+            help="Number of routes recomputed at a time.",
+        )
+
+    def handle(self, *args, **options):
+        route_ids = list(Route.objects.order_by("pk").values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+        for start in range(0, len(route_ids), batch_size):
+            refresh_geometries(route_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Geometry of {len(route_ids)} routes recomputed."))
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+
+def fix_duplicated_positions(apps, schema_editor):
+    """
+    Removes the repeated positions of a route, keeping the first one, and
+    renumbers the routes with repeated orders keeping their sequence, so
+    that the constraints can be added to the existing rows.
+    """
+    RoutePosition = apps.get_model('routes', 'RoutePosition')
+    repeated = (
+        RoutePosition.objects.values('route', 'position')
+        .annotate(first=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in repeated:
+        RoutePosition.objects.filter(route=row['route'], position=row['position']).exclude(
+            id=row['first']
+        ).delete()
+
+    routes = (
+        RoutePosition.objects.values('route', 'order')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('route', flat=True)
+        .distinct()
+    )
+    for route in set(routes):
+        positions = list(RoutePosition.objects.filter(route=route).order_by('order', 'id'))
+        for number, route_position in enumerate(positions, start=1):
+            route_position.order = number
+        # Moved out of the way first, so no intermediate state repeats an order.
+        RoutePosition.objects.filter(route=route).update(order=models.F('order') + len(positions))
+        RoutePosition.objects.bulk_update(positions, ['order'])
+
+
+class Migration(migrations.Migration):
+
+    # The data is fixed and committed before the tables are altered.
+    atomic = False
+
+    dependencies = [
+        ('routes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_duplicated_positions, migrations.RunPython.noop, atomic=True),
+        migrations.AddConstraint(
+            model_name='routeposition',
+            constraint=models.UniqueConstraint(fields=('route', 'order'), name='route_position_order_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='routeposition',
+            constraint=models.UniqueConstraint(fields=('route', 'position'), name='route_position_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0002_route_position_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteGeometry',
+            fields=[
+                ('route', models.OneToOneField(help_text='The route that the geometry belongs to.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='geometry', serialize=False, to='routes.route')),
+                ('polyline', models.TextField(help_text='Google encoded polyline of the positions of the route.')),
+                ('length', models.FloatField(help_text='Length of the route in meters.')),
+                ('distances', models.BinaryField(help_text='Distance in meters from the start to each position, as little-endian 32-bit floats.')),
+                ('min_lat', models.FloatField(help_text='Southern bound of the route.')),
+                ('min_lng', models.FloatField(help_text='Western bound of the route.')),
+                ('max_lat', models.FloatField(help_text='Northern bound of the route.')),
+                ('max_lng', models.FloatField(help_text='Eastern bound of the route.')),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+def copy_coordinates(apps, schema_editor):
+    """
+    Copies the coordinates of the positions to the routes that use them, and
+    removes the positions of a route that repeat the coordinates of an earlier
+    one, so that the coordinates can be made unique per route.
+    """
+    Position = apps.get_model('routes', 'Position')
+    RoutePosition = apps.get_model('routes', 'RoutePosition')
+    position = Position.objects.filter(pk=models.OuterRef('position'))
+    RoutePosition.objects.update(
+        lat=models.Subquery(position.values('lat')[:1]),
+        lng=models.Subquery(position.values('lng')[:1]),
+    )
+    repeated = (
+        RoutePosition.objects.filter(lat__isnull=False, lng__isnull=False)
+        .values('route', 'lat', 'lng')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in repeated:
+        route_positions = RoutePosition.objects.filter(
+            route=row['route'], lat=row['lat'], lng=row['lng']
+        ).order_by('order', 'id')
+        RoutePosition.objects.filter(
+            id__in=list(route_positions.values_list('id', flat=True)[1:])
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    # The data is fixed and committed before the constraint is added.
+    atomic = False
+
+    dependencies = [
+        ('routes', '0003_routegeometry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeposition',
+            name='lat',
+            field=models.DecimalField(blank=True, decimal_places=7, editable=False, help_text='Latitude of the position, copied from it.', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='routeposition',
+            name='lng',
+            field=models.DecimalField(blank=True, decimal_places=7, editable=False, help_text='Longitude of the position, copied from it.', max_digits=10, null=True),
+        ),
+        migrations.RunPython(copy_coordinates, migrations.RunPython.noop, atomic=True),
+        migrations.AddConstraint(
+            model_name='routeposition',
+            constraint=models.UniqueConstraint(fields=('route', 'lat', 'lng'), name='route_position_coordinates_unique'),
+        ),
+    ]
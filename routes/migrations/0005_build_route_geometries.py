@@ -0,0 +1,55 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:20
+
+from itertools import groupby
+
+from django.db import migrations
+
+from routes.geometry import cumulative_distances, encode_polyline, pack_distances
+
+BATCH_SIZE = 500
+
+
+def build_geometries(apps, schema_editor):
+    """
+    Computes the geometry of the existing routes, which only get one when their
+    positions change. It runs after the repeated coordinates are removed, so
+    the geometry matches the positions that are kept.
+    """
+    RouteGeometry = apps.get_model('routes', 'RouteGeometry')
+    RoutePosition = apps.get_model('routes', 'RoutePosition')
+    rows = (
+        RoutePosition.objects.filter(position__lat__isnull=False, position__lng__isnull=False)
+        .order_by('route', 'order')
+        .values_list('route_id', 'position__lat', 'position__lng')
+    )
+    geometries = []
+    for route_id, route_rows in groupby(rows.iterator(chunk_size=2000), key=lambda row: row[0]):
+        points = [(float(lat), float(lng)) for _, lat, lng in route_rows]
+        distances = cumulative_distances(points)
+        geometries.append(
+            RouteGeometry(
+                route_id=route_id,
+                polyline=encode_polyline(points),
+                length=distances[-1],
+                distances=pack_distances(distances),
+                min_lat=min(lat for lat, _ in points),
+                min_lng=min(lng for _, lng in points),
+                max_lat=max(lat for lat, _ in points),
+                max_lng=max(lng for _, lng in points),
+            )
+        )
+        if len(geometries) >= BATCH_SIZE:
+            RouteGeometry.objects.bulk_create(geometries, ignore_conflicts=True)
+            geometries = []
+    RouteGeometry.objects.bulk_create(geometries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0004_route_position_coordinates'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_geometries, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,8 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
-from alarms.models import Coordinates
+from alarms.models import MAX_DECIMAL_PLACES, MAX_DIGITS, Coordinates
 from users.models import CustomUser
 
 
@@ -20,6 +20,18 @@ class Position(Coordinates):
             return self.lat == other.lat and self.lng == other.lng
         return False
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the position and copies its coordinates to the routes that use it,
+        where they are unique per route.
+        """
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.routeposition_set.update(lat=self.lat, lng=self.lng)
+
     def __str__(self):
         return f"Position(name={self.name}, lat={self.lat}, lng={self.lng})"
 
@@ -27,6 +39,24 @@ class Position(Coordinates):
         return self.__str__()
 
 
+class RouteQuerySet(models.QuerySet):
+    """
+    QuerySet for the Route model.
+    """
+
+    def with_positions(self):
+        """
+        Prefetches the positions of the routes ordered by 'order', with their
+        coordinates, so any number of routes is serialized with one more query.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                "routeposition_set",
+                queryset=RoutePosition.objects.select_related("position").order_by("order"),
+            )
+        )
+
+
 class Route(models.Model):
     """
     Model to represent a route, which is a collection of positions.
@@ -53,6 +83,8 @@ class Route(models.Model):
         symmetrical=False,
     )
 
+    objects = RouteQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name}"
 
@@ -81,18 +113,45 @@ class RoutePosition(models.Model):
         help_text=_("Alias for the position."),
         blank=True,
     )
+    # Copies of the coordinates of the position, so that they are unique per route.
+    lat = models.DecimalField(
+        max_digits=MAX_DIGITS,
+        decimal_places=MAX_DECIMAL_PLACES,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_("Latitude of the position, copied from it."),
+    )
+    lng = models.DecimalField(
+        max_digits=MAX_DIGITS,
+        decimal_places=MAX_DECIMAL_PLACES,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_("Longitude of the position, copied from it."),
+    )
 
-    def save(self, *args, **kwargs):
-        if RoutePosition.objects.filter(
-            route=self.route,
-            # pylint: disable=no-member
-            position__lat=self.position.lat,
-            position__lng=self.position.lng,
-        ).exists():
-            raise ValueError(
-                "A position with these coordinates already exists in this route."
-            )
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["route", "order"], name="route_position_order_unique"
+            ),
+            models.UniqueConstraint(
+                fields=["route", "position"], name="route_position_unique"
+            ),
+            models.UniqueConstraint(
+                fields=["route", "lat", "lng"], name="route_position_coordinates_unique"
+            ),
+        ]
 
+    def save(self, *args, **kwargs):
+        """
+        Copies the coordinates of the position before saving. A position with
+        the same coordinates as another of the route violates
+        route_position_coordinates_unique.
+        """
+        # pylint: disable=no-member
+        self.lat, self.lng = self.position.lat, self.position.lng
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -105,6 +164,38 @@ class RoutePosition(models.Model):
         )
 
 
+class RouteGeometry(models.Model):
+    """
+    Model to represent the geometry derived from the positions of a route.
+    It is recomputed whenever the positions change.
+    """
+
+    route = models.OneToOneField(
+        Route,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="geometry",
+        help_text=_("The route that the geometry belongs to."),
+    )
+    polyline = models.TextField(
+        help_text=_("Google encoded polyline of the positions of the route.")
+    )
+    length = models.FloatField(help_text=_("Length of the route in meters."))
+    distances = models.BinaryField(
+        help_text=_(
+            "Distance in meters from the start to each position, "
+            "as little-endian 32-bit floats."
+        )
+    )
+    min_lat = models.FloatField(help_text=_("Southern bound of the route."))
+    min_lng = models.FloatField(help_text=_("Western bound of the route."))
+    max_lat = models.FloatField(help_text=_("Northern bound of the route."))
+    max_lng = models.FloatField(help_text=_("Eastern bound of the route."))
+
+    def __str__(self):
+        return f"Geometry of {self.route_id}: {self.length:.0f} m"
+
+
 class UserRoute(models.Model):
     """
     Model representing the association between users and routes.
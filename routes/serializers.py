@@ -1,8 +1,14 @@
+from collections import OrderedDict
+from typing import List
+
+from django.db import transaction
 from rest_framework import serializers
-from .models import Position, Route, RoutePosition, UserRoute
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
+from .geometry import build_geometry, is_geometry_requested, unpack_distances
+from .models import Position, Route, RouteGeometry, RoutePosition, UserRoute
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the Position model.
     This serializer includes the 'id', 'name',
@@ -19,7 +25,7 @@ class PositionSerializer(serializers.ModelSerializer):
         ]
 
 
-class RoutePositionSerializer(serializers.ModelSerializer):
+class RoutePositionSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the RoutePosition model.
     This serializer includes the 'id', 'position', 'order', 'distance',
@@ -55,13 +61,47 @@ class RoutePositionSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteGeometrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the RouteGeometry model.
+    The bounding box is [min_lng, min_lat, max_lng, max_lat] as in GeoJSON, and
+    'distances' and 'legs' are the cumulative and per-leg distances in meters.
+    """
+
+    bbox = serializers.SerializerMethodField()
+    distances = serializers.SerializerMethodField()
+    legs = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RouteGeometry
+        fields = [
+            "polyline",
+            "length",
+            "bbox",
+            "distances",
+            "legs",
+        ]
+
+    def get_bbox(self, obj):
+        return [obj.min_lng, obj.min_lat, obj.max_lng, obj.max_lat]
+
+    def get_distances(self, obj):
+        return unpack_distances(obj.distances)
+
+    def get_legs(self, obj):
+        distances = unpack_distances(obj.distances)
+        return [end - start for start, end in zip(distances, distances[1:])]
+
+
+class RouteSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the Route model.
-    This serializer includes the 'id', 'name', and 'positions' fields from the Route model.
+    This serializer includes the 'id', 'name', and 'positions' fields from the Route model,
+    and its 'geometry' when the request asks for it with ?geometry=true.
     """
 
     positions = serializers.SerializerMethodField()
+    geometry = RouteGeometrySerializer(read_only=True)
 
     class Meta:
         model = Route
@@ -70,17 +110,26 @@ class RouteSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "positions",
+            "geometry",
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not is_geometry_requested(self._context.get("request")):
+            self.fields.pop("geometry", None)
+
     def get_positions(self, obj):
         """
-        Method to get all route positions associated with the route.
+        Method to get all route positions associated with the route, ordered by 'order'.
+        They are read from the prefetch of Route.objects.with_positions() when present.
         """
-        positions = RoutePosition.objects.filter(route=obj)
+        positions = obj.routeposition_set.all()
+        if "routeposition_set" not in getattr(obj, "_prefetched_objects_cache", {}):
+            positions = positions.select_related("position").order_by("order")
         return RoutePositionSerializer(positions, many=True).data
 
 
-class UserRouteSerializer(serializers.ModelSerializer):
+class UserRouteSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the UserRoute model.
     This serializer includes the 'user' and 'routes' fields from the UserRoute model.
@@ -93,3 +142,107 @@ class UserRouteSerializer(serializers.ModelSerializer):
         fields = [
             "routes",
         ]
+
+
+class RoutePositionInputSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a position sent with a new route, with its coordinates,
+    its 'order' in the route and its 'alias'.
+    """
+
+    order = serializers.IntegerField(min_value=1)
+    alias = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
+
+    class Meta:
+        model = Position
+        fields = [
+            "name",
+            "lat",
+            "lng",
+            "order",
+            "alias",
+        ]
+        extra_kwargs = {
+            "lat": {"required": True, "allow_null": False},
+            "lng": {"required": True, "allow_null": False},
+        }
+
+
+class RouteBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer that creates a route with all its positions at once.
+
+    The orders and the coordinates are checked for duplicates in memory, and the
+    positions are inserted with `bulk_create` in the same transaction as the route.
+    The unique constraints of RoutePosition guard the same rules in the database.
+    The route is created by the user in the context ('creator') and assigned to them,
+    and its geometry is computed from the positions received.
+    """
+
+    positions = RoutePositionInputSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = Route
+        fields = [
+            "id",
+            "name",
+            "description",
+            "positions",
+        ]
+
+    def validate_positions(self, positions: List[OrderedDict]) -> List[OrderedDict]:
+        """
+        Check that no order and no pair of coordinates is repeated in the route.
+        """
+        errors = []
+        orders = set()
+        coordinates = set()
+        for position in positions:
+            error = {}
+            if position["order"] in orders:
+                error["order"] = ["The order is already used in this route."]
+            if (position["lat"], position["lng"]) in coordinates:
+                error["non_field_errors"] = [
+                    "A position with these coordinates already exists in this route."
+                ]
+            orders.add(position["order"])
+            coordinates.add((position["lat"], position["lng"]))
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return positions
+
+    def create(self, validated_data: OrderedDict):
+        positions = validated_data.pop("positions")
+        creator = self.context["creator"]
+        with transaction.atomic():
+            route = Route.objects.create(creator=creator, **validated_data)
+            created = Position.objects.bulk_create(
+                [
+                    Position(name=data.get("name"), lat=data["lat"], lng=data["lng"])
+                    for data in positions
+                ]
+            )
+            RoutePosition.objects.bulk_create(
+                [
+                    RoutePosition(
+                        route=route,
+                        position=position,
+                        order=data["order"],
+                        alias=data["alias"],
+                        lat=position.lat,
+                        lng=position.lng,
+                    )
+                    for position, data in zip(created, positions)
+                ]
+            )
+            UserRoute.objects.create(user=creator, route=route)
+            # The positions are already in memory, so the geometry needs no query.
+            build_geometry(
+                route.pk,
+                [
+                    (float(data["lat"]), float(data["lng"]))
+                    for data in sorted(positions, key=lambda data: data["order"])
+                ],
+            ).save(force_insert=True)
+        return route
@@ -0,0 +1,64 @@
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .geometry import refresh_geometries
+from .models import Position, RoutePosition
+
+
+# Routes changed in the current transaction of each connection of the thread.
+_pending = threading.local()
+
+
+def _get_pending(using: str) -> set:
+    if not hasattr(_pending, "route_ids"):
+        _pending.route_ids = defaultdict(set)
+    return _pending.route_ids[using]
+
+
+def refresh_pending_geometries(using: str) -> None:
+    """Recomputes the geometry of the routes changed in the committed transaction."""
+    route_ids = _get_pending(using)
+    if route_ids:
+        _pending.route_ids[using] = set()
+        refresh_geometries(route_ids)
+
+
+def schedule_refresh(route_ids, using: str = DEFAULT_DB_ALIAS):
+    """
+    Recomputes the geometry of the routes once the transaction that changed them
+    is committed. The routes changed in the same transaction (for example when
+    every position of a route is deleted) are gathered in a pending set that the
+    first commit callback to run drains, so they are recomputed together, once.
+
+    Every change registers the callback, since the callbacks of a rolled back
+    transaction or savepoint are discarded; the routes left pending by a rollback
+    are just recomputed with the next commit.
+    """
+    _get_pending(using).update(route_ids)
+    transaction.on_commit(partial(refresh_pending_geometries, using), using=using)
+
+
+@receiver(post_save, sender=RoutePosition)
+@receiver(post_delete, sender=RoutePosition)
+def refresh_route_geometry(sender, instance: RoutePosition, using: str, **kwargs):
+    """Recomputes the geometry of the route whose positions changed."""
+    schedule_refresh([instance.route_id], using)
+
+
+@receiver(post_save, sender=Position)
+def refresh_position_geometries(
+    sender, instance: Position, created: bool, using: str, **kwargs
+):
+    """Recomputes the geometry of the routes that go through the position."""
+    if not created:
+        schedule_refresh(
+            RoutePosition.objects.using(using)
+            .filter(position=instance)
+            .values_list("route_id", flat=True),
+            using,
+        )
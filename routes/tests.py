@@ -1,3 +1,189 @@
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from wt_iopgps.testing import ListQueriesMixin, create_account
+
+from .geometry import refresh_geometries
+from .models import Position, Route, RouteGeometry, RoutePosition, UserRoute
+
+
+class RoutePositionTests(TestCase):
+    """
+    The coordinates of the positions are unique per route, in the database.
+    """
+
+    def setUp(self):
+        self.account = create_account("driver")
+        self.route = Route.objects.create(creator=self.account, name="Route")
+        self.first = Position.objects.create(lat=Decimal("1"), lng=Decimal("2"))
+        RoutePosition.objects.create(route=self.route, position=self.first, order=1)
+
+    def test_coordinates_are_copied(self):
+        route_position = RoutePosition.objects.get()
+        self.assertEqual((route_position.lat, route_position.lng), (Decimal("1"), Decimal("2")))
+
+    def test_save_makes_no_lookup(self):
+        position = Position.objects.create(lat=Decimal("3"), lng=Decimal("4"))
+        with self.assertNumQueries(1):
+            RoutePosition.objects.create(route=self.route, position=position, order=2)
+
+    def test_repeated_coordinates(self):
+        position = Position.objects.create(lat=Decimal("1"), lng=Decimal("2"))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RoutePosition.objects.create(route=self.route, position=position, order=2)
+        other_route = Route.objects.create(creator=self.account, name="Other")
+        RoutePosition.objects.create(route=other_route, position=position, order=1)
+
+    def test_moved_position_updates_its_routes(self):
+        self.first.lat = Decimal("5")
+        self.first.save()
+        self.assertEqual(RoutePosition.objects.get().lat, Decimal("5"))
+
+    def test_position_moved_over_another(self):
+        position = Position.objects.create(lat=Decimal("3"), lng=Decimal("4"))
+        RoutePosition.objects.create(route=self.route, position=position, order=2)
+        position.lat, position.lng = Decimal("1"), Decimal("2")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            position.save()
+
+
+class RouteBulkCreateTests(TestCase):
+    """
+    A route is created with all its positions in one request.
+    """
+
+    def setUp(self):
+        self.account = create_account("driver")
+        self.url = f"/api/v1/users/{self.account.uuid}/routes/bulk/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+
+    def positions(self, count: int) -> list:
+        return [
+            {"name": f"Stop {index}", "lat": f"{index / 100:.7f}", "lng": "-78.5", "order": index + 1}
+            for index in range(count)
+        ]
+
+    def test_create(self):
+        response = self.client.post(
+            self.url, {"name": "Route", "positions": self.positions(50)}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["positions"]), 50)
+        route = Route.objects.get()
+        self.assertEqual(route.userroute_set.get().user, self.account)
+        self.assertEqual(
+            RoutePosition.objects.filter(route=route, lat__isnull=False).count(), 50
+        )
+
+    def test_repeated_orders_and_coordinates(self):
+        positions = self.positions(3)
+        positions.append(dict(positions[0], order=4))
+        positions.append(dict(positions[1], lat="0.5000000"))
+        response = self.client.post(
+            self.url, {"name": "Route", "positions": positions}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["positions"]
+        self.assertIn("non_field_errors", errors[3])
+        self.assertIn("order", errors[4])
+        self.assertFalse(Route.objects.exists())
+
+
+class RouteListQueryTests(ListQueriesMixin, TestCase):
+    """
+    The route lists make the same number of queries for any number of routes.
+    """
+
+    def setUp(self):
+        self.account = create_account("driver")
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        self.stops = Position.objects.bulk_create(
+            Position(lat=Decimal(number), lng=Decimal("-78.5")) for number in range(3)
+        )
+
+    def create_routes(self, count: int):
+        routes = Route.objects.bulk_create(
+            Route(creator=self.account, name=f"Route {number}") for number in range(count)
+        )
+        UserRoute.objects.bulk_create(UserRoute(user=self.account, route=route) for route in routes)
+        RoutePosition.objects.bulk_create(
+            RoutePosition(route=route, position=stop, order=order, lat=stop.lat, lng=stop.lng)
+            for route in routes
+            for order, stop in enumerate(self.stops, start=1)
+        )
+
+    def test_user_routes(self):
+        # The user, the routes and their positions.
+        url = f"/api/v1/users/{self.account.uuid}/routes/"
+        self.assert_list_queries(url, 3, self.create_routes)
+
+    def test_user_routes_with_geometry(self):
+        url = f"/api/v1/users/{self.account.uuid}/routes/?geometry=true"
+        self.assert_list_queries(url, 3, self.create_routes)
+
+    def test_routes(self):
+        # The routes and their positions.
+        self.assert_list_queries("/api/v1/routes/", 2, self.create_routes)
+
+    def test_routes_with_geometry(self):
+        self.assert_list_queries("/api/v1/routes/?geometry=true", 2, self.create_routes)
+
+
+class RouteGeometryTests(TestCase):
+    """
+    The geometry of the routes is recomputed once per transaction that changes them.
+    """
+
+    def setUp(self):
+        self.account = create_account("driver")
+        self.routes = [
+            Route.objects.create(creator=self.account, name=f"Route {number}")
+            for number in range(2)
+        ]
+
+    def add_positions(self, route: Route, count: int):
+        for order in range(1, count + 1):
+            position = Position.objects.create(lat=Decimal(order), lng=Decimal("-78.5"))
+            RoutePosition.objects.create(route=route, position=position, order=order)
+
+    def test_routes_are_refreshed_once_per_transaction(self):
+        with mock.patch("routes.signals.refresh_geometries", wraps=refresh_geometries) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.add_positions(self.routes[0], 3)
+                self.add_positions(self.routes[1], 2)
+        refresh.assert_called_once_with({route.pk for route in self.routes})
+        self.assertEqual(RouteGeometry.objects.count(), 2)
+
+    def test_rolled_back_changes_do_not_stop_later_refreshes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.add_positions(self.routes[1], 2)
+                raise ValueError
+            self.add_positions(self.routes[0], 2)
+        self.assertTrue(RouteGeometry.objects.filter(route=self.routes[0]).exists())
+        self.assertFalse(RouteGeometry.objects.filter(route=self.routes[1]).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_positions(self.routes[1], 2)
+        self.assertTrue(RouteGeometry.objects.filter(route=self.routes[1]).exists())
+
+    def test_migration_builds_the_missing_geometries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_positions(self.routes[0], 3)
+        expected = RouteGeometry.objects.get(route=self.routes[0])
+        RouteGeometry.objects.all().delete()
 
-# Create your tests here.
+        migration = import_module("routes.migrations.0005_build_route_geometries")
+        migration.build_geometries(apps, None)
+        geometry = RouteGeometry.objects.get()
+        self.assertEqual(geometry.route_id, self.routes[0].pk)
+        self.assertEqual(geometry.polyline, expected.polyline)
+        self.assertAlmostEqual(geometry.length, expected.length)
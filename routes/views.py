@@ -1,13 +1,18 @@
-from typing import List, Optional
+from typing import Optional
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from users.models import CustomUser
+from wt_iopgps.sparse_fields import SparseFieldsetsFilter
 from .filters import RouteFilter
-from .models import Route, UserRoute
-from .serializers import RouteSerializer
+from .geometry import is_geometry_requested
+from .models import Route
+from .serializers import RouteBulkCreateSerializer, RouteSerializer
 
 
 class UserRouteReadAndCreate(
@@ -18,17 +23,40 @@ class UserRouteReadAndCreate(
 
     def get_queryset(self):
         """
-        This method retrieves the queryset of Tire objects
-        for the vehicle specified by the 'pk' parameter in the URL,
-        which corresponds to the 'vuid' of the vehicle.
-        If the 'vuid' is None or does not exist, it returns an empty queryset.
+        This method retrieves the queryset of Route objects
+        for the user specified by the 'uuid' parameter in the URL.
+        If the 'uuid' is None it returns an empty queryset, and if the user
+        does not exist it raises a 404 error. The positions are prefetched, so
+        the number of queries does not depend on the number of routes.
         """
         uuid: Optional[str] = self.kwargs.get("uuid")
         if uuid is not None:
             user = get_object_or_404(CustomUser, uuid=uuid)
-            routes = UserRoute.objects.filter(user=user)
-            return [route.route for route in routes]
-        return UserRoute.objects.none()
+            # The routes in the order they were assigned to the user, with their positions.
+            queryset = (
+                Route.objects.filter(userroute__user=user)
+                .order_by("userroute__id")
+                .with_positions()
+            )
+            if is_geometry_requested(self.request):
+                queryset = queryset.select_related("geometry")
+            return queryset
+        return Route.objects.none()
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request: Request, uuid: Optional[str] = None):
+        """
+        Creates a route of the user with all its positions in a single request.
+        Each position has its 'lat', 'lng', 'order' and optionally 'name' and 'alias'.
+        """
+        user = get_object_or_404(CustomUser, uuid=uuid)
+        serializer = RouteBulkCreateSerializer(data=request.data, context={"creator": user})
+        serializer.is_valid(raise_exception=True)
+        route = serializer.save()
+        return Response(
+            RouteSerializer(route, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED,
+        )
 
 
 
@@ -39,7 +67,13 @@ class RouteViewSet(viewsets.ModelViewSet):
     as well as fetching routing data from Geoapify based on the route's positions.
     """
 
-    queryset = Route.objects.all()
+    queryset = Route.objects.with_positions()
     serializer_class = RouteSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, SparseFieldsetsFilter]
     filterset_class = RouteFilter
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if is_geometry_requested(self.request):
+            queryset = queryset.select_related("geometry")
+        return queryset
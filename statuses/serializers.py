@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from vehicles.models import VehicleStatus
 
-class VehicleStatusSerializer(serializers.ModelSerializer):
+class VehicleStatusSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleStatus
         fields = '__all__'
+        expandable_fields = {"vehicle": "vehicles.serializers.VehicleSerializer"}
@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from vehicles.models import Tire
 
-class TireSerializer(serializers.ModelSerializer):
+class TireSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tire
         fields = '__all__'
+        expandable_fields = {"vehicle": "vehicles.serializers.VehicleSerializer"}
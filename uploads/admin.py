@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Blob
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the Blob model of the content-addressed storage.
+    """
+    list_display = ['name', 'size', 'ref_count', 'uploads', 'created_at', 'last_used_at']
+    search_fields = ['name']
+    ordering = ['-created_at',]
@@ -0,0 +1,42 @@
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingUploadHandlerMixin:
+    """
+    Computes the SHA-256 of an uploaded file while its chunks arrive and
+    stores it in the `content_hash` attribute of the resulting file, so that
+    the content-addressed storage does not have to read the file again.
+
+    Only the chunks consumed by this handler (those it does not pass on to
+    the next handler) are hashed, so every file is hashed once.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set before calling the handler, which may raise StopFutureHandlers.
+        self._hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        if remaining is None:
+            self._hasher.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self._hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    """Keeps small uploads in memory and hashes them."""
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    """Streams large uploads to a temporary file and hashes them."""
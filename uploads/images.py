@@ -0,0 +1,186 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from time import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+from PIL import Image, ImageOps
+
+from .models import ImageVariantSet
+from .storage import BLOB_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Image fields whose uploads get resized variants, by model label.
+IMAGE_VARIANT_FIELDS = {
+    "users.CustomUser": ("photo",),
+    "vehicles.Vehicle": ("front_photo", "left_side_photo", "right_side_photo", "rear_photo"),
+    "movement_orders.Incident": ("image",),
+    "licenses.License": ("front_image", "back_image"),
+}
+
+# Maximum (width, height) of each variant. The aspect ratio is kept.
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": (200, 200),
+    "medium": (800, 800),
+}
+
+# Pillow format and save options of each variant extension.
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def variant_name(name: str, variant: str, extension: str) -> str:
+    """
+    Returns the storage name of a variant, which is placed next to the original.
+    For example, 'users/abc.png' -> 'users/abc.thumbnail.webp'.
+    """
+    root, _ = os.path.splitext(name)
+    return f"{root}.{variant}.{extension}"
+
+
+def _encode(image: Image.Image, extension: str) -> bytes:
+    """Encodes the image in the format of the given extension."""
+    image_format, options = IMAGE_VARIANT_FORMATS[extension]
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def record_variants(name: str, variants: Dict[str, Dict[str, str]]) -> None:
+    """Records the variants that were generated for an image, so they can be served."""
+    ImageVariantSet.objects.update_or_create(
+        name=name, defaults={"variants": variants, "generated_at": int(time())}
+    )
+
+
+def get_recorded_variants(names: Iterable[str]) -> Dict[str, dict]:
+    """
+    Returns the recorded variants of the given images by name,
+    with an empty mapping for the images that have none yet.
+    """
+    names = set(names)
+    found = dict(ImageVariantSet.objects.filter(name__in=names).values_list("name", "variants"))
+    return {name: found.get(name, {}) for name in names}
+
+
+def generate_variants(name: str, storage: Storage = default_storage) -> Dict[str, Dict[str, str]]:
+    """
+    Generates every variant of an image, saves them in the storage of the
+    original and records them.
+
+    Args:
+        - name (str): The storage name of the original image.
+        - storage (Storage): The storage that contains the original image.
+            If it is a ContentAddressedStorage, the variants go to its backend.
+
+    Returns:
+        - dict: A mapping variant -> extension -> storage name of the saved files.
+    """
+    # The variants are written directly to the backend of the content-addressed
+    # storage, since their names must stay next to the original.
+    backend = getattr(storage, "backend", storage)
+    names = {
+        variant: {
+            extension: variant_name(name, variant, extension)
+            for extension in IMAGE_VARIANT_FORMATS
+        }
+        for variant in IMAGE_VARIANT_SIZES
+    }
+    if name.startswith(BLOB_PREFIX) and all(
+        backend.exists(target) for targets in names.values() for target in targets.values()
+    ):
+        # The content of a blob never changes, so its variants are still valid.
+        record_variants(name, names)
+        return names
+
+    largest = max(IMAGE_VARIANT_SIZES.values())
+    with backend.open(name, "rb") as original:
+        image = Image.open(original)
+        # JPEG images can be decoded directly at a reduced scale,
+        # which is much faster than decoding the full resolution.
+        image.draft("RGB", largest)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    saved: Dict[str, Dict[str, str]] = {}
+    # The variants are generated from the largest to the smallest,
+    # each one resized from the previous one.
+    by_size = sorted(IMAGE_VARIANT_SIZES.items(), key=lambda item: item[1], reverse=True)
+    for variant, size in by_size:
+        image = image.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        saved[variant] = {}
+        for extension, target in names[variant].items():
+            if backend.exists(target):
+                backend.delete(target)
+            saved_name = backend.save(target, ContentFile(_encode(image, extension)))
+            if saved_name != target:
+                # Another process wrote the same variant in the meantime.
+                backend.delete(saved_name)
+            saved[variant][extension] = target
+    record_variants(name, saved)
+    return saved
+
+
+class ImageVariantProcessor:
+    """
+    Generates the variants of the uploaded images in a pool of background threads,
+    so that the requests that upload them do not wait for the processing.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.IMAGE_VARIANT_MAX_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+        self._lock = threading.Lock()
+        self._queued: Dict[str, Future] = {}
+
+    def _process(self, name: str, storage: Storage) -> Dict[str, Dict[str, str]]:
+        try:
+            return generate_variants(name, storage)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not generate the variants of %s", name)
+            return {}
+
+    def _done(self, name: str, _future: Future):
+        with self._lock:
+            self._queued.pop(name, None)
+
+    def submit(self, name: str, storage: Storage = default_storage) -> Future:
+        """
+        Queues the generation of the variants of an image. An image that is
+        already queued (e.g. the same blob uploaded twice) is processed once.
+        """
+        with self._lock:
+            if name in self._queued:
+                return self._queued[name]
+            future = self._executor.submit(self._process, name, storage)
+            self._queued[name] = future
+        future.add_done_callback(partial(self._done, name))
+        return future
+
+
+_processor = None
+_processor_lock = threading.Lock()
+
+
+def get_processor() -> ImageVariantProcessor:
+    """Returns the processor of the current process, creating it on first use."""
+    global _processor  # pylint: disable=global-statement
+    with _processor_lock:
+        if _processor is None:
+            _processor = ImageVariantProcessor()
+        return _processor
@@ -0,0 +1,167 @@
+from collections import Counter
+from datetime import timedelta
+from time import time
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from uploads.images import IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_SIZES, variant_name
+from uploads.models import Blob, ImageVariantSet, PendingUpload
+from uploads.storage import BLOB_PREFIX
+from uploads.streaming import STAGING_PREFIX
+
+
+def count_references(names=None) -> Counter:
+    """
+    Counts how many rows of every file field reference each blob,
+    or only the blobs with the given names.
+    """
+    lookup = "startswith" if names is None else "in"
+    value = BLOB_PREFIX if names is None else list(names)
+    references = Counter()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if not isinstance(field, models.FileField):
+                continue
+            referenced = model._default_manager.filter(
+                **{f"{field.name}__{lookup}": value}
+            ).values_list(field.name, flat=True)
+            references.update(referenced)
+    return references
+
+
+def collect_blob(backend, pk: int, deadline: int) -> bool:
+    """
+    Deletes an unreferenced blob with its image variants.
+
+    The blob is locked and its references counted again right before deleting
+    it, since an upload may have reused it after the first count: the storage
+    touches `last_used_at` when it reuses a blob, so a blob used after the
+    deadline is kept, and saving it meanwhile waits for the lock and then
+    writes the content again.
+
+    Returns:
+        - bool: Whether the blob was deleted.
+    """
+    with transaction.atomic():
+        blob = (
+            Blob.objects.select_for_update()
+            .filter(pk=pk, last_used_at__lt=deadline)
+            .first()
+        )
+        if blob is None:
+            return False
+        references = count_references([blob.name])[blob.name]
+        if references:
+            Blob.objects.filter(pk=pk).update(ref_count=references)
+            return False
+        blob.delete()
+        ImageVariantSet.objects.filter(name=blob.name).delete()
+        backend.delete(blob.name)
+        for variant in IMAGE_VARIANT_SIZES:
+            for extension in IMAGE_VARIANT_FORMATS:
+                backend.delete(variant_name(blob.name, variant, extension))
+    return True
+
+
+def list_staged(backend, older_than) -> list:
+    """
+    Returns the streamed uploads that were never saved by a model
+    (e.g. because the request was invalid) and are older than the given time.
+    """
+    try:
+        _, files = backend.listdir(STAGING_PREFIX)
+    except FileNotFoundError:
+        return []
+    names = [f"{STAGING_PREFIX}{file}" for file in files]
+    return [name for name in names if backend.get_modified_time(name) < older_than]
+
+
+def format_size(size: float) -> str:
+    """Returns a human-readable size."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+class Command(BaseCommand):
+    """
+    Garbage collector of the content-addressed storage.
+
+    Recounts the references of every Blob from the file fields of all the
+    models, deletes the blobs (and their image variants) that nothing
+    references anymore, as well as the expired or abandoned uploads, and
+    reports the space and upload time saved by the deduplication.
+    """
+
+    help = "Deletes unreferenced blobs and reports the deduplication savings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Only blobs unused for this long are deleted, so uploads in progress are kept.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything.",
+        )
+
+    def handle(self, *args, **options):
+        references = count_references()
+        changed = []
+        for blob in Blob.objects.all():
+            if blob.ref_count != references[blob.name]:
+                blob.ref_count = references[blob.name]
+                changed.append(blob)
+        if not options["dry_run"]:
+            Blob.objects.bulk_update(changed, ["ref_count"], batch_size=1000)
+
+        deadline = int(time() - options["grace_hours"] * 3600)
+        garbage = [
+            blob
+            for blob in Blob.objects.filter(last_used_at__lt=deadline)
+            if references[blob.name] == 0
+        ]
+        backend = getattr(default_storage, "backend", default_storage)
+        abandoned = list_staged(
+            backend, timezone.now() - timedelta(hours=options["grace_hours"])
+        )
+        expired = PendingUpload.objects.filter(expires_at__lt=int(time()))
+        expired_count = expired.count()
+        if not options["dry_run"]:
+            expired.delete()
+            for name in abandoned:
+                backend.delete(name)
+            garbage = [blob for blob in garbage if collect_blob(backend, blob.pk, deadline)]
+
+        stored = referenced = transferred = seconds = 0
+        for blob in Blob.objects.all():
+            count = references[blob.name]
+            stored += blob.size
+            referenced += blob.size * count
+            transferred += blob.size * max(blob.uploads - 1, 0)
+            seconds += blob.write_time * max(blob.uploads - 1, 0)
+
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(f"{prefix}Reference counts corrected: {len(changed)}")
+        self.stdout.write(
+            f"{prefix}Unreferenced blobs deleted: {len(garbage)} "
+            f"({format_size(sum(blob.size for blob in garbage))})"
+        )
+        self.stdout.write(f"{prefix}Expired direct uploads deleted: {expired_count}")
+        self.stdout.write(f"{prefix}Abandoned staged files deleted: {len(abandoned)}")
+        self.stdout.write(f"Stored: {format_size(stored)} for {format_size(referenced)} referenced")
+        self.stdout.write(f"Storage saved: {format_size(max(referenced - stored, 0))}")
+        self.stdout.write(
+            f"Uploads skipped: {format_size(transferred)} not written, "
+            f"about {seconds:.1f} s of write time saved"
+        )
+        self.stdout.write(self.style.SUCCESS("Blob collection finished."))
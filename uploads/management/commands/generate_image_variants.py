@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from uploads.images import IMAGE_VARIANT_FIELDS, generate_variants
+from uploads.models import ImageVariantSet
+
+
+def list_images() -> set:
+    """Returns the names of the images stored in the fields that get variants."""
+    names = set()
+    for label, fields in IMAGE_VARIANT_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            names.update(
+                model._default_manager.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+                .distinct()
+            )
+    return names
+
+
+class Command(BaseCommand):
+    """
+    Generates the missing variants of the stored images.
+
+    The variants are only served once they are recorded, so the images
+    uploaded before the variants were recorded (or whose generation failed)
+    have none until this command generates them.
+    """
+
+    help = "Generates and records the variants of the images that have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Generate the variants of every image, even the recorded ones.",
+        )
+
+    def handle(self, *args, **options):
+        names = list_images()
+        if not options["all"]:
+            names -= set(
+                ImageVariantSet.objects.filter(name__in=names).values_list("name", flat=True)
+            )
+
+        generated = failed = 0
+        for name in sorted(names):
+            try:
+                generate_variants(name, default_storage)
+            except Exception as e:  # pylint: disable=broad-except
+                failed += 1
+                self.stderr.write(f"Could not generate the variants of {name}: {e}")
+            else:
+                generated += 1
+
+        self.stdout.write(f"Images processed: {generated}")
+        self.stdout.write(f"Images failed: {failed}")
+        self.stdout.write(self.style.SUCCESS("Image variants generated."))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the blob, derived from the hash of its content.', max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(help_text='Size of the content in bytes.')),
+                ('ref_count', models.IntegerField(default=0, help_text='Number of stored files that reference the blob.')),
+                ('uploads', models.PositiveIntegerField(default=0, help_text='Number of uploads of this content, including the first one.')),
+                ('write_time', models.FloatField(default=0, help_text='Seconds taken to write the content to the storage the first time.')),
+                ('created_at', models.PositiveBigIntegerField(help_text='Time when the blob was written.')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_auth_user_search_indexes'),
+        ('uploads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier of the upload.', primary_key=True, serialize=False)),
+                ('model', models.CharField(help_text="Label of the model that receives the file (e.g. 'licenses.license').", max_length=100)),
+                ('object_id', models.CharField(help_text='Primary key of the record that receives the file.', max_length=64)),
+                ('field', models.CharField(help_text='Name of the file field that receives the file.', max_length=64)),
+                ('file_name', models.CharField(help_text='Original name of the file.', max_length=255)),
+                ('content_type', models.CharField(help_text='Declared content type of the file.', max_length=100)),
+                ('size', models.PositiveBigIntegerField(help_text='Declared size of the file in bytes.')),
+                ('sha256', models.CharField(help_text='Declared SHA-256 of the content, checked by the storage.', max_length=64)),
+                ('staged_name', models.CharField(help_text='Storage name where the client writes the file.', max_length=255)),
+                ('expires_at', models.PositiveBigIntegerField(help_text='Time after which the upload can no longer be confirmed.')),
+                ('user', models.ForeignKey(help_text='Account that requested the upload.', on_delete=django.db.models.deletion.CASCADE, related_name='pending_uploads', to='users.customuser')),
+            ],
+            options={
+                'verbose_name': 'Pending upload',
+                'verbose_name_plural': 'Pending uploads',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+def backfill_last_used_at(apps, schema_editor):
+    Blob = apps.get_model('uploads', 'Blob')
+    Blob.objects.update(last_used_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0002_pendingupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='last_used_at',
+            field=models.PositiveBigIntegerField(default=0, help_text='Time when the blob was last written or reused by an upload.'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_last_used_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(fields=['last_used_at'], name='blob_last_used_idx'),
+        ),
+    ]
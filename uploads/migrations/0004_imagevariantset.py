@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0003_blob_last_used_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariantSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the original image.', max_length=255, unique=True)),
+                ('variants', models.JSONField(default=dict, help_text='Storage names of the generated files, by variant and extension.')),
+                ('generated_at', models.PositiveBigIntegerField(help_text='Time when the variants were generated.')),
+            ],
+            options={
+                'verbose_name': 'Image variant set',
+                'verbose_name_plural': 'Image variant sets',
+            },
+        ),
+    ]
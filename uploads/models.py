@@ -0,0 +1,140 @@
+import uuid
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from users.models import CustomUser
+
+
+class Blob(models.Model):
+    """
+    Model to represent a file stored once by the content-addressed storage.
+    Every upload with the same content is stored under the same name, so
+    the blob keeps how many files reference it and how many uploads reused it.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text=_("Storage name of the blob, derived from the hash of its content."),
+    )
+    size = models.PositiveBigIntegerField(
+        help_text=_("Size of the content in bytes."),
+    )
+    ref_count = models.IntegerField(
+        default=0,
+        help_text=_("Number of stored files that reference the blob."),
+    )
+    uploads = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Number of uploads of this content, including the first one."),
+    )
+    write_time = models.FloatField(
+        default=0,
+        help_text=_("Seconds taken to write the content to the storage the first time."),
+    )
+    created_at = models.PositiveBigIntegerField(
+        help_text=_("Time when the blob was written."),
+    )
+    last_used_at = models.PositiveBigIntegerField(
+        help_text=_("Time when the blob was last written or reused by an upload."),
+    )
+
+    class Meta:
+        verbose_name = _("Blob")
+        verbose_name_plural = _("Blobs")
+        indexes = [
+            models.Index(fields=["last_used_at"], name="blob_last_used_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Blob(name={self.name}, ref_count={self.ref_count})"
+
+
+class PendingUpload(models.Model):
+    """
+    Model to represent an upload that a client sends directly to the storage
+    with a presigned URL. The file is written to the staging area and is
+    attached to the record only after the client confirms the upload.
+    """
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text=_("Unique identifier of the upload."),
+    )
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="pending_uploads",
+        help_text=_("Account that requested the upload."),
+    )
+    model = models.CharField(
+        max_length=100,
+        help_text=_("Label of the model that receives the file (e.g. 'licenses.license')."),
+    )
+    object_id = models.CharField(
+        max_length=64,
+        help_text=_("Primary key of the record that receives the file."),
+    )
+    field = models.CharField(
+        max_length=64,
+        help_text=_("Name of the file field that receives the file."),
+    )
+    file_name = models.CharField(
+        max_length=255,
+        help_text=_("Original name of the file."),
+    )
+    content_type = models.CharField(
+        max_length=100,
+        help_text=_("Declared content type of the file."),
+    )
+    size = models.PositiveBigIntegerField(
+        help_text=_("Declared size of the file in bytes."),
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        help_text=_("Declared SHA-256 of the content, checked by the storage."),
+    )
+    staged_name = models.CharField(
+        max_length=255,
+        help_text=_("Storage name where the client writes the file."),
+    )
+    expires_at = models.PositiveBigIntegerField(
+        help_text=_("Time after which the upload can no longer be confirmed."),
+    )
+
+    class Meta:
+        verbose_name = _("Pending upload")
+        verbose_name_plural = _("Pending uploads")
+
+    def __str__(self) -> str:
+        return f"PendingUpload(model={self.model}, object_id={self.object_id}, field={self.field})"
+
+
+class ImageVariantSet(models.Model):
+    """
+    Model to record the resized variants that were generated for an image,
+    so they are only served once their files exist.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text=_("Storage name of the original image."),
+    )
+    variants = models.JSONField(
+        default=dict,
+        help_text=_("Storage names of the generated files, by variant and extension."),
+    )
+    generated_at = models.PositiveBigIntegerField(
+        help_text=_("Time when the variants were generated."),
+    )
+
+    class Meta:
+        verbose_name = _("Image variant set")
+        verbose_name_plural = _("Image variant sets")
+
+    def __str__(self) -> str:
+        return f"ImageVariantSet(name={self.name})"
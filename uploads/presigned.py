@@ -0,0 +1,220 @@
+import base64
+import binascii
+import os
+from time import time
+from typing import Optional
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from .models import PendingUpload
+from .streaming import STAGING_PREFIX, StagedUploadedFile, get_s3_backend, get_s3_key
+
+# File fields that can be uploaded and downloaded directly with the storage, by model label.
+PRESIGNED_UPLOAD_FIELDS = {
+    "licenses.license": ("front_image", "back_image"),
+    "vehicle_insurance.brokerinfo": ("insurance_document",),
+    "vehicle_registration.vehicleregistration": ("registration_document",),
+    "maintenance_manuals.maintenancemanual": ("manual_file",),
+    "vehicles.vehicle": ("front_photo", "left_side_photo", "right_side_photo", "rear_photo"),
+    "movement_orders.incident": ("image",),
+}
+
+IMAGE_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp")
+DOCUMENT_CONTENT_TYPES = ("application/pdf",) + IMAGE_CONTENT_TYPES
+
+# Bytes read from the start of an upload to detect its content type.
+SNIFF_SIZE = 16
+
+
+class PresignedUploadError(Exception):
+    """Raised when a direct upload or download cannot be performed."""
+
+
+def get_allowed_content_types(model_label: str, field: str) -> tuple:
+    """Returns the content types accepted by a file field of the registry."""
+    model_field = apps.get_model(model_label)._meta.get_field(field)
+    if isinstance(model_field, models.ImageField):
+        return IMAGE_CONTENT_TYPES
+    return DOCUMENT_CONTENT_TYPES
+
+
+def get_instance(model_label: str, object_id: str) -> models.Model:
+    """
+    Returns the record of the registry that receives or provides a file.
+
+    Raises:
+        - PresignedUploadError: If the record does not exist.
+    """
+    model = apps.get_model(model_label)
+    try:
+        return model._default_manager.get(pk=object_id)
+    except (model.DoesNotExist, ValidationError, ValueError) as e:
+        raise PresignedUploadError(f"The {model._meta.verbose_name} does not exist.") from e
+
+
+def _get_backend():
+    backend = get_s3_backend()
+    if backend is None:
+        raise PresignedUploadError("Direct transfers require the files to be stored in S3.")
+    return backend
+
+
+def create_upload(user, model_label, object_id, field, file_name, content_type, size, sha256):
+    """
+    Registers a direct upload and returns it with a presigned PUT URL.
+
+    The URL is signed with the content type and the SHA-256 of the content,
+    so the storage rejects any other content. The client must send them in the
+    'Content-Type' and 'x-amz-checksum-sha256' headers (see `headers`).
+
+    Returns:
+        - tuple: The PendingUpload, the URL and the headers the client must send.
+    """
+    backend = _get_backend()
+    extension = os.path.splitext(file_name)[1].lower()
+    upload = PendingUpload.objects.create(
+        user=user,
+        model=model_label,
+        object_id=str(object_id),
+        field=field,
+        file_name=file_name,
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+        staged_name=f"{STAGING_PREFIX}{uuid4().hex}{extension}",
+        expires_at=int(time()) + settings.PRESIGNED_UPLOAD_EXPIRATION,
+    )
+    checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+    url = backend.connection.meta.client.generate_presigned_url(
+        "put_object",
+        Params={
+            "Bucket": backend.bucket_name,
+            "Key": get_s3_key(backend, upload.staged_name),
+            "ContentType": content_type,
+            "ChecksumSHA256": checksum,
+        },
+        ExpiresIn=settings.PRESIGNED_UPLOAD_EXPIRATION,
+    )
+    headers = {"Content-Type": content_type, "x-amz-checksum-sha256": checksum}
+    return upload, url, headers
+
+
+def discard_upload(upload: PendingUpload) -> None:
+    """Deletes a pending upload and the file written by the client, if any."""
+    backend = get_s3_backend()
+    if backend is not None:
+        backend.delete(upload.staged_name)
+    upload.delete()
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    """
+    Returns the content type of a file from its first bytes (see SNIFF_SIZE),
+    or None if it is not one of the accepted types.
+    """
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+def get_checksum(attributes: dict) -> str:
+    """
+    Returns the hex SHA-256 of a file written by a client, as verified and stored
+    by S3 (the presigned URL requires the 'x-amz-checksum-sha256' header),
+    or an empty string if S3 has none.
+    """
+    try:
+        return base64.b64decode(attributes.get("Checksum", {}).get("ChecksumSHA256") or "").hex()
+    except binascii.Error:
+        return ""
+
+
+def confirm_upload(upload: PendingUpload) -> models.Model:
+    """
+    Checks the file written by the client and attaches it to its record.
+
+    The size and SHA-256 of the file must match the declared ones, and its
+    first bytes must be of the declared content type: the 'Content-Type' that
+    S3 stores is the one the client sent, so it proves nothing. The file is
+    then moved to its final name by the storage with a server-side copy.
+
+    Raises:
+        - PresignedUploadError: If the upload expired, the file is missing or it
+            does not match the declaration. The upload is discarded.
+    """
+    backend = _get_backend()
+    if upload.expires_at < time():
+        discard_upload(upload)
+        raise PresignedUploadError("The upload expired.")
+
+    client = backend.connection.meta.client
+    key = get_s3_key(backend, upload.staged_name)
+    try:
+        attributes = client.get_object_attributes(
+            Bucket=backend.bucket_name, Key=key, ObjectAttributes=["Checksum", "ObjectSize"]
+        )
+        start = client.get_object(
+            Bucket=backend.bucket_name, Key=key, Range=f"bytes=0-{SNIFF_SIZE - 1}"
+        )["Body"].read()
+    except ClientError as e:
+        raise PresignedUploadError("The file has not been uploaded yet.") from e
+
+    errors = []
+    if attributes["ObjectSize"] != upload.size:
+        errors.append(f"The size is {attributes['ObjectSize']} bytes, not {upload.size}.")
+    content_type = sniff_content_type(start)
+    if content_type != upload.content_type:
+        errors.append(f"The content is {content_type or 'unknown'}, not {upload.content_type}.")
+    if not errors and get_checksum(attributes) != upload.sha256:
+        errors.append("The SHA-256 of the content does not match.")
+    if errors:
+        discard_upload(upload)
+        raise PresignedUploadError(" ".join(errors))
+
+    instance = get_instance(upload.model, upload.object_id)
+    setattr(
+        instance,
+        upload.field,
+        StagedUploadedFile(
+            backend,
+            upload.staged_name,
+            upload.file_name,
+            upload.content_type,
+            upload.size,
+            None,
+            upload.sha256,
+        ),
+    )
+    instance.save(update_fields=[upload.field])
+    upload.delete()
+    return instance
+
+
+def create_download_url(instance: models.Model, field: str) -> str:
+    """
+    Returns a presigned GET URL of a file field, valid for PRESIGNED_DOWNLOAD_EXPIRATION
+    seconds, so the client downloads the file directly from the storage.
+
+    Raises:
+        - PresignedUploadError: If the record has no file in that field.
+    """
+    backend = _get_backend()
+    file = getattr(instance, field)
+    if not file:
+        raise PresignedUploadError("There is no file to download.")
+    return backend.connection.meta.client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": backend.bucket_name, "Key": get_s3_key(backend, file.name)},
+        ExpiresIn=settings.PRESIGNED_DOWNLOAD_EXPIRATION,
+    )
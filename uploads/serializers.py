@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
+from .images import get_recorded_variants
+from .models import PendingUpload
+from .presigned import (
+    PRESIGNED_UPLOAD_FIELDS,
+    PresignedUploadError,
+    get_allowed_content_types,
+    get_instance,
+)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Read-only field with the URLs of the resized variants of an image field:
+
+        {"thumbnail": {"webp": url, "jpeg": url}, "medium": {...}}
+
+    The variants are generated in the background after the upload, so only
+    the ones recorded as generated are listed, and the field is empty for a
+    few seconds; clients should fall back to the original image meanwhile.
+    Returns None if there is no image.
+    """
+
+    def _sibling_names(self) -> set:
+        """
+        Returns the names of the images of every variants field of the objects
+        being serialized, so that they are all looked up in one query.
+        """
+        root = self.root
+        if self.parent is not root and self.parent is not getattr(root, "child", None):
+            return set()
+        instances = root.instance
+        if not isinstance(instances, (list, tuple, QuerySet)):
+            instances = [instances]
+        fields = [
+            field for field in self.parent.fields.values() if isinstance(field, ImageVariantsField)
+        ]
+        names = set()
+        for instance in instances:
+            for field in fields:
+                try:
+                    value = field.get_attribute(instance)
+                except (AttributeError, KeyError, ObjectDoesNotExist):
+                    continue
+                if value:
+                    names.add(value.name)
+        return names
+
+    def _recorded_variants(self, name: str) -> dict:
+        """
+        Returns the recorded variants of an image, looked up once per serialization.
+        Views that serialize nested trees can preload them in the 'image_variants'
+        context (see get_recorded_variants).
+        """
+        recorded = self.context.get("image_variants")
+        if recorded is None:
+            recorded = getattr(self.root, "_recorded_image_variants", None)
+            if recorded is None:
+                recorded = self.root._recorded_image_variants = {}
+        if name not in recorded:
+            recorded.update(get_recorded_variants(self._sibling_names() - set(recorded) | {name}))
+        return recorded[name]
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get("request")
+        variants = {}
+        for variant, targets in self._recorded_variants(value.name).items():
+            variants[variant] = {}
+            for extension, target in targets.items():
+                url = value.storage.url(target)
+                variants[variant][extension] = (
+                    request.build_absolute_uri(url) if request is not None else url
+                )
+        return variants
+
+
+class DirectTransferSerializer(serializers.Serializer):
+    """
+    Identifies a file field of a record of the direct transfer registry.
+    """
+
+    model = serializers.ChoiceField(choices=sorted(PRESIGNED_UPLOAD_FIELDS))
+    object_id = serializers.CharField(max_length=64)
+    field = serializers.CharField(max_length=64)
+
+    def validate(self, attrs):
+        if attrs["field"] not in PRESIGNED_UPLOAD_FIELDS[attrs["model"]]:
+            raise serializers.ValidationError(
+                {"field": f"Must be one of: {', '.join(PRESIGNED_UPLOAD_FIELDS[attrs['model']])}."}
+            )
+        try:
+            attrs["instance"] = get_instance(attrs["model"], attrs["object_id"])
+        except PresignedUploadError as e:
+            raise serializers.ValidationError({"object_id": str(e)}) from e
+        return attrs
+
+
+class DirectUploadRequestSerializer(DirectTransferSerializer):
+    """
+    Validates the declaration of a file that the client will upload directly
+    to the storage: its name, content type, size and SHA-256.
+    """
+
+    file_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r"^[0-9a-f]{64}$", help_text="Hex SHA-256 of the content.")
+
+    def validate_size(self, value):
+        if value > settings.PRESIGNED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"The file cannot exceed {settings.PRESIGNED_UPLOAD_MAX_SIZE} bytes."
+            )
+        return value
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        allowed = get_allowed_content_types(attrs["model"], attrs["field"])
+        if attrs["content_type"] not in allowed:
+            raise serializers.ValidationError(
+                {"content_type": f"Must be one of: {', '.join(allowed)}."}
+            )
+        return attrs
+
+
+class PendingUploadSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the PendingUpload model.
+    """
+
+    class Meta:
+        model = PendingUpload
+        fields = [
+            "id",
+            "model",
+            "object_id",
+            "field",
+            "file_name",
+            "content_type",
+            "size",
+            "sha256",
+            "expires_at",
+        ]
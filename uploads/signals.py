@@ -0,0 +1,33 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+
+from .images import IMAGE_VARIANT_FIELDS, get_processor
+
+
+def detect_new_images(sender, instance, **kwargs):
+    """
+    Remembers which image fields received a new file. The files are
+    still uncommitted here, since they are stored while the instance is saved.
+    """
+    instance._new_images = [
+        field
+        for field in IMAGE_VARIANT_FIELDS[sender._meta.label]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+
+
+def process_new_images(sender, instance, **kwargs):
+    """Queues the generation of the variants once the transaction is committed."""
+    for field in getattr(instance, "_new_images", ()):
+        file = getattr(instance, field)
+        transaction.on_commit(partial(get_processor().submit, file.name, file.storage))
+    instance._new_images = []
+
+
+for label in IMAGE_VARIANT_FIELDS:
+    model = apps.get_model(label)
+    pre_save.connect(detect_new_images, sender=model, dispatch_uid=f"detect_new_images_{label}")
+    post_save.connect(process_new_images, sender=model, dispatch_uid=f"process_new_images_{label}")
@@ -0,0 +1,161 @@
+import hashlib
+import os
+from time import monotonic, time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+from .streaming import promote_staged
+
+BLOB_PREFIX = "blobs/"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_content_hash(content: File) -> str:
+    """
+    Returns the SHA-256 of a file. Files received by the hashing upload
+    handlers already carry it; the rest are read in chunks, never whole.
+    """
+    content_hash = getattr(content, "content_hash", None)
+    if content_hash:
+        return content_hash
+    hasher = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def blob_name(content_hash: str, name: str) -> str:
+    """
+    Returns the storage name of a blob, e.g. 'blobs/ab/cd/abcd...ef.jpg'.
+    The extension of the original name is kept so the files are served
+    with the right content type.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    return f"{BLOB_PREFIX}{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}"
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Storage that names the files after the hash of their content and writes
+    each content only once to the backend storage (CONTENT_ADDRESSED_BACKEND).
+
+    Saving a file whose content is already stored skips the write and only
+    increases the reference count of its Blob. Deleting a file decreases it;
+    the content is removed from the backend by the `collect_blobs` command
+    once nothing references it. Files saved before this storage was enabled
+    keep their names and are served from the backend as before.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self) -> Storage:
+        """The storage where the content is written."""
+        if self._backend is None:
+            self._backend = import_string(settings.CONTENT_ADDRESSED_BACKEND)()
+        return self._backend
+
+    def save(self, name, content, max_length=None):
+        # pylint: disable=import-outside-toplevel
+        from .models import Blob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        content_hash = get_content_hash(content)
+        target = blob_name(content_hash, name)
+        # Uploads streamed to S3 during the request (see uploads.streaming)
+        # are already in the backend, under a temporary name.
+        staged_name = getattr(content, "staged_name", None)
+        # Reusing a blob marks it as used, so the collector leaves it alone
+        # until the record that references it has been saved.
+        updated = Blob.objects.filter(name=target).update(
+            ref_count=F("ref_count") + 1, uploads=F("uploads") + 1, last_used_at=int(time())
+        )
+        if updated:
+            if staged_name:
+                self.backend.delete(staged_name)
+            return target
+
+        write_time = 0.0
+        if self.backend.exists(target):
+            if staged_name:
+                self.backend.delete(staged_name)
+        elif staged_name:
+            started = monotonic()
+            promote_staged(self.backend, staged_name, target)
+            write_time = monotonic() - started
+        else:
+            content.seek(0)
+            started = monotonic()
+            saved = self.backend.save(target, content, max_length=max_length)
+            write_time = monotonic() - started
+            if saved != target:
+                # Another upload wrote the same content in the meantime.
+                self.backend.delete(saved)
+
+        with transaction.atomic():
+            blob, created = Blob.objects.select_for_update().get_or_create(
+                name=target,
+                defaults={
+                    "size": content.size,
+                    "ref_count": 1,
+                    "uploads": 1,
+                    "write_time": write_time,
+                    "created_at": int(time()),
+                    "last_used_at": int(time()),
+                },
+            )
+            if not created:
+                Blob.objects.filter(pk=blob.pk).update(
+                    ref_count=F("ref_count") + 1,
+                    uploads=F("uploads") + 1,
+                    last_used_at=int(time()),
+                )
+        return target
+
+    def delete(self, name):
+        # pylint: disable=import-outside-toplevel
+        from .models import Blob
+
+        if name.startswith(BLOB_PREFIX):
+            Blob.objects.filter(name=name).update(ref_count=F("ref_count") - 1)
+        else:
+            self.backend.delete(name)
+
+    def _open(self, name, mode="rb"):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
@@ -0,0 +1,185 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from storages.utils import clean_name
+
+# Document fields whose uploads are streamed to S3 while the request body arrives.
+STREAMING_UPLOAD_FIELDS = {
+    "heavy_transport_permit",
+    "insurance_document",
+    "registration_document",
+    "manual_file",
+}
+STAGING_PREFIX = "staging/"
+
+
+def get_s3_backend():
+    """
+    Returns the S3 storage where the uploads are written,
+    or None if the files are not stored in S3.
+    """
+    backend = getattr(default_storage, "backend", default_storage)
+    return backend if hasattr(backend, "bucket_name") else None
+
+
+def get_s3_key(backend, name: str) -> str:
+    """Returns the S3 key of a storage name."""
+    return backend._normalize_name(clean_name(name))  # pylint: disable=protected-access
+
+
+def promote_staged(backend, staged_name: str, name: str) -> None:
+    """
+    Moves a staged upload to its final name with a server-side copy,
+    so its content does not travel through the server again.
+    """
+    client = backend.connection.meta.client
+    client.copy(
+        {"Bucket": backend.bucket_name, "Key": get_s3_key(backend, staged_name)},
+        backend.bucket_name,
+        get_s3_key(backend, name),
+    )
+    backend.delete(staged_name)
+
+
+class S3MultipartUpload:
+    """
+    Writes a file to S3 part by part while its content is received.
+
+    At most one part (S3_MULTIPART_PART_SIZE bytes, plus the last chunk) is kept
+    in memory. Files smaller than a part are written with a single PUT.
+    The content is hashed (SHA-256) as it is written.
+    """
+
+    def __init__(self, backend, name: str, content_type: str):
+        self.client = backend.connection.meta.client
+        self.bucket = backend.bucket_name
+        self.key = get_s3_key(backend, name)
+        self.content_type = content_type or "application/octet-stream"
+        self.part_size = settings.S3_MULTIPART_PART_SIZE
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = None
+        self.size = 0
+
+    def write(self, data: bytes):
+        """Adds data to the file, sending a part when the buffer is full."""
+        self.hasher.update(data)
+        self.size += len(data)
+        self.buffer += data
+        if len(self.buffer) >= self.part_size:
+            self._send_part()
+
+    def _send_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self.buffer = bytearray()
+
+    def complete(self):
+        """Sends the remaining data and completes the file."""
+        if self.upload_id is None:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self.buffer),
+                ContentType=self.content_type,
+            )
+        else:
+            if self.buffer:
+                self._send_part()
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        self.buffer = bytearray()
+
+    def abort(self):
+        """Discards the parts already sent."""
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+
+
+class StagedUploadedFile(UploadedFile):
+    """
+    A file that was streamed to S3 during the request. Its content stays in
+    the staging area until a model saves it, and is only read if needed.
+    """
+
+    def __init__(self, backend, staged_name, name, content_type, size, charset, content_hash):
+        super().__init__(
+            backend.open(staged_name, "rb"), name, content_type, size, charset
+        )
+        self.staged_name = staged_name
+        self.content_hash = content_hash
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams the document fields (STREAMING_UPLOAD_FIELDS)
+    into an S3 multipart upload instead of memory or a temporary file.
+
+    It must be the first handler of FILE_UPLOAD_HANDLERS. The other fields,
+    and every field when the files are not stored in S3, go to the next handlers.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.backend = None
+        self.upload = None
+        self.staged_name = None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.backend = get_s3_backend() if field_name in STREAMING_UPLOAD_FIELDS else None
+        self.upload = None
+        if self.backend is None:
+            return
+        extension = os.path.splitext(file_name)[1].lower()
+        self.staged_name = f"{STAGING_PREFIX}{uuid4().hex}{extension}"
+        self.upload = S3MultipartUpload(self.backend, self.staged_name, self.content_type)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload is None:
+            return raw_data
+        self.upload.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.upload is None:
+            return None
+        self.upload.complete()
+        return StagedUploadedFile(
+            self.backend,
+            self.staged_name,
+            self.file_name,
+            self.content_type,
+            self.upload.size,
+            self.charset,
+            self.upload.hasher.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if self.upload is not None:
+            self.upload.abort()
@@ -0,0 +1,356 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
+from time import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.test import RequestFactory, TestCase, override_settings
+from moto import mock_aws
+from PIL import Image
+from rest_framework import serializers
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from maintenance_manuals.models import MaintenanceManual
+from users.models import CustomUser
+from wt_iopgps.testing import create_account, create_vehicle_type
+
+from .images import generate_variants
+from .management.commands.collect_blobs import collect_blob
+from .models import Blob, ImageVariantSet, PendingUpload
+from .presigned import PresignedUploadError, confirm_upload, create_upload
+from .serializers import ImageVariantsField
+from .storage import BLOB_PREFIX
+from .streaming import STAGING_PREFIX, S3MultipartUploadHandler, StagedUploadedFile
+
+DAY = 24 * 3600
+
+
+class MediaRootMixin:
+    """
+    Stores the files of each test in a temporary MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.backend = default_storage.backend
+
+
+class S3Mixin:
+    """
+    Stores the files of each test in a bucket mocked by moto.
+    """
+
+    def setUp(self):
+        super().setUp()
+        credentials = mock.patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "us-east-1",
+            },
+        )
+        credentials.start()
+        self.addCleanup(credentials.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        self.backend = S3Boto3Storage(bucket_name="uploads", region_name="us-east-1")
+        self.s3 = self.backend.connection.meta.client
+        self.s3.create_bucket(Bucket="uploads")
+        backend = mock.patch.object(default_storage, "_backend", self.backend)
+        backend.start()
+        self.addCleanup(backend.stop)
+
+    def s3_keys(self) -> set:
+        objects = self.s3.list_objects_v2(Bucket="uploads").get("Contents", [])
+        return {item["Key"] for item in objects}
+
+
+class CollectBlobsTests(MediaRootMixin, TestCase):
+    """
+    The collector only deletes the blobs that are unreferenced and unused.
+    """
+
+    def save_blob(self, content: bytes, used_days_ago: float = 2) -> Blob:
+        name = default_storage.save("document.txt", ContentFile(content))
+        Blob.objects.filter(name=name).update(
+            created_at=int(time() - 10 * DAY), last_used_at=int(time() - used_days_ago * DAY)
+        )
+        return Blob.objects.get(name=name)
+
+    def collect(self):
+        call_command("collect_blobs", "--grace-hours=24", stdout=StringIO())
+
+    def test_unreferenced_blob_is_deleted(self):
+        blob = self.save_blob(b"unreferenced")
+        self.collect()
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(self.backend.exists(blob.name))
+
+    def test_referenced_blob_is_kept(self):
+        blob = self.save_blob(b"referenced")
+        create_account("owner", photo=blob.name)
+        self.collect()
+        self.assertTrue(self.backend.exists(blob.name))
+        self.assertEqual(Blob.objects.get(pk=blob.pk).ref_count, 1)
+
+    def test_recently_reused_blob_is_kept(self):
+        blob = self.save_blob(b"reused")
+        # An upload reuses the content, but its record is not saved yet.
+        self.assertEqual(default_storage.save("copy.txt", ContentFile(b"reused")), blob.name)
+        self.collect()
+        self.assertTrue(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(self.backend.exists(blob.name))
+
+    def test_reference_added_after_the_count_is_kept(self):
+        blob = self.save_blob(b"late reference")
+        create_account("owner", photo=blob.name)
+        # The references are counted again once the blob is locked.
+        self.assertFalse(collect_blob(self.backend, blob.pk, int(time())))
+        self.assertTrue(self.backend.exists(blob.name))
+        self.assertEqual(Blob.objects.get(pk=blob.pk).ref_count, 1)
+
+    def test_blob_used_after_the_deadline_is_kept(self):
+        blob = self.save_blob(b"used", used_days_ago=0)
+        self.assertFalse(collect_blob(self.backend, blob.pk, int(time() - DAY)))
+        self.assertTrue(Blob.objects.filter(pk=blob.pk).exists())
+
+
+def png(color: str) -> ContentFile:
+    """Returns a small PNG image of the given color."""
+    buffer = BytesIO()
+    Image.new("RGB", (1000, 500), color).save(buffer, "PNG")
+    return ContentFile(buffer.getvalue(), name="photo.png")
+
+
+class PhotoSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    photo_variants = ImageVariantsField(source="photo")
+
+
+class ImageVariantsTests(MediaRootMixin, TestCase):
+    """
+    Only the variants that were generated are served.
+    """
+
+    def create_account(self, username: str, color: str) -> CustomUser:
+        return create_account(username, photo=png(color))
+
+    def test_variants_are_listed_once_generated(self):
+        account = self.create_account("driver", "red")
+        self.assertEqual(PhotoSerializer(account).data["photo_variants"], {})
+
+        generate_variants(account.photo.name)
+        variants = PhotoSerializer(account).data["photo_variants"]
+        self.assertEqual(set(variants), {"thumbnail", "medium"})
+        self.assertEqual(set(variants["thumbnail"]), {"webp", "jpeg"})
+        for targets in ImageVariantSet.objects.get(name=account.photo.name).variants.values():
+            for target in targets.values():
+                self.assertTrue(self.backend.exists(target))
+
+    def test_no_image(self):
+        account = create_account("driver")
+        with self.assertNumQueries(0):
+            self.assertIsNone(PhotoSerializer(account).data["photo_variants"])
+
+    def test_list_looks_up_the_variants_once(self):
+        accounts = [
+            self.create_account(f"driver{number}", color)
+            for number, color in enumerate(("red", "green", "blue"))
+        ]
+        generate_variants(accounts[0].photo.name)
+        with self.assertNumQueries(1):
+            data = PhotoSerializer(accounts, many=True).data
+        self.assertEqual([bool(row["photo_variants"]) for row in data], [True, False, False])
+
+    def test_backfill_command(self):
+        accounts = [self.create_account("first", "red"), self.create_account("second", "blue")]
+        generate_variants(accounts[0].photo.name)
+        ImageVariantSet.objects.filter(name=accounts[0].photo.name).update(generated_at=0)
+
+        stdout = StringIO()
+        call_command("generate_image_variants", stdout=stdout)
+        self.assertIn("Images processed: 1", stdout.getvalue())
+        # The recorded image is not generated again.
+        self.assertEqual(ImageVariantSet.objects.get(name=accounts[0].photo.name).generated_at, 0)
+        for row in PhotoSerializer(accounts, many=True).data:
+            self.assertEqual(set(row["photo_variants"]), {"thumbnail", "medium"})
+
+    def test_collected_blob_forgets_its_variants(self):
+        account = self.create_account("driver", "red")
+        name = account.photo.name
+        thumbnail = generate_variants(name)["thumbnail"]["webp"]
+        account.delete()
+        blob = Blob.objects.get(name=name)
+        self.assertTrue(collect_blob(self.backend, blob.pk, int(time()) + 1))
+        self.assertFalse(ImageVariantSet.objects.filter(name=name).exists())
+        self.assertFalse(self.backend.exists(thumbnail))
+
+
+PDF = b"%PDF-1.4\n" + b"0" * 100
+
+
+class PresignedUploadTests(S3Mixin, TestCase):
+    """
+    A direct upload is only attached to its record if its content is the declared one.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.account = create_account("driver")
+        self.manual = MaintenanceManual.objects.create(
+            vehicle_type=create_vehicle_type(), start_date=date(2024, 1, 1), advance_alerts="500km,-,2w"
+        )
+
+    def declare(self, content: bytes, content_type: str = "application/pdf") -> PendingUpload:
+        upload, _, _ = create_upload(
+            self.account,
+            "maintenance_manuals.maintenancemanual",
+            self.manual.pk,
+            "manual_file",
+            "manual.pdf",
+            content_type,
+            len(content),
+            hashlib.sha256(content).hexdigest(),
+        )
+        return upload
+
+    def send(self, upload: PendingUpload, content: bytes, checksum: bool = True):
+        """Writes the file as the client does with the presigned URL."""
+        options = {"ChecksumAlgorithm": "SHA256"} if checksum else {}
+        self.s3.put_object(
+            Bucket="uploads",
+            Key=upload.staged_name,
+            Body=content,
+            ContentType=upload.content_type,
+            **options,
+        )
+
+    def test_confirm(self):
+        upload = self.declare(PDF)
+        self.send(upload, PDF)
+        with mock.patch.object(self.s3, "get_object", wraps=self.s3.get_object) as get_object:
+            manual = confirm_upload(upload)
+        # Only the first bytes are read.
+        get_object.assert_called_once()
+        self.assertEqual(get_object.call_args.kwargs["Range"], "bytes=0-15")
+        self.assertTrue(manual.manual_file.name.startswith(BLOB_PREFIX))
+        self.assertEqual(self.s3_keys(), {manual.manual_file.name})
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertEqual(Blob.objects.get().name, manual.manual_file.name)
+
+    def test_content_of_another_type(self):
+        content = b"\x89PNG\r\n\x1a\n" + b"0" * 100
+        upload = self.declare(content)
+        self.send(upload, content)
+        with self.assertRaisesMessage(PresignedUploadError, "image/png"):
+            confirm_upload(upload)
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertEqual(self.s3_keys(), set())
+
+    def test_content_of_unknown_type(self):
+        content = b"MZ" + b"0" * 100
+        upload = self.declare(content)
+        self.send(upload, content)
+        with self.assertRaisesMessage(PresignedUploadError, "unknown"):
+            confirm_upload(upload)
+
+    def test_checksum_mismatch(self):
+        upload = self.declare(PDF)
+        self.send(upload, PDF[:-1] + b"1")
+        with self.assertRaisesMessage(PresignedUploadError, "SHA-256"):
+            confirm_upload(upload)
+        self.assertEqual(self.s3_keys(), set())
+
+    def test_checksum_not_stored_by_s3(self):
+        upload = self.declare(PDF)
+        self.send(upload, PDF, checksum=False)
+        # The content is never downloaded to compute the checksum.
+        with self.assertRaisesMessage(PresignedUploadError, "SHA-256"):
+            confirm_upload(upload)
+
+    def test_not_uploaded(self):
+        upload = self.declare(PDF)
+        with self.assertRaisesMessage(PresignedUploadError, "not been uploaded"):
+            confirm_upload(upload)
+        self.assertTrue(PendingUpload.objects.filter(pk=upload.pk).exists())
+
+
+MIB = 1024 * 1024
+
+
+class S3MultipartUploadHandlerTests(S3Mixin, TestCase):
+    """
+    The document uploads are streamed to S3 while the request body arrives.
+    """
+
+    def stream(self, content: bytes, field: str = "manual_file", chunk_size: int = 64 * 1024):
+        handler = S3MultipartUploadHandler()
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file(field, "manual.pdf", "application/pdf", len(content))
+        for start in range(0, len(content), chunk_size):
+            self.assertIsNone(handler.receive_data_chunk(content[start:start + chunk_size], start))
+            self.assertLess(len(handler.upload.buffer), handler.upload.part_size + chunk_size)
+        return handler, handler.file_complete(len(content))
+
+    def read(self, name: str) -> bytes:
+        return self.s3.get_object(Bucket="uploads", Key=name)["Body"].read()
+
+    def test_small_file_is_written_at_once(self):
+        with mock.patch.object(self.s3, "create_multipart_upload") as create_multipart_upload:
+            handler, file = self.stream(PDF)
+        create_multipart_upload.assert_not_called()
+        self.assertIsInstance(file, StagedUploadedFile)
+        self.assertTrue(file.staged_name.startswith(STAGING_PREFIX))
+        self.assertEqual(file.size, len(PDF))
+        self.assertEqual(file.content_hash, hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(self.read(handler.staged_name), PDF)
+
+    def test_large_file_is_written_in_parts(self):
+        content = os.urandom(11 * MIB)
+        handler, file = self.stream(content)
+        self.assertEqual(len(handler.upload.parts), 3)
+        self.assertEqual(file.content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(self.read(handler.staged_name), content)
+
+    def test_interrupted_upload_is_aborted(self):
+        handler = S3MultipartUploadHandler()
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file("manual_file", "manual.pdf", "application/pdf", 6 * MIB)
+        handler.receive_data_chunk(os.urandom(6 * MIB), 0)
+        uploads = self.s3.list_multipart_uploads(Bucket="uploads").get("Uploads", [])
+        self.assertEqual(len(uploads), 1)
+        handler.upload_interrupted()
+        self.assertFalse(self.s3.list_multipart_uploads(Bucket="uploads").get("Uploads"))
+        self.assertEqual(self.s3_keys(), set())
+
+    def test_other_fields_go_to_the_next_handlers(self):
+        handler = S3MultipartUploadHandler()
+        handler.new_file("photo", "photo.png", "image/png", 10)
+        self.assertEqual(handler.receive_data_chunk(b"data", 0), b"data")
+        self.assertIsNone(handler.file_complete(4))
+
+    def test_request_upload_is_promoted_to_a_blob(self):
+        request = RequestFactory().post(
+            "/", {"manual_file": SimpleUploadedFile("manual.pdf", PDF, "application/pdf")}
+        )
+        file = request.FILES["manual_file"]
+        self.assertIsInstance(file, StagedUploadedFile)
+        name = default_storage.save("manual.pdf", file)
+        self.assertTrue(name.startswith(BLOB_PREFIX))
+        # The staged file is moved with a server-side copy.
+        self.assertEqual(self.s3_keys(), {name})
+        self.assertEqual(self.read(name), PDF)
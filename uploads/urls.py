@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import DirectUploadViewSet
+
+router = DefaultRouter()
+router.register(r"uploads/direct", DirectUploadViewSet, basename="direct-upload")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
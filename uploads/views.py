@@ -0,0 +1,121 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from users.models import CustomUser
+
+from .models import PendingUpload
+from .presigned import (
+    PresignedUploadError,
+    confirm_upload,
+    create_download_url,
+    create_upload,
+    discard_upload,
+)
+from .serializers import (
+    DirectTransferSerializer,
+    DirectUploadRequestSerializer,
+    PendingUploadSerializer,
+)
+
+
+class DirectUploadViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    A viewset for transferring document files directly between the clients and S3,
+    without sending their content through the API.
+
+    Upload flow:
+        1. POST with the record, field and file declaration to get a presigned PUT URL.
+        2. PUT the file to that URL with the returned headers.
+        3. POST to 'confirm' to check the file and attach it to the record.
+
+    Downloads: GET 'download' with the record and field to get a presigned GET URL.
+    """
+
+    serializer_class = PendingUploadSerializer
+
+    def get_queryset(self):
+        """
+        Returns the pending uploads of the authenticated user.
+        """
+        return PendingUpload.objects.filter(user__user=self.request.user)
+
+    def create(self, request: Request):
+        """
+        Registers a direct upload and returns the presigned URL where the file must be sent.
+        """
+        serializer = DirectUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        account = get_object_or_404(CustomUser, user=request.user)
+        try:
+            upload, url, headers = create_upload(
+                account,
+                data["model"],
+                data["instance"].pk,
+                data["field"],
+                data["file_name"],
+                data["content_type"],
+                data["size"],
+                data["sha256"],
+            )
+        except PresignedUploadError as e:
+            raise ValidationError({"detail": str(e)}) from e
+        return Response(
+            {
+                **PendingUploadSerializer(upload).data,
+                "url": url,
+                "method": "PUT",
+                "headers": headers,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def destroy(self, request: Request, pk=None):
+        """
+        Cancels a pending upload and deletes the file sent, if any.
+        """
+        discard_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def confirm(self, request: Request, pk=None):
+        """
+        Checks the size, content type and SHA-256 of the uploaded file
+        and attaches it to its record.
+        """
+        upload = self.get_object()
+        try:
+            instance = confirm_upload(upload)
+        except PresignedUploadError as e:
+            raise ValidationError({"detail": str(e)}) from e
+        return Response(
+            {
+                "model": upload.model,
+                "object_id": upload.object_id,
+                "field": upload.field,
+                "name": getattr(instance, upload.field).name,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def download(self, request: Request):
+        """
+        Returns a presigned URL to download a file directly from the storage.
+        The record is given by the 'model', 'object_id' and 'field' query parameters.
+        """
+        serializer = DirectTransferSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            url = create_download_url(data["instance"], data["field"])
+        except PresignedUploadError as e:
+            raise ValidationError({"detail": str(e)}) from e
+        return Response({"url": url})
@@ -0,0 +1,84 @@
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_PREFIX = "users:token:"
+# The only fields of the user that are cached: its id and the flags checked
+# by the authentication and the permissions. Never the password hash.
+CACHED_USER_FIELDS = ("id", "is_active", "is_staff", "is_superuser")
+
+_local_tokens = TTLCache(
+    maxsize=settings.TOKEN_LOCAL_CACHE_SIZE, ttl=settings.TOKEN_LOCAL_CACHE_TIMEOUT
+)
+_local_tokens_lock = threading.Lock()
+
+
+def token_cache_key(key: str) -> str:
+    """
+    Returns the cache key that stores a token. The token itself is hashed,
+    so that the credentials are not exposed in the cache keys.
+    """
+    return f"{TOKEN_CACHE_PREFIX}{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_tokens(keys) -> None:
+    """
+    Removes the given tokens from the shared cache and from the local cache of this process.
+    The local caches of other processes expire after TOKEN_LOCAL_CACHE_TIMEOUT seconds.
+    """
+    cache_keys = [token_cache_key(key) for key in keys]
+    if not cache_keys:
+        return
+    cache.delete_many(cache_keys)
+    with _local_tokens_lock:
+        for cache_key in cache_keys:
+            _local_tokens.pop(cache_key, None)
+
+
+def load_token(key: str, user_fields: dict) -> Token:
+    """
+    Returns the token with its user built from the cached fields. The rest
+    of the fields of the user are deferred, so they are loaded from the
+    database only if something reads them.
+    """
+    user = User.from_db(DEFAULT_DB_ALIAS, list(user_fields), list(user_fields.values()))
+    token = Token(key=key, user_id=user.pk)
+    token.user = user
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the resolution of the tokens.
+
+    The user id and flags of each token are kept in a small in-process LRU cache
+    with a short TTL, backed by the shared cache (Redis), so the database is only
+    queried when a token is not found in either of them. The cached entries are
+    removed when a token is deleted or its user is modified or deactivated.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        with _local_tokens_lock:
+            user_fields = _local_tokens.get(cache_key)
+
+        if user_fields is None:
+            user_fields = cache.get(cache_key)
+            if user_fields is None:
+                # Raises AuthenticationFailed for unknown tokens and inactive users.
+                user, _ = super().authenticate_credentials(key)
+                user_fields = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+                cache.set(cache_key, user_fields, settings.TOKEN_CACHE_TIMEOUT)
+            with _local_tokens_lock:
+                _local_tokens[cache_key] = user_fields
+
+        # Each request receives its own instances, built from the cached fields.
+        token = load_token(key, user_fields)
+        return (token.user, token)
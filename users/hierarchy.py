@@ -0,0 +1,223 @@
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Set, Tuple
+from uuid import UUID
+
+from django.db import connection, transaction
+
+from .models import AccountClosure, CustomUser
+
+DESCENDANT_EDGES_SQL = """
+WITH RECURSIVE descendants(parent_id, child_id) AS (
+    SELECT {parent}, {child} FROM {table} WHERE {parent} = %s
+    UNION
+    SELECT edge.{parent}, edge.{child}
+    FROM {table} AS edge
+    INNER JOIN descendants ON edge.{parent} = descendants.child_id
+)
+SELECT parent_id, child_id FROM descendants
+"""
+
+# The accounts whose closure rows change with the parent accounts of the seeds:
+# the seeds themselves and every account below them.
+AFFECTED_CTE = """
+affected(account_id) AS (
+    SELECT {pk} FROM {accounts} WHERE {pk} IN ({seeds})
+    UNION
+    SELECT edge.{child}
+    FROM {table} AS edge
+    INNER JOIN affected ON edge.{parent} = affected.account_id
+)
+"""
+
+AFFECTED_SQL = """
+WITH RECURSIVE {affected}
+SELECT account_id FROM affected
+"""
+
+# Every link above the affected accounts, which is all their closure rows depend on.
+ANCESTOR_LINKS_SQL = """
+WITH RECURSIVE {affected},
+links(child_id, parent_id) AS (
+    SELECT edge.{child}, edge.{parent}
+    FROM {table} AS edge
+    INNER JOIN affected ON edge.{child} = affected.account_id
+    UNION
+    SELECT edge.{child}, edge.{parent}
+    FROM {table} AS edge
+    INNER JOIN links ON edge.{child} = links.parent_id
+)
+SELECT child_id, parent_id FROM links
+"""
+
+
+def get_descendant_edges(uuid) -> List[Tuple[UUID, UUID]]:
+    """
+    Returns every (parent, child) link below the given account in a single query.
+
+    The links are obtained with a recursive CTE over the `parent_accounts`
+    table. `UNION` discards the links already visited, so the query ends
+    even if the hierarchy contains cycles.
+
+    Args:
+        - uuid: The uuid of the root account.
+
+    Returns:
+        - list: The (parent uuid, child uuid) pairs of the descendant accounts.
+    """
+    field = CustomUser.parent_accounts.field
+    sql = DESCENDANT_EDGES_SQL.format(
+        table=connection.ops.quote_name(field.m2m_db_table()),
+        parent=connection.ops.quote_name(field.m2m_reverse_name()),
+        child=connection.ops.quote_name(field.m2m_column_name()),
+    )
+    pk = CustomUser._meta.pk
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [pk.get_db_prep_value(uuid, connection)])
+        rows = cursor.fetchall()
+    return [(pk.to_python(parent), pk.to_python(child)) for parent, child in rows]
+
+
+def get_account_tree(root: CustomUser) -> Dict[UUID, List[CustomUser]]:
+    """
+    Loads the descendants of an account and groups them by parent.
+
+    The accounts are loaded with their users, roles and parent accounts,
+    so serializing the whole tree does not make any further queries.
+
+    Args:
+        - root (CustomUser): The account at the top of the tree.
+
+    Returns:
+        - dict: A mapping parent uuid -> list of child accounts.
+    """
+    edges = get_descendant_edges(root.uuid)
+    uuids: Set[UUID] = {child for _, child in edges}
+    accounts = {
+        account.uuid: account
+        for account in CustomUser.objects.filter(uuid__in=uuids).with_related()
+    }
+
+    children: Dict[UUID, List[CustomUser]] = defaultdict(list)
+    for parent, child in edges:
+        if child in accounts:
+            children[parent].append(accounts[child])
+    return children
+
+
+def _get_parents() -> Dict[UUID, Set[UUID]]:
+    """Returns a mapping child uuid -> parent uuids with every link of the hierarchy."""
+    parents: Dict[UUID, Set[UUID]] = defaultdict(set)
+    links = CustomUser.parent_accounts.through.objects.values_list(
+        "from_customuser_id", "to_customuser_id"
+    )
+    for child, parent in links:
+        parents[child].add(parent)
+    return parents
+
+
+def _get_affected(uuids: Set[UUID]) -> Tuple[Set[UUID], Dict[UUID, Set[UUID]]]:
+    """
+    Returns the given accounts with every account below them, and a mapping
+    child uuid -> parent uuids with only the links above those accounts.
+
+    Both are read with recursive CTEs over the `parent_accounts` table, so
+    the rest of the hierarchy is never loaded.
+    """
+    field = CustomUser.parent_accounts.field
+    pk = CustomUser._meta.pk
+    quote = connection.ops.quote_name
+    affected_cte = AFFECTED_CTE.format(
+        accounts=quote(CustomUser._meta.db_table),
+        pk=quote(pk.column),
+        seeds=", ".join(["%s"] * len(uuids)),
+        table=quote(field.m2m_db_table()),
+        parent=quote(field.m2m_reverse_name()),
+        child=quote(field.m2m_column_name()),
+    )
+    params = [pk.get_db_prep_value(uuid, connection) for uuid in uuids]
+    with connection.cursor() as cursor:
+        cursor.execute(AFFECTED_SQL.format(affected=affected_cte), params)
+        affected = {pk.to_python(account) for account, in cursor.fetchall()}
+        cursor.execute(
+            ANCESTOR_LINKS_SQL.format(
+                affected=affected_cte,
+                table=quote(field.m2m_db_table()),
+                parent=quote(field.m2m_reverse_name()),
+                child=quote(field.m2m_column_name()),
+            ),
+            params,
+        )
+        links = cursor.fetchall()
+
+    parents: Dict[UUID, Set[UUID]] = defaultdict(set)
+    for child, parent in links:
+        parents[pk.to_python(child)].add(pk.to_python(parent))
+    return affected, parents
+
+
+def get_closure_rows(
+    parents: Dict[UUID, Set[UUID]], descendants: Iterable[UUID]
+) -> List[AccountClosure]:
+    """
+    Computes the closure rows of the given accounts by walking up the hierarchy.
+
+    Each ancestor is reached through its shortest path (breadth-first search)
+    and visited only once, so cycles do not produce infinite loops.
+
+    Args:
+        - parents (dict): A mapping child uuid -> parent uuids.
+        - descendants (Iterable[UUID]): The accounts whose ancestors are computed.
+
+    Returns:
+        - list: Unsaved AccountClosure instances.
+    """
+    rows = []
+    for descendant in descendants:
+        visited = {descendant}
+        queue = deque((parent, 1) for parent in parents.get(descendant, ()))
+        while queue:
+            ancestor, depth = queue.popleft()
+            if ancestor in visited:
+                continue
+            visited.add(ancestor)
+            rows.append(
+                AccountClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth)
+            )
+            queue.extend((parent, depth + 1) for parent in parents.get(ancestor, ()))
+    return rows
+
+
+def refresh_closure(uuids: Iterable[UUID]) -> None:
+    """
+    Recomputes the closure rows of the given accounts and of every account below them.
+    It must be called after the parent accounts of those accounts change, and
+    only reads the part of the hierarchy above and below them.
+
+    Args:
+        - uuids (Iterable[UUID]): The accounts whose parent accounts changed.
+    """
+    uuids = set(uuids)
+    if not uuids:
+        return
+    affected, parents = _get_affected(uuids)
+
+    with transaction.atomic():
+        AccountClosure.objects.filter(descendant_id__in=affected).delete()
+        AccountClosure.objects.bulk_create(
+            get_closure_rows(parents, affected), batch_size=1000
+        )
+
+
+def rebuild_closure() -> int:
+    """
+    Rebuilds the whole closure table from the parent accounts.
+
+    Returns:
+        - int: The number of rows created.
+    """
+    parents = _get_parents()
+    rows = get_closure_rows(parents, list(parents))
+    with transaction.atomic():
+        AccountClosure.objects.all().delete()
+        AccountClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,236 @@
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework import serializers
+
+from .models import CustomUser, EducationLevel, MaritalStatus, PhoneNumber, Role, Roles
+
+IMPORT_CHUNK_SIZE = 500
+# Below this number of passwords, hashing them inline is faster than starting a pool.
+MIN_PARALLEL_PASSWORDS = 32
+LIST_SEPARATOR = ";"
+
+
+class SeparatedListField(serializers.ListField):
+    """
+    ListField that also accepts the values as a single string separated by ';',
+    which is how lists are written in the CSV files.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [value.strip() for value in data.split(LIST_SEPARATOR) if value.strip()]
+        return super().to_internal_value(data)
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    """
+    Validates a row of a user import file.
+    """
+
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    id_card = serializers.CharField(max_length=13, required=False, allow_blank=True)
+    birth_date = serializers.DateField(required=False, allow_null=True)
+    marital_status = serializers.ChoiceField(
+        choices=MaritalStatus.choices, default=MaritalStatus.SINGLE
+    )
+    education_level = serializers.ChoiceField(
+        choices=EducationLevel.choices, default=EducationLevel.PRIMARY
+    )
+    home_address = serializers.CharField(max_length=256, required=False, allow_blank=True)
+    roles = SeparatedListField(
+        child=serializers.ChoiceField(choices=Roles.choices), required=False, default=list
+    )
+    phone_numbers = SeparatedListField(
+        child=PhoneNumberField(), required=False, default=list
+    )
+
+    def to_internal_value(self, data):
+        # Empty CSV cells are treated as missing values.
+        if isinstance(data, dict):
+            data = {key: value for key, value in data.items() if value not in ("", None)}
+        return super().to_internal_value(data)
+
+
+def read_rows(file, file_format: str) -> List[dict]:
+    """
+    Reads the rows of a user import file.
+
+    Args:
+        - file: A binary file object with the content.
+        - file_format (str): 'csv' or 'json'. JSON files must contain a list of objects.
+
+    Returns:
+        - list: The rows as dictionaries.
+
+    Raises:
+        - ValueError: If the format is unknown or the content cannot be read.
+    """
+    if file_format == "csv":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            return list(csv.DictReader(text))
+        finally:
+            text.detach()
+    if file_format == "json":
+        rows = json.load(file)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("The JSON file must contain a list of objects.")
+        return rows
+    raise ValueError(f"Unknown file format: {file_format}")
+
+
+def hash_passwords(passwords: List[str], workers: int = 1) -> List[str]:
+    """
+    Hashes the passwords with the configured hasher. PBKDF2 is deliberately slow,
+    so large batches can be spread across a pool of `workers` processes. The pool
+    is only meant for the import_users command: a request must not fork processes.
+    """
+    if workers <= 1 or len(passwords) < MIN_PARALLEL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(make_password, passwords, chunksize=16))
+
+
+class UserImporter:
+    """
+    Creates users in bulk from the rows of an import file.
+
+    Every row is validated first and invalid rows are reported without stopping
+    the import. The passwords of the valid rows are hashed by `workers`
+    processes (inline by default, as in the requests) and the users, their roles and their phone numbers are inserted with `bulk_create`
+    in chunks. If a chunk fails (for example because a username was taken in the
+    meantime), its rows are inserted one by one to find the failing ones.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.errors: List[dict] = []
+        self.created = 0
+
+    def add_error(self, row: int, errors):
+        """Registers the errors of a row (numbered from 1)."""
+        self.errors.append({"row": row, "errors": errors})
+
+    def validate(self, rows: List[dict]) -> List[tuple]:
+        """Returns the (row number, validated data) pairs of the valid rows."""
+        valid = []
+        usernames = set()
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                self.add_error(number, {"non_field_errors": ["Expected an object."]})
+                continue
+            serializer = UserImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                self.add_error(number, serializer.errors)
+                continue
+            username = serializer.validated_data["username"]
+            if username in usernames:
+                self.add_error(number, {"username": ["Duplicated in the file."]})
+                continue
+            usernames.add(username)
+            valid.append((number, serializer.validated_data))
+
+        existing = set(
+            User.objects.filter(username__in=usernames).values_list("username", flat=True)
+        )
+        available = []
+        for number, data in valid:
+            if data["username"] in existing:
+                self.add_error(number, {"username": ["A user with that username already exists."]})
+            else:
+                available.append((number, data))
+        return available
+
+    def insert(self, chunk: List[tuple], role_ids: Dict[str, int]):
+        """Inserts the users of a chunk and their related rows in a single transaction."""
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [
+                    User(
+                        username=data["username"],
+                        email=data["email"],
+                        password=data["password"],
+                        first_name=data.get("first_name", ""),
+                        last_name=data.get("last_name", ""),
+                    )
+                    for _, data in chunk
+                ]
+            )
+            custom_users = CustomUser.objects.bulk_create(
+                [
+                    CustomUser(
+                        user=user,
+                        id_card=data.get("id_card", ""),
+                        birth_date=data.get("birth_date"),
+                        marital_status=data["marital_status"],
+                        education_level=data["education_level"],
+                        home_address=data.get("home_address"),
+                    )
+                    for user, (_, data) in zip(users, chunk)
+                ]
+            )
+            CustomUser.roles.through.objects.bulk_create(
+                [
+                    CustomUser.roles.through(customuser=custom_user, role_id=role_ids[role])
+                    for custom_user, (_, data) in zip(custom_users, chunk)
+                    for role in set(data["roles"])
+                ]
+            )
+            PhoneNumber.objects.bulk_create(
+                [
+                    PhoneNumber(user=custom_user, phone_number=phone_number)
+                    for custom_user, (_, data) in zip(custom_users, chunk)
+                    for phone_number in data["phone_numbers"]
+                ]
+            )
+        self.created += len(chunk)
+
+    def run(self, rows: List[dict]) -> dict:
+        """
+        Imports the rows and returns a report with the number of users created
+        and the errors of the rows that could not be imported.
+        """
+        valid = self.validate(rows)
+
+        role_ids = dict(Role.objects.values_list("name", "id"))
+        importable = []
+        for number, data in valid:
+            missing = [role for role in data["roles"] if role not in role_ids]
+            if missing:
+                self.add_error(number, {"roles": [f"Roles not registered: {', '.join(missing)}"]})
+            else:
+                importable.append((number, data))
+
+        hashes = hash_passwords([data["password"] for _, data in importable], self.workers)
+        for (_, data), password in zip(importable, hashes):
+            data["password"] = password
+
+        for start in range(0, len(importable), self.chunk_size):
+            chunk = importable[start:start + self.chunk_size]
+            try:
+                self.insert(chunk, role_ids)
+            except IntegrityError:
+                for row in chunk:
+                    try:
+                        self.insert([row], role_ids)
+                    except IntegrityError as e:
+                        self.add_error(row[0], {"non_field_errors": [str(e)]})
+
+        return {
+            "total": len(rows),
+            "created": self.created,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
@@ -0,0 +1,46 @@
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.imports import UserImporter, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Creates users in bulk from a CSV or JSON file.
+    The rows that cannot be imported are reported at the end.
+    """
+
+    help = "Creates users in bulk from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or JSON file.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="Format of the file. By default it is taken from the file extension.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes used to hash the passwords. All the CPUs by default.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            with path.open("rb") as file:
+                rows = read_rows(file, file_format)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(str(e)) from e
+
+        report = UserImporter(workers=options["workers"]).run(rows)
+        for error in report["errors"]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(f"{report['created']} of {report['total']} users created.")
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the closure table of the account hierarchy (AccountClosure)
+    from the parent accounts of every user.
+    """
+
+    help = "Rebuilds the closure table of the account hierarchy."
+
+    def handle(self, *args, **options):
+        rows = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Account closure rebuilt: {rows} rows."))
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict, deque
+
+
+def build_account_closure(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    AccountClosure = apps.get_model('users', 'AccountClosure')
+    parents = defaultdict(set)
+    links = CustomUser.parent_accounts.through.objects.values_list(
+        'from_customuser_id', 'to_customuser_id'
+    )
+    for child, parent in links:
+        parents[child].add(parent)
+
+    rows = []
+    for descendant in list(parents):
+        visited = {descendant}
+        queue = deque((parent, 1) for parent in parents[descendant])
+        while queue:
+            ancestor, depth = queue.popleft()
+            if ancestor in visited:
+                continue
+            visited.add(ancestor)
+            rows.append(AccountClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth))
+            queue.extend((parent, depth + 1) for parent in parents.get(ancestor, ()))
+    AccountClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_alter_customuser_photo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Number of levels between the ancestor and the descendant.')),
+                ('ancestor', models.ForeignKey(help_text='Account placed above the descendant.', on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='users.customuser')),
+                ('descendant', models.ForeignKey(help_text='Account placed below the ancestor.', on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='users.customuser')),
+            ],
+            options={
+                'verbose_name': 'Account closure',
+                'verbose_name_plural': 'Account closures',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='account_closure_desc_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_account_closure'),
+        ),
+        migrations.RunPython(build_account_closure, migrations.RunPython.noop),
+    ]
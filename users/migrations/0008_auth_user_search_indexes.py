@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-19 12:56
+
+from django.db import migrations
+
+# The user directory searches with icontains, which PostgreSQL runs as
+# UPPER(column) LIKE UPPER(%term%). Trigram indexes on those expressions
+# let it use an index scan instead of reading the whole auth_user table.
+SEARCH_INDEXES = {
+    'users_auth_user_email_trgm': 'email',
+    'users_auth_user_username_trgm': 'username',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON auth_user '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0007_accountclosure'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
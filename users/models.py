@@ -79,6 +79,39 @@ class EducationLevel(models.TextChoices):
     UNIVERSITY = "University"
 
 
+class CustomUserQuerySet(models.QuerySet):
+    """
+    QuerySet for the CustomUser model with helpers to scope
+    accounts using the account hierarchy (AccountClosure).
+    """
+
+    def descendants_of(self, uuid):
+        """Returns every account below the given account, at any depth."""
+        return self.filter(ancestor_links__ancestor_id=uuid)
+
+    def ancestors_of(self, uuid):
+        """Returns every account above the given account, at any depth."""
+        return self.filter(descendant_links__descendant_id=uuid)
+
+    def managed_by(self, user):
+        """Returns the account of the given user and every account below it."""
+        below = AccountClosure.objects.filter(ancestor__user=user).values("descendant")
+        return self.filter(models.Q(user=user) | models.Q(pk__in=below))
+
+    def with_related(self):
+        """
+        Loads the user, roles and parent accounts (with their users) of the accounts,
+        which is everything CustomUserSerializer reads, in a fixed number of queries.
+        """
+        return self.select_related("user").prefetch_related(
+            "roles",
+            models.Prefetch(
+                "parent_accounts",
+                queryset=self.model.objects.select_related("user"),
+            ),
+        )
+
+
 class CustomUser(models.Model):
     """
     Custom user model that extends the base User model and adds additional fields.
@@ -117,10 +150,56 @@ class CustomUser(models.Model):
         upload_to=path_and_rename, null=True, blank=True, help_text=_("User's photo")
     )
 
+    objects = CustomUserQuerySet.as_manager()
+
     def __str__(self) -> str:
         return f"{self.user}"
 
 
+class AccountClosure(models.Model):
+    """
+    Closure table of the account hierarchy defined by `CustomUser.parent_accounts`.
+
+    There is a row for every (ancestor, descendant) pair, with the length of the
+    shortest path between them, so the accounts below or above an account can be
+    obtained with a single indexed join. The rows are maintained when
+    `parent_accounts` changes and can be rebuilt with `rebuild_account_closure`.
+    """
+
+    ancestor = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        help_text=_("Account placed above the descendant."),
+    )
+    descendant = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+        help_text=_("Account placed below the ancestor."),
+    )
+    depth = models.PositiveIntegerField(
+        help_text=_("Number of levels between the ancestor and the descendant.")
+    )
+
+    class Meta:
+        verbose_name = _("Account closure")
+        verbose_name_plural = _("Account closures")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="unique_account_closure"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["descendant", "ancestor"], name="account_closure_desc_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
 class PhoneNumber(models.Model):
     """
     Model to represent a user's phone numbers.
@@ -1,35 +1,45 @@
 from rest_framework import permissions
 
+from .models import Roles
+from .roles import has_any_role
 
-class IsAdminUser(permissions.BasePermission):
+
+class HasAnyRole(permissions.BasePermission):
     """
-    Custom permission class that checks if the
-    authenticated user is an Admin or Superuser.
+    Base permission class that checks if the authenticated
+    user has at least one of the roles listed in `required_roles`.
 
-    This class inherits from the BasePermission class
-    provided by Django Rest Framework.
-    It overrides the `has_permission` method to check
-    if the authenticated user has either
-    the "Admin" or "Superuser" role.
+    The roles are resolved through `users.roles.get_role_names`, which loads
+    them once per request and caches them between requests, so subclasses
+    only need to declare the roles they accept.
     """
 
+    required_roles = ()
+
     def has_permission(self, request, view):
         """
         Overridden method from BasePermission class.
 
-        This method checks if the authenticated user
-        has either the "Admin" or "Superuser" role.
-        It returns True if the user has one of these roles,
-        and False otherwise.
-
         Parameters:
         - request: The current request instance.
         - view: The view that this permission is being checked against.
 
         Returns:
-        - bool: True if the user has the "Admin" or "Superuser" role, False otherwise.
+        - bool: True if the user has one of the required roles, False otherwise.
         """
-        return request.user.is_authenticated and (
-            request.user.customuser.roles.filter(name="Admin").exists()
-            or request.user.customuser.roles.filter(name="Superuser").exists()
+        return request.user.is_authenticated and has_any_role(
+            request.user, self.required_roles
         )
+
+
+class IsAdminUser(HasAnyRole):
+    """
+    Custom permission class that checks if the
+    authenticated user is an Admin or Superuser.
+
+    This class inherits from the HasAnyRole class,
+    which checks the cached roles of the authenticated user
+    against the "Admin" and "Superuser" roles.
+    """
+
+    required_roles = (Roles.ADMIN, Roles.SUPERUSER)
@@ -0,0 +1,66 @@
+from typing import FrozenSet, Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Role
+
+ROLES_CACHE_PREFIX = "users:roles:"
+ROLES_CACHE_TIMEOUT = 60 * 60
+
+
+def roles_cache_key(user_id: int) -> str:
+    """Returns the cache key that stores the role names of a user."""
+    return f"{ROLES_CACHE_PREFIX}{user_id}"
+
+
+def invalidate_roles(user_ids: Iterable[int]) -> None:
+    """
+    Removes the cached role names of the given users once the current
+    transaction commits. Removed earlier, a concurrent request could cache
+    the roles that are not committed yet again.
+    """
+    keys = [roles_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_role_names(user) -> FrozenSet[str]:
+    """
+    Returns the names of the roles of an authenticated user.
+
+    The names are resolved once per request (they are kept on the user instance,
+    which lives as long as the request) and shared between requests through the
+    cache, so checking roles does not query the database on every request.
+
+    Args:
+        - user: The Django user, usually `request.user`.
+
+    Returns:
+        - frozenset: The names of the user's roles. It is empty for anonymous users
+            or users without a CustomUser.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    role_names = getattr(user, "_role_names", None)
+    if role_names is not None:
+        return role_names
+
+    key = roles_cache_key(user.pk)
+    role_names = cache.get(key)
+    if role_names is None:
+        role_names = frozenset(
+            Role.objects.filter(customuser__user_id=user.pk).values_list(
+                "name", flat=True
+            )
+        )
+        cache.set(key, role_names, ROLES_CACHE_TIMEOUT)
+
+    user._role_names = role_names
+    return role_names
+
+
+def has_any_role(user, roles: Iterable[str]) -> bool:
+    """Returns True if the user has at least one of the given roles."""
+    return not get_role_names(user).isdisjoint(str(role) for role in roles)
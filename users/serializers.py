@@ -3,6 +3,8 @@ from django.contrib.auth import password_validation
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
+from uploads.serializers import ImageVariantsField
 from .models import CustomUser, PhoneNumber
 
 
@@ -99,7 +101,7 @@ class ChangePasswordSerializer(serializers.Serializer):
         """
         raise NotImplementedError("Create operation is not allowed.")
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for the CustomUser model. Includes all fields except
     for 'uuid', 'is_staff', and 'is_active', which are read-only.
@@ -112,6 +114,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
     is_active = serializers.SerializerMethodField()
     roles = serializers.StringRelatedField(many=True)
     parent_accounts = serializers.StringRelatedField(many=True)
+    photo_variants = ImageVariantsField(source="photo")
 
     class Meta:
         model = CustomUser
@@ -130,6 +133,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
             "education_level",
             "home_address",
             "photo",
+            "photo_variants",
         )
         read_only_fields = ("uuid", "is_staff", "is_active")
 
@@ -171,10 +175,28 @@ class CustomUserTreeSerializer(CustomUserSerializer):
         fields = CustomUserSerializer.Meta.fields + ('child_accounts',)
 
     def get_child_accounts(self, obj):
-        return CustomUserTreeSerializer(obj.child_accounts.all(), many=True).data
+        """
+        Returns the child accounts of the account. When the view provides the
+        preloaded tree in the 'children' context, it is used instead of querying
+        the database, and the accounts already present in the current branch
+        are skipped to protect against cycles.
+        """
+        children = self.context.get("children")
+        if children is None:
+            return CustomUserTreeSerializer(obj.child_accounts.all(), many=True).data
+
+        ancestors = self.context.get("ancestors", frozenset()) | {obj.uuid}
+        child_accounts = [
+            child for child in children.get(obj.uuid, []) if child.uuid not in ancestors
+        ]
+        return CustomUserTreeSerializer(
+            child_accounts,
+            many=True,
+            context={**self.context, "ancestors": ancestors},
+        ).data
 
 
-class PhoneNumberSerializer(serializers.ModelSerializer):
+class PhoneNumberSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = PhoneNumber
         fields = ['phone_number',]
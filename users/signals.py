@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .hierarchy import refresh_closure
+from .models import CustomUser, Role
+from .roles import invalidate_roles
+
+
+@receiver(m2m_changed, sender=CustomUser.parent_accounts.through)
+def update_account_closure(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the account closure table up to date when parent accounts change.
+    The changed accounts are the instance itself, or the accounts in pk_set
+    when the relation is changed from the parent side (child_accounts).
+    """
+    if action == "pre_clear" and reverse:
+        instance._cleared_child_accounts = set(
+            instance.child_accounts.values_list("uuid", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        refresh_closure(pk_set if reverse else {instance.pk})
+    elif action == "post_clear":
+        refresh_closure(
+            getattr(instance, "_cleared_child_accounts", set()) if reverse else {instance.pk}
+        )
+
+
+@receiver(pre_delete, sender=CustomUser)
+def collect_deleted_account_children(sender, instance: CustomUser, **kwargs):
+    """Remembers the child accounts of an account that is about to be deleted."""
+    instance._deleted_child_accounts = set(
+        instance.child_accounts.values_list("uuid", flat=True)
+    )
+
+
+@receiver(post_delete, sender=CustomUser)
+def update_deleted_account_closure(sender, instance: CustomUser, **kwargs):
+    """
+    Recomputes the closure rows of the former child accounts of a deleted account.
+    Its own rows and its links are removed by the cascade, which sends no
+    m2m_changed, so the accounts below it would keep its ancestors.
+    """
+    refresh_closure(getattr(instance, "_deleted_child_accounts", set()))
+
+
+@receiver(m2m_changed, sender=CustomUser.roles.through)
+def invalidate_changed_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidates the cached roles of the users whose roles changed.
+    When the relation is changed from the role side, the users are in pk_set.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_roles([instance.user_id])
+        return
+
+    if action == "pre_clear":
+        instance._cleared_role_users = list(
+            instance.customuser_set.values_list("user_id", flat=True)
+        )
+    elif action == "post_clear":
+        invalidate_roles(getattr(instance, "_cleared_role_users", []))
+    elif action in ("post_add", "post_remove"):
+        invalidate_roles(
+            CustomUser.objects.filter(pk__in=pk_set).values_list("user_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def invalidate_role_users(sender, instance: Role, **kwargs):
+    """Invalidates the cached roles of the users of a renamed or deleted role."""
+    if instance.pk is not None:
+        invalidate_roles(instance.customuser_set.values_list("user_id", flat=True))
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_account_roles(sender, instance: CustomUser, **kwargs):
+    """
+    Invalidates the cached roles of the user of a deleted account.
+    Its role links are removed by the cascade, which sends no m2m_changed.
+    """
+    invalidate_roles([instance.user_id])
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance: Token, **kwargs):
+    """Removes a deleted token from the authentication cache."""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance: User, created: bool, **kwargs):
+    """
+    Removes the tokens of a modified user from the authentication cache,
+    so that deactivations and changes are applied on the next request.
+    """
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list("key", flat=True))
@@ -1,3 +1,283 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from wt_iopgps.testing import create_account
+
+from .authentication import (
+    CACHED_USER_FIELDS,
+    CachedTokenAuthentication,
+    _local_tokens,
+    token_cache_key,
+)
+from .hierarchy import get_descendant_edges, rebuild_closure
+from .imports import MIN_PARALLEL_PASSWORDS, UserImporter, hash_passwords
+from .models import AccountClosure, CustomUser, Role, Roles
+from .roles import get_role_names, roles_cache_key
+
+
+def closure_rows():
+    """Returns the closure table as a set of (ancestor, descendant, depth)."""
+    return set(AccountClosure.objects.values_list("ancestor", "descendant", "depth"))
+
+
+class AccountClosureTests(TestCase):
+    """
+    The closure table follows the changes of the account hierarchy.
+    """
+
+    def setUp(self):
+        self.root = create_account("root")
+        self.middle = create_account("middle")
+        self.leaf = create_account("leaf")
+        self.middle.parent_accounts.add(self.root)
+        self.leaf.parent_accounts.add(self.middle)
+
+    def assertDescendants(self, account, expected):
+        self.assertQuerysetEqual(
+            CustomUser.objects.descendants_of(account.uuid),
+            [expected_account.uuid for expected_account in expected],
+            transform=lambda descendant: descendant.uuid,
+            ordered=False,
+        )
+
+    def test_links_are_followed_at_any_depth(self):
+        self.assertDescendants(self.root, [self.middle, self.leaf])
+        self.assertEqual(
+            AccountClosure.objects.get(ancestor=self.root, descendant=self.leaf).depth, 2
+        )
+
+    def test_moved_account_takes_its_descendants(self):
+        other = create_account("other")
+        child = create_account("child")
+        child.parent_accounts.add(self.leaf)
+        self.leaf.parent_accounts.remove(self.middle)
+        other.child_accounts.add(self.leaf)
+        self.assertDescendants(self.root, [self.middle])
+        self.assertDescendants(other, [self.leaf, child])
+
+    def test_cleared_child_accounts(self):
+        self.root.child_accounts.clear()
+        self.assertDescendants(self.root, [])
+        self.assertDescendants(self.middle, [self.leaf])
+
+    def test_deleted_account_is_removed_from_the_hierarchy(self):
+        self.middle.delete()
+        self.assertDescendants(self.root, [])
+        self.assertFalse(AccountClosure.objects.filter(descendant=self.leaf).exists())
+
+    def test_deleted_user_is_removed_from_the_hierarchy(self):
+        self.middle.user.delete()
+        self.assertDescendants(self.root, [])
+
+    def test_deleted_account_keeps_other_paths(self):
+        self.leaf.parent_accounts.add(self.root)
+        self.middle.delete()
+        self.assertDescendants(self.root, [self.leaf])
+        self.assertEqual(
+            AccountClosure.objects.get(ancestor=self.root, descendant=self.leaf).depth, 1
+        )
+
+    def test_cycles_end(self):
+        self.root.parent_accounts.add(self.leaf)
+        self.assertDescendants(self.leaf, [self.root, self.middle])
+        self.assertDescendants(self.root, [self.middle, self.leaf])
+
+    def test_refresh_matches_rebuild(self):
+        other = create_account("other")
+        self.leaf.parent_accounts.add(other)
+        other.parent_accounts.add(self.root)
+        self.middle.delete()
+        refreshed = closure_rows()
+        rebuild_closure()
+        self.assertEqual(refreshed, closure_rows())
+
+
+class AccountTreeQueryTests(TestCase):
+    """
+    The tree of an account is loaded with the same queries for any number of accounts.
+    """
+
+    def setUp(self):
+        self.accounts = [create_account("root")]
+        self.client = APIClient()
+        self.client.force_authenticate(self.accounts[0].user)
+        self.url = f"/api/v1/users/{self.accounts[0].uuid}/tree/accounts/{self.accounts[0].uuid}/"
+
+    def grow(self, size: int):
+        """Adds accounts until there are `size`, each one the child of the (n - 1) // 3th."""
+        start = len(self.accounts)
+        users = User.objects.bulk_create(
+            User(username=f"account{number}", password="!") for number in range(start, size)
+        )
+        accounts = CustomUser.objects.bulk_create(
+            CustomUser(user=user, photo=f"blobs/{user.username}.png") for user in users
+        )
+        self.accounts.extend(accounts)
+        Link = CustomUser.parent_accounts.through
+        Link.objects.bulk_create(
+            Link(
+                from_customuser=self.accounts[number],
+                to_customuser=self.accounts[(number - 1) // 3],
+            )
+            for number in range(start, size)
+        )
+
+    def count_tree_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def count_accounts(self, node: dict) -> int:
+        return 1 + sum(self.count_accounts(child) for child in node["child_accounts"])
+
+    def test_thousand_accounts(self):
+        self.grow(10)
+        queries = self.count_tree_queries()
+
+        self.grow(1000)
+        with self.assertNumQueries(1):
+            edges = get_descendant_edges(self.accounts[0].uuid)
+        self.assertEqual(len(edges), 999)
+        with self.assertNumQueries(queries):
+            response = self.client.get(self.url)
+        self.assertEqual(self.count_accounts(response.json()), 1000)
+
+
+class UserImportTests(TestCase):
+    """
+    The valid rows are imported and the others reported, whatever they contain.
+    """
+
+    def row(self, number: int, **kwargs) -> dict:
+        return {
+            "username": f"imported{number}",
+            "email": f"imported{number}@example.com",
+            "password": "secret",
+            **kwargs,
+        }
+
+    def test_rows_that_are_not_objects(self):
+        importer = UserImporter()
+        self.assertEqual(importer.validate([1, "x"]), [])
+        self.assertEqual(
+            importer.errors,
+            [
+                {"row": 1, "errors": {"non_field_errors": ["Expected an object."]}},
+                {"row": 2, "errors": {"non_field_errors": ["Expected an object."]}},
+            ],
+        )
+
+    def test_invalid_rows_are_reported(self):
+        report = UserImporter().run(
+            [self.row(1), [], self.row(2, email="invalid"), self.row(1), self.row(3)]
+        )
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3, 4])
+        self.assertTrue(User.objects.get(username="imported1").check_password("secret"))
+
+    def test_requests_hash_the_passwords_inline(self):
+        admin = create_account("admin")
+        admin.roles.add(Role.objects.create(name=Roles.ADMIN))
+        client = APIClient()
+        client.force_authenticate(admin.user)
+        rows = [self.row(number) for number in range(MIN_PARALLEL_PASSWORDS + 1)]
+        with mock.patch("users.imports.ProcessPoolExecutor") as executor:
+            response = client.post("/api/v1/users/bulk_import/", rows + [1], format="json")
+        executor.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], len(rows))
+        self.assertEqual(response.json()["errors"][0]["row"], len(rows) + 1)
+
+    def test_pool_is_used_with_several_workers(self):
+        passwords = ["secret"] * MIN_PARALLEL_PASSWORDS
+        with mock.patch("users.imports.ProcessPoolExecutor") as executor:
+            executor.return_value.__enter__.return_value.map.return_value = passwords
+            hash_passwords(passwords, workers=2)
+        executor.assert_called_once_with(max_workers=2)
+
+
+class TokenAuthenticationTests(TestCase):
+    """
+    The cached tokens hold only the user id and flags, never the password.
+    """
+
+    def setUp(self):
+        cache.clear()
+        _local_tokens.clear()
+        self.addCleanup(_local_tokens.clear)
+        self.user = User.objects.create_user("driver", "driver@example.com", "password")
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def test_cached_fields(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        cached = cache.get(token_cache_key(self.token.key))
+        self.assertEqual(set(cached), set(CACHED_USER_FIELDS))
+        self.assertEqual(cached["id"], self.user.pk)
+        self.assertNotIn(self.user.password, str(cached))
+
+    def test_cached_token_makes_no_queries(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        _local_tokens.clear()
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual((user.pk, token.user_id), (self.user.pk, self.user.pk))
+        self.assertEqual(token.key, self.token.key)
+        self.assertTrue(user.is_authenticated)
+        # The rest of the fields are loaded when read.
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "driver")
+
+    def test_deactivated_user_is_rejected(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_deleted_token_is_rejected(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+
+class RoleCacheTests(TestCase):
+    """
+    The cached roles of a user are invalidated when the changes are committed.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.account = create_account("driver")
+        self.admin = Role.objects.create(name=Roles.ADMIN)
+        self.key = roles_cache_key(self.account.user_id)
+
+    def cached_roles(self):
+        return get_role_names(User.objects.get(pk=self.account.user_id))
+
+    def test_invalidated_on_commit(self):
+        self.assertEqual(self.cached_roles(), frozenset())
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.account.roles.add(self.admin)
+        self.assertEqual(cache.get(self.key), frozenset())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.cached_roles(), {Roles.ADMIN})
 
-# Create your tests here.
+    def test_deleted_account(self):
+        self.account.roles.add(self.admin)
+        self.assertEqual(self.cached_roles(), {Roles.ADMIN})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.delete()
+        self.assertIsNone(cache.get(self.key))
@@ -4,10 +4,12 @@ from .views import (
     CustomUserViewSet,
     ChangePasswordViewSet,
     CustomUserTreeViewSet,
-    PhoneNumberViewSet
+    PhoneNumberViewSet,
+    UserDirectoryViewSet,
 )
 
 router = DefaultRouter()
+router.register(r"users/directory", UserDirectoryViewSet, basename="user-directory")
 router.register(r"users", CustomUserViewSet, basename="users")
 router.register(r"change-password", ChangePasswordViewSet)
 
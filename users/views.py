@@ -1,10 +1,17 @@
 from django.contrib.auth.models import User
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins, filters, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.permissions import IsAuthenticated
 
+from uploads.images import get_recorded_variants
+from wt_iopgps.sparse_fields import SparseFieldsetsFilter
+
+from .hierarchy import get_account_tree
+from .imports import UserImporter, read_rows
 from .permissions import IsAdminUser
 from .models import CustomUser, PhoneNumber, Role
 from .serializers import (
@@ -23,7 +30,7 @@ class CustomUserViewSet(viewsets.ModelViewSet):
     """
 
     serializer_class = CustomUserSerializer
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, SparseFieldsetsFilter]
     search_fields = ["user__email", "user__username"]
 
     def get_queryset(self):
@@ -33,13 +40,13 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         the authenticated user will be filtered.
         """
         user = self.request.user
-        return CustomUser.objects.filter(user=user)
+        return CustomUser.objects.filter(user=user).with_related()
 
     def get_permissions(self):
         """
         Instantiates and returns the list of permissions that this view requires.
         """
-        if self.action == 'create':
+        if self.action in ('create', 'bulk_import'):
             permission_classes = [IsAdminUser, IsAuthenticated]
         else:
             permission_classes = [IsAuthenticated]
@@ -118,6 +125,31 @@ class CustomUserViewSet(viewsets.ModelViewSet):
 
         return Response({"status": "user updated"}, status=status.HTTP_202_ACCEPTED)
 
+    @action(detail=False, methods=["post"])
+    def bulk_import(self, request, *args, **kwargs):
+        """
+        Creates users in bulk. The users can be sent as a CSV or JSON 'file'
+        or as a JSON list in the body of the request. The rows that cannot be
+        imported are reported without stopping the import of the others.
+        """
+        file = request.FILES.get("file")
+        if file is not None:
+            file_format = request.data.get("format") or file.name.rsplit(".", 1)[-1].lower()
+            try:
+                rows = read_rows(file, file_format)
+            except (ValueError, UnicodeDecodeError) as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {"error": "A CSV/JSON file or a list of users is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = UserImporter().run(rows)
+        return Response(report, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=["post"])
     def update_photo(self, request, pk=None):
         """
@@ -130,6 +162,43 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         return Response({"status": "photo updated"})
 
 
+class UserDirectoryPagination(PageNumberPagination):
+    """
+    Pagination of the user directory. The page size can be chosen
+    with the 'page_size' parameter, up to 'max_page_size'.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class UserDirectoryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    A viewset for the directory of the accounts below the authenticated admin.
+    The accounts are paginated and can be searched by email or username.
+    Every page is serialized with the same number of queries, whatever its size.
+    """
+
+    serializer_class = CustomUserSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = UserDirectoryPagination
+    filter_backends = [filters.SearchFilter, SparseFieldsetsFilter]
+    search_fields = ["user__email", "user__username"]
+
+    def get_queryset(self):
+        """
+        Returns the descendants of the authenticated user's account,
+        with everything the serializer needs already loaded.
+        """
+        account = get_object_or_404(CustomUser, user=self.request.user)
+        return (
+            CustomUser.objects.descendants_of(account.uuid)
+            .with_related()
+            .order_by("user__username")
+        )
+
+
 class CustomUserTreeViewSet(viewsets.ReadOnlyModelViewSet):
     """
     A viewset for viewing a tree of CustomUser instances.
@@ -142,14 +211,24 @@ class CustomUserTreeViewSet(viewsets.ReadOnlyModelViewSet):
         Overwrite the get_queryset method to return only the user being retrieved.
         """
         uuid = self.kwargs.get("pk")
-        return CustomUser.objects.filter(uuid=uuid)
+        return CustomUser.objects.filter(uuid=uuid).with_related()
 
     def retrieve(self, request, *args, **kwargs):
         """
         Overwrite the retrieve method to use the CustomUserTreeSerializer.
+        The whole tree of descendants (and the variants of their photos) is
+        loaded beforehand with a fixed number of queries and passed to the serializer.
         """
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
+        context = self.get_serializer_context()
+        context["children"] = get_account_tree(instance)
+        accounts = [instance]
+        for children in context["children"].values():
+            accounts.extend(children)
+        context["image_variants"] = get_recorded_variants(
+            account.photo.name for account in accounts if account.photo
+        )
+        serializer = self.get_serializer(instance, context=context)
         return Response(serializer.data)
 
 
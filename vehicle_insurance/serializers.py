@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import BrokerInfo
 
-class BrokerInfoSerializer(serializers.ModelSerializer):
+class BrokerInfoSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = BrokerInfo
         fields = '__all__'
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import VehicleRegistration
 
-class VehicleRegistrationSerializer(serializers.ModelSerializer):
+class VehicleRegistrationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleRegistration
         fields = '__all__'
@@ -0,0 +1,113 @@
+from typing import Iterable, Optional
+
+from django.db.models import F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Lag
+
+from .models import Vehicle, VehicleStatus
+
+COMPACTION_BATCH_SIZE = 1000
+
+
+def apply_status(status: VehicleStatus) -> bool:
+    """
+    Moves the current condition of the status' vehicle to the given status,
+    unless the vehicle already shows a newer one.
+
+    The check and the write are a single conditional UPDATE, so statuses that
+    arrive late or concurrently can never move the condition back in time.
+
+    Returns:
+        - bool: Whether the current condition of the vehicle changed.
+    """
+    return bool(
+        Vehicle.objects.filter(pk=status.vehicle_id)
+        .filter(
+            Q(condition_updated_at__isnull=True)
+            | Q(condition_updated_at__lte=status.status_updated_at)
+        )
+        .update(
+            current_condition=status.condition,
+            condition_updated_at=status.status_updated_at,
+        )
+    )
+
+
+def refresh_conditions(vehicle_ids: Optional[Iterable] = None) -> int:
+    """
+    Recomputes the current condition of the vehicles from their latest status.
+    It is needed after statuses are deleted or inserted without save()
+    (e.g. with bulk_create).
+
+    Args:
+        - vehicle_ids (Iterable, optional): The vehicles to refresh. Every vehicle by default.
+
+    Returns:
+        - int: The number of vehicles updated.
+    """
+    latest = VehicleStatus.objects.filter(vehicle=OuterRef("pk")).order_by(
+        "-status_updated_at", "-id"
+    )
+    vehicles = Vehicle.objects.all()
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(pk__in=list(vehicle_ids))
+    return vehicles.update(
+        current_condition=Subquery(latest.values("condition")[:1]),
+        condition_updated_at=Subquery(latest.values("status_updated_at")[:1]),
+    )
+
+
+def get_redundant_statuses(vehicle_ids: Optional[Iterable] = None):
+    """
+    Returns the ids of the statuses that repeat the condition of the previous
+    status of the same vehicle. Only the first status of each run of identical
+    conditions is needed to know when the condition changed. The status that the
+    current condition of the vehicle refers to (its `condition_updated_at`) is
+    kept as well, so the vehicle never points to a deleted status.
+    """
+    statuses = VehicleStatus.objects.all()
+    if vehicle_ids is not None:
+        statuses = statuses.filter(vehicle_id__in=list(vehicle_ids))
+    return (
+        statuses.annotate(
+            previous_condition=Window(
+                Lag("condition"),
+                partition_by=[F("vehicle_id")],
+                order_by=[F("status_updated_at").asc(), F("id").asc()],
+            )
+        )
+        .filter(previous_condition=F("condition"))
+        .exclude(status_updated_at=F("vehicle__condition_updated_at"))
+        .values_list("id", flat=True)
+    )
+
+
+def compact_statuses(
+    vehicle_ids: Optional[Iterable] = None,
+    batch_size: int = COMPACTION_BATCH_SIZE,
+    dry_run: bool = False,
+) -> int:
+    """
+    Deletes the statuses that repeat the condition of the previous status of
+    their vehicle (see get_redundant_statuses). The current condition of the
+    vehicles and the status it refers to are kept.
+
+    Args:
+        - vehicle_ids (Iterable, optional): The vehicles to compact. Every vehicle by default.
+        - batch_size (int): The number of statuses deleted by each query.
+        - dry_run (bool): Only count the statuses that would be deleted.
+
+    Returns:
+        - int: The number of statuses deleted (or that would be deleted).
+    """
+    ids = list(get_redundant_statuses(vehicle_ids))
+    if dry_run:
+        return len(ids)
+    for start in range(0, len(ids), batch_size):
+        batch = VehicleStatus.objects.filter(id__in=ids[start:start + batch_size])
+        # delete() would load the rows and send post_delete for each one, which
+        # recomputes the condition of the vehicle and drops its fleet snapshots.
+        # Skipping that is safe: no model references the statuses, so there is
+        # nothing to cascade, and the status the current condition refers to is
+        # never deleted, so neither the condition nor the snapshots change.
+        batch._raw_delete(batch.db)  # pylint: disable=protected-access
+    return len(ids)
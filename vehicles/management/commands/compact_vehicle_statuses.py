@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.conditions import COMPACTION_BATCH_SIZE, compact_statuses
+from vehicles.models import VehicleStatus
+
+
+class Command(BaseCommand):
+    """
+    Compacts the status history of the vehicles by deleting the statuses that
+    repeat the condition of the previous one. The first status of each run is
+    kept, so the history still shows when every change of condition happened,
+    as well as the status the current condition of each vehicle refers to.
+    """
+
+    help = "Deletes the vehicle statuses that repeat the previous condition of the vehicle."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vehicle",
+            action="append",
+            dest="vehicles",
+            metavar="VUID",
+            help="Only compact the history of this vehicle. It can be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=COMPACTION_BATCH_SIZE,
+            help="Number of statuses deleted by each query.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many statuses would be deleted without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        total = VehicleStatus.objects.count()
+        deleted = compact_statuses(
+            options["vehicles"], options["batch_size"], options["dry_run"]
+        )
+        verb = "would be deleted" if options["dry_run"] else "deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{deleted} of {total} vehicle statuses {verb}.")
+        )
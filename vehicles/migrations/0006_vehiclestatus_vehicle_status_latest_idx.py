@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_vehicle_front_photo_vehicle_heavy_transport_permit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclestatus',
+            index=models.Index(fields=['vehicle', '-status_updated_at'], name='vehicle_status_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:14
+
+from django.db import migrations, models
+
+
+def backfill_current_condition(apps, schema_editor):
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    VehicleStatus = apps.get_model('vehicles', 'VehicleStatus')
+    latest = VehicleStatus.objects.filter(vehicle=models.OuterRef('pk')).order_by(
+        '-status_updated_at', '-id'
+    )
+    Vehicle.objects.update(
+        current_condition=models.Subquery(latest.values('condition')[:1]),
+        condition_updated_at=models.Subquery(latest.values('status_updated_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0006_vehiclestatus_vehicle_status_latest_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='condition_updated_at',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='The date of the latest status of the vehicle', null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='current_condition',
+            field=models.CharField(blank=True, choices=[('Operable', 'Operable'), ('Inoperable', 'Inoperable'), ('Under Maintenance', 'Under Maintenance')], editable=False, help_text='Condition of the latest status of the vehicle', max_length=31, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['current_condition'], name='vehicle_condition_idx'),
+        ),
+        migrations.RunPython(backfill_current_condition, migrations.RunPython.noop),
+    ]
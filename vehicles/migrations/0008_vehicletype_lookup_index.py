@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0007_vehicle_current_condition'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicletype',
+            index=models.Index(fields=['year', 'brand', 'model'], name='vehicle_type_lookup_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 import uuid
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -87,6 +87,9 @@ class VehicleType(models.Model):
     class Meta:
         verbose_name = _("Vehicle Type")
         verbose_name_plural = _("Vehicle Types")
+        indexes = [
+            models.Index(fields=["year", "brand", "model"], name="vehicle_type_lookup_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.brand} {self.model} ({self.year})"
@@ -167,10 +170,27 @@ class Vehicle(models.Model):
         blank=True,
         help_text=_("Heavy transport permit of the vehicle"),
     )
+    current_condition = models.CharField(
+        max_length=31,
+        choices=VehicleCondition.choices,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("Condition of the latest status of the vehicle"),
+    )
+    condition_updated_at = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("The date of the latest status of the vehicle"),
+    )
 
     class Meta:
         verbose_name = _("Vehicle")
         verbose_name_plural = _("Vehicles")
+        indexes = [
+            models.Index(fields=["current_condition"], name="vehicle_condition_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Vehicle #{self.vuid}: - {self.vehicle_type}"
@@ -195,10 +215,33 @@ class VehicleStatus(models.Model):
     class Meta:
         verbose_name = _("Vehicle Condition")
         verbose_name_plural = _("Vehicle Conditions")
+        indexes = [
+            models.Index(
+                fields=["vehicle", "-status_updated_at"], name="vehicle_status_latest_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.condition}-{self.status_updated_at}"
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the status and updates the current condition of its vehicle
+        in the same transaction. Statuses created with bulk_create() must be
+        followed by vehicles.conditions.refresh_conditions().
+        """
+        # pylint: disable=import-outside-toplevel
+        from .conditions import apply_status, refresh_conditions
+
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            if adding:
+                apply_status(self)
+            else:
+                # An edited status may no longer be the latest one.
+                refresh_conditions([self.vehicle_id])
+
 
 class UserVehicle(models.Model):
     """
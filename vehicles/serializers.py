@@ -1,6 +1,8 @@
 from collections import OrderedDict
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from devices.serializers import DeviceSerializer
+from uploads.serializers import ImageVariantsField
 from .models import (
     Battery,
     Tire,
@@ -11,7 +13,7 @@ from .models import (
 )
 
 
-class VehicleTypeSerializer(serializers.ModelSerializer):
+class VehicleTypeSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleType
         fields = [
@@ -26,9 +28,13 @@ class VehicleTypeSerializer(serializers.ModelSerializer):
         ]
 
 
-class VehicleSerializer(serializers.ModelSerializer):
+class VehicleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     vehicle_type = VehicleTypeSerializer()
     device = DeviceSerializer()
+    front_photo_variants = ImageVariantsField(source="front_photo")
+    left_side_photo_variants = ImageVariantsField(source="left_side_photo")
+    right_side_photo_variants = ImageVariantsField(source="right_side_photo")
+    rear_photo_variants = ImageVariantsField(source="rear_photo")
 
     class Meta:
         model = Vehicle
@@ -45,10 +51,16 @@ class VehicleSerializer(serializers.ModelSerializer):
             "left_side_photo",
             "right_side_photo",
             "rear_photo",
+            "front_photo_variants",
+            "left_side_photo_variants",
+            "right_side_photo_variants",
+            "rear_photo_variants",
+            "current_condition",
+            "condition_updated_at",
         ]
 
 
-class VehicleStatusSerializer(serializers.ModelSerializer):
+class VehicleStatusSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     vehicle = serializers.PrimaryKeyRelatedField(
         queryset=Vehicle.objects.all(),
         write_only=True
@@ -64,7 +76,7 @@ class VehicleStatusSerializer(serializers.ModelSerializer):
     update = None
     partial_update = None
 
-class UserVehicleSerializer(serializers.ModelSerializer):
+class UserVehicleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     vehicles = VehicleSerializer(many=True, read_only=True)
 
@@ -79,7 +91,7 @@ class UserVehicleSerializer(serializers.ModelSerializer):
     update = None
     partial_update = None
 
-class TireSerializer(serializers.ModelSerializer):
+class TireSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     vehicle = serializers.PrimaryKeyRelatedField(
         queryset=Vehicle.objects.all(),
         write_only=True
@@ -106,7 +118,7 @@ class TireSerializer(serializers.ModelSerializer):
     update = None
     partial_update = None
 
-class VehicleBatterySerializer(serializers.ModelSerializer):
+class VehicleBatterySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     vehicle = serializers.PrimaryKeyRelatedField(
         queryset=Vehicle.objects.all(),
         write_only=True
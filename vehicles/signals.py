@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from alarms.models import Alarm
+from devices.models import Device
+from mileage.models import Mileage
+from work_orders.models import WorkOrder, WorkOrderCompletion
+
+from .conditions import refresh_conditions
+from .models import UserVehicle, Vehicle, VehicleStatus
+from .snapshot import invalidate_snapshots, invalidate_vehicle_snapshots
+
+
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def invalidate_owner_snapshot(sender, instance: UserVehicle, **kwargs):
+    """Invalidates the fleet snapshot of the user whose vehicles changed."""
+    invalidate_snapshots([instance.user_id])
+
+
+@receiver(post_delete, sender=VehicleStatus)
+def refresh_vehicle_condition(sender, instance: VehicleStatus, **kwargs):
+    """Recomputes the current condition of the vehicle, since the status may have been its latest."""
+    refresh_conditions([instance.vehicle_id])
+
+
+@receiver(post_save, sender=Vehicle)
+def invalidate_vehicle_snapshot(sender, instance: Vehicle, **kwargs):
+    """Invalidates the fleet snapshots that show the vehicle."""
+    invalidate_vehicle_snapshots([instance.pk])
+
+
+@receiver(post_save, sender=VehicleStatus)
+@receiver(post_delete, sender=VehicleStatus)
+@receiver(post_save, sender=Mileage)
+@receiver(post_delete, sender=Mileage)
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_delete, sender=WorkOrder)
+def invalidate_vehicle_record_snapshot(sender, instance, **kwargs):
+    """Invalidates the fleet snapshots that show the vehicle of the record."""
+    invalidate_vehicle_snapshots([instance.vehicle_id])
+
+
+@receiver(post_save, sender=WorkOrderCompletion)
+@receiver(post_delete, sender=WorkOrderCompletion)
+def invalidate_work_order_snapshot(sender, instance: WorkOrderCompletion, **kwargs):
+    """Invalidates the fleet snapshots that show the vehicle of the work order."""
+    invalidate_vehicle_snapshots(
+        WorkOrder.objects.filter(pk=instance.work_order_id).values_list("vehicle_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_save, sender=Alarm)
+def invalidate_device_snapshot(sender, instance, **kwargs):
+    """Invalidates the fleet snapshots that show the vehicle where the device is installed."""
+    imei = instance.pk if sender is Device else instance.device_id
+    invalidate_snapshots(
+        UserVehicle.objects.filter(vehicle__device_id=imei).values_list("user_id", flat=True)
+    )
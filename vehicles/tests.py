@@ -1,3 +1,265 @@
+from decimal import Decimal
+from time import time
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from alarms.models import Alarm
+from devices.models import Device
+from mileage.models import Mileage
+from wt_iopgps.testing import (
+    ListQueriesMixin,
+    create_account,
+    create_vehicle,
+    create_vehicle_type,
+)
+
+from .conditions import apply_status, compact_statuses
+from .enums import VehicleCondition
+from .models import Battery, Tire, UserVehicle, Vehicle, VehicleStatus
+
+NOW = int(time())
+
+# The lists of the items of the vehicles, by path, with a factory of their items.
+ITEM_LISTS = {
+    "tires": lambda vehicle, number: Tire(
+        vehicle=vehicle,
+        registration_date=NOW,
+        manufacturing_code=f"DOT{number}",
+        position_relative_to_vehicle="FRONT_LEFT",
+    ),
+    "batteries": lambda vehicle, number: Battery(
+        vehicle=vehicle, registration_date=NOW, manufacturing_code=f"B{number}"
+    ),
+    "statuses": lambda vehicle, number: VehicleStatus(
+        vehicle=vehicle, status_updated_at=NOW - number
+    ),
+    "mileages": lambda vehicle, number: Mileage(
+        vehicle=vehicle,
+        mileage=Decimal(number),
+        unit="km",
+        canonical_mileage=Decimal(number * 1000),
+        unix_time_registered=NOW - number,
+    ),
+}
+
+
+class VehicleListQueryTests(ListQueriesMixin, TestCase):
+    """
+    The vehicle lists make the same number of queries for any number of vehicles.
+    """
+
+    def setUp(self):
+        self.account = create_account("driver")
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        self.vehicle_types = [create_vehicle_type(f"Brand {number}") for number in range(3)]
+        self.created = 0
+
+    def create_vehicles(self, count: int):
+        numbers = range(self.created, self.created + count)
+        self.created += count
+        devices = Device.objects.bulk_create(
+            Device(imei=f"{number:015d}", user_name=f"device{number}") for number in numbers
+        )
+        vehicles = Vehicle.objects.bulk_create(
+            Vehicle(
+                vehicle_type=self.vehicle_types[number % len(self.vehicle_types)],
+                device=device,
+                plate=f"P{number}",
+                tonnage=Decimal("1"),
+                front_photo=f"blobs/front{number}.png",
+            )
+            for number, device in zip(numbers, devices)
+        )
+        UserVehicle.objects.bulk_create(
+            UserVehicle(user=self.account, vehicle=vehicle) for vehicle in vehicles
+        )
+
+    def test_vehicles(self):
+        # The vehicles with their types and devices, and the variants of their photos.
+        self.assert_list_queries("/api/v1/vehicles/", 2, self.create_vehicles)
+
+    def test_user_vehicles(self):
+        # The user, then the same queries as the vehicle list.
+        self.assert_list_queries(
+            f"/api/v1/users/{self.account.uuid}/vehicles/", 3, self.create_vehicles
+        )
+
+
+class VehicleItemListQueryTests(ListQueriesMixin, TestCase):
+    """
+    The lists of tires, batteries, statuses and mileages make the same number
+    of queries for any number of items, in total and per vehicle.
+    """
+
+    def setUp(self):
+        self.vehicle = create_vehicle()
+        self.client = APIClient()
+        self.client.force_authenticate(create_account("driver").user)
+
+    def create_items(self, build):
+        """Returns a function that adds `count` items built by `build` to the vehicle."""
+        model = type(build(self.vehicle, 0))
+
+        def create(count: int):
+            start = model.objects.count()
+            model.objects.bulk_create(
+                build(self.vehicle, number) for number in range(start, start + count)
+            )
+
+        return create
+
+    def test_item_lists(self):
+        for path, build in ITEM_LISTS.items():
+            self.assert_list_queries(f"/api/v1/{path}/", 1, self.create_items(build))
+
+    def test_vehicle_item_lists(self):
+        for path, build in ITEM_LISTS.items():
+            # The vehicle and its items.
+            self.assert_list_queries(
+                f"/api/v1/vehicles/{self.vehicle.vuid}/{path}/", 2, self.create_items(build)
+            )
+
+
+class StatusCompactionTests(TestCase):
+    """
+    Compacting the statuses keeps the changes of condition and the current one.
+    """
+
+    def setUp(self):
+        self.vehicle = create_vehicle()
+        conditions = [VehicleCondition.OPERABLE] * 2 + [VehicleCondition.INOPERABLE] * 3
+        for time, condition in enumerate(conditions, start=1):
+            VehicleStatus.objects.create(
+                vehicle=self.vehicle, condition=condition, status_updated_at=time
+            )
+
+    def test_current_status_is_kept(self):
+        self.assertEqual(compact_statuses(dry_run=True), 2)
+        self.assertEqual(compact_statuses(), 2)
+        self.assertQuerysetEqual(
+            VehicleStatus.objects.order_by("status_updated_at").values_list(
+                "status_updated_at", flat=True
+            ),
+            [1, 3, 5],
+        )
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_condition, VehicleCondition.INOPERABLE)
+        self.assertEqual(self.vehicle.condition_updated_at, 5)
+
+    def test_compaction_is_stable(self):
+        compact_statuses()
+        self.assertEqual(compact_statuses(), 0)
+
+    def test_nothing_references_the_statuses(self):
+        # compact_statuses() deletes them without cascades or signals.
+        self.assertEqual(VehicleStatus._meta.related_objects, ())
+
+
+class ApplyStatusTests(TestCase):
+    """
+    The current condition of a vehicle only moves forward in time.
+    """
+
+    def setUp(self):
+        self.vehicle = create_vehicle()
+
+    def assertCondition(self, condition, updated_at):
+        self.vehicle.refresh_from_db()
+        self.assertEqual(
+            (self.vehicle.current_condition, self.vehicle.condition_updated_at),
+            (condition, updated_at),
+        )
+
+    def test_newer_status_is_applied(self):
+        for updated_at, condition in (
+            (10, VehicleCondition.OPERABLE),
+            (20, VehicleCondition.INOPERABLE),
+            (20, VehicleCondition.OPERABLE),
+        ):
+            with self.subTest(updated_at=updated_at, condition=condition):
+                status = VehicleStatus(
+                    vehicle=self.vehicle, condition=condition, status_updated_at=updated_at
+                )
+                self.assertTrue(apply_status(status))
+                self.assertCondition(condition, updated_at)
+
+    def test_older_status_does_not_overwrite_a_newer_one(self):
+        VehicleStatus.objects.create(
+            vehicle=self.vehicle, condition=VehicleCondition.INOPERABLE, status_updated_at=20
+        )
+        late = VehicleStatus(
+            vehicle=self.vehicle, condition=VehicleCondition.OPERABLE, status_updated_at=10
+        )
+        self.assertFalse(apply_status(late))
+        self.assertCondition(VehicleCondition.INOPERABLE, 20)
+
+        late.save()
+        self.assertCondition(VehicleCondition.INOPERABLE, 20)
+
+
+class FleetSnapshotTests(TestCase):
+    """
+    The fleet snapshot is served from the cache until the data it shows changes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.account = create_account("driver")
+        self.vehicle = create_vehicle()
+        UserVehicle.objects.create(user=self.account, vehicle=self.vehicle)
+        self.url = f"/api/v1/users/{self.account.uuid}/vehicles/snapshot/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+
+    def get_snapshot(self) -> dict:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        [vehicle] = response.json()
+        return vehicle
+
+    def test_cache_hit_makes_no_queries(self):
+        Mileage.objects.create(
+            vehicle=self.vehicle, mileage=Decimal("10"), unit="km", unix_time_registered=NOW
+        )
+        # The vehicles, then the mileages; the vehicle has no alarms.
+        with self.assertNumQueries(2):
+            snapshot = self.get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_snapshot(), snapshot)
+
+    def test_alarm_changes_the_snapshot(self):
+        self.assertIsNone(self.get_snapshot()["last_alarm"])
+        Alarm.objects.create(
+            device=self.vehicle.device, alarm_code="SOS", alarm_type=1, device_type=1, time=NOW
+        )
+        snapshot = self.get_snapshot()
+        self.assertEqual(snapshot["last_alarm"]["alarm_code"], "SOS")
+        self.assertTrue(snapshot["device"]["is_online"])
+
+    def test_device_changes_the_snapshot(self):
+        self.assertFalse(self.get_snapshot()["device"]["is_online"])
+        device = self.vehicle.device
+        device.last_time_tracked = NOW
+        device.save()
+        self.assertEqual(self.get_snapshot()["device"]["last_seen"], NOW)
+
+    def test_mileage_changes_the_snapshot(self):
+        self.assertIsNone(self.get_snapshot()["mileage"])
+        Mileage.objects.create(
+            vehicle=self.vehicle, mileage=Decimal("10"), unit="km", unix_time_registered=NOW
+        )
+        self.assertEqual(self.get_snapshot()["mileage"]["mileage"], "10.00")
 
-# Create your tests here.
+    def test_status_changes_the_snapshot(self):
+        self.assertIsNone(self.get_snapshot()["status"])
+        VehicleStatus.objects.create(
+            vehicle=self.vehicle, condition=VehicleCondition.INOPERABLE, status_updated_at=NOW
+        )
+        self.assertEqual(
+            self.get_snapshot()["status"],
+            {"condition": VehicleCondition.INOPERABLE, "status_updated_at": NOW},
+        )
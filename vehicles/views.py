@@ -1,8 +1,16 @@
 from typing import Optional
+from uuid import UUID
+
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from users.models import CustomUser
+from wt_iopgps.sparse_fields import SparseFieldsetsFilter
 
 from .models import (
     Battery,
@@ -18,6 +26,7 @@ from .serializers import (
     VehicleTypeSerializer,
     VehicleSerializer
 )
+from .snapshot import get_snapshot
 
 class UserVehicleReadViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -25,6 +34,8 @@ class UserVehicleReadViewSet(viewsets.ReadOnlyModelViewSet):
     """
 
     serializer_class = VehicleSerializer
+    filter_backends = [DjangoFilterBackend, SparseFieldsetsFilter]
+    filterset_fields = ["current_condition"]
 
     def get_queryset(self):
         """
@@ -35,16 +46,38 @@ class UserVehicleReadViewSet(viewsets.ReadOnlyModelViewSet):
         pk: Optional[str] = self.kwargs.get("pk")
         if pk is not None:
             user = get_object_or_404(CustomUser, uuid=pk)
-            return Vehicle.objects.filter(uservehicle__user=user)
+            return Vehicle.objects.filter(uservehicle__user=user).select_related(
+                "vehicle_type", "device"
+            )
         return Vehicle.objects.none()
 
+    @action(detail=False, methods=["get"])
+    def snapshot(self, request: Request, pk: Optional[str] = None):
+        """
+        Returns the dashboard snapshot of the user's vehicles: each vehicle with its
+        latest status, latest mileage, last alarm, device liveness and number of
+        open work orders. The snapshot is cached for a few seconds per user.
+        """
+        try:
+            uuid = UUID(pk)
+        except (TypeError, ValueError) as e:
+            raise Http404 from e
+        snapshot = get_snapshot(uuid)
+        if not snapshot and not CustomUser.objects.filter(uuid=uuid).exists():
+            raise Http404
+        return Response(snapshot)
+
 class VehicleTypeViewSet(viewsets.ModelViewSet):
     queryset = VehicleType.objects.all()
     serializer_class = VehicleTypeSerializer
 
 class VehicleViewSet(viewsets.ModelViewSet):
-    queryset = Vehicle.objects.all()
+    # The serializer nests the vehicle type and the device.
+    queryset = Vehicle.objects.select_related("vehicle_type", "device")
     serializer_class = VehicleSerializer
+    # ?current_condition= is served by the index on the condition projected from the statuses.
+    filter_backends = [DjangoFilterBackend, SparseFieldsetsFilter]
+    filterset_fields = ["current_condition"]
 
 class VehicleStatusViewSet(viewsets.ModelViewSet):
     """
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-19 13:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance_manuals', '0004_remove_maintenancemanual_id_and_more'),
+        ('work_orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workorder',
+            name='operation',
+            field=models.ForeignKey(blank=True, help_text='The operation of the maintenance manual performed by the work order.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='work_orders', to='maintenance_manuals.maintenanceoperation'),
+        ),
+    ]
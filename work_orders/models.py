@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from maintenance_manuals.models import MaintenanceOperation
 from vehicles.models import Vehicle
 from users.models import CustomUser
 
@@ -42,6 +43,14 @@ class WorkOrder(models.Model):
         blank=False,
         help_text=_("The type of work to be performed.")
     )
+    operation = models.ForeignKey(
+        MaintenanceOperation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='work_orders',
+        help_text=_("The operation of the maintenance manual performed by the work order.")
+    )
 
     class Meta:
         verbose_name = _("Work order")
@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from wt_iopgps.sparse_fields import SparseFieldsetsMixin
 from .models import WorkOrder, WorkOrderCompletion
 
-class WorkOrderSerializer(serializers.ModelSerializer):
+class WorkOrderSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = WorkOrder
         fields = '__all__'
 
-class WorkOrderCompletionSerializer(serializers.ModelSerializer):
+class WorkOrderCompletionSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = WorkOrderCompletion
         fields = '__all__'
@@ -52,6 +52,27 @@ if EXTERNAL_CSRF_TRUSTED_ORIGINS:
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Uploaded files are named after the hash of their content and stored once
+# (see uploads.storage). The backend is the storage where they are written.
+DEFAULT_FILE_STORAGE = "uploads.storage.ContentAddressedStorage"
+CONTENT_ADDRESSED_BACKEND = "django.core.files.storage.FileSystemStorage"
+
+# The uploads are hashed while they are received. When the files are stored
+# in S3, large documents are streamed there as they arrive (see uploads.streaming).
+FILE_UPLOAD_HANDLERS = [
+    "uploads.streaming.S3MultipartUploadHandler",
+    "uploads.handlers.HashingMemoryFileUploadHandler",
+    "uploads.handlers.HashingTemporaryFileUploadHandler",
+]
+# Bytes of each part of the streamed uploads, the most kept in memory per upload.
+# S3 requires at least 5 MiB for every part but the last one.
+S3_MULTIPART_PART_SIZE = int(os.getenv("S3_MULTIPART_PART_SIZE", str(5 * 1024 * 1024)))
+
+# Direct transfers with the storage (see uploads.presigned), in seconds and bytes.
+PRESIGNED_UPLOAD_EXPIRATION = int(os.getenv("PRESIGNED_UPLOAD_EXPIRATION", "900"))
+PRESIGNED_DOWNLOAD_EXPIRATION = int(os.getenv("PRESIGNED_DOWNLOAD_EXPIRATION", "300"))
+PRESIGNED_UPLOAD_MAX_SIZE = int(os.getenv("PRESIGNED_UPLOAD_MAX_SIZE", str(100 * 1024 * 1024)))
+
 if not DEBUG:
     # Allows SSL if the api is running in production
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -71,7 +92,7 @@ if not DEBUG:
     AWS_S3_URL_PROTOCOL = "https:"  # o 'http:' si no estás usando SSL
 
     # Use Amazon S3 for storage for uploaded media files.
-    DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+    CONTENT_ADDRESSED_BACKEND = "storages.backends.s3boto3.S3Boto3Storage"
     MEDIA_URL = f"{AWS_S3_URL_PROTOCOL}//{AWS_S3_CUSTOM_DOMAIN}/media/"
 
 # Application definition
@@ -101,6 +122,7 @@ INSTALLED_APPS = [
     "routes",
     "statuses",
     "tires",
+    "uploads",
     "vehicles",
     "vehicle_insurance",
     "vehicle_registration",
@@ -154,6 +176,19 @@ CACHES = {
 }
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+
+# Alarm notifications:
+# Seconds during which the alarms of a recipient are grouped in a single notification.
+ALARM_NOTIFICATION_WINDOW = float(os.getenv("ALARM_NOTIFICATION_WINDOW", "2"))
+ALARM_NOTIFICATION_MAX_WORKERS = int(os.getenv("ALARM_NOTIFICATION_MAX_WORKERS", "8"))
+ALARM_NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("ALARM_NOTIFICATION_MAX_ATTEMPTS", "3"))
+ALARM_NOTIFICATION_TIMEOUT = float(os.getenv("ALARM_NOTIFICATION_TIMEOUT", "5"))
+# Seconds to wait before the first retry, doubled on every following attempt.
+ALARM_NOTIFICATION_BACKOFF = float(os.getenv("ALARM_NOTIFICATION_BACKOFF", "1"))
+# Only deliver to https webhooks whose host resolves to public addresses.
+ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY = (
+    os.getenv("ALARM_NOTIFICATION_PUBLIC_WEBHOOKS_ONLY", "True") == "True"
+)
 SESSION_CACHE_ALIAS = "default"
 
 # Password validation
@@ -208,7 +243,36 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
+    "DEFAULT_FILTER_BACKENDS": [
+        "wt_iopgps.sparse_fields.SparseFieldsetsFilter",
+    ],
 }
+
+# Seconds that a resolved API token is kept in the shared cache.
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", "300"))
+# Seconds that a resolved API token is kept in the memory of each process.
+# It is the longest time other processes may accept a deleted token.
+TOKEN_LOCAL_CACHE_TIMEOUT = int(os.getenv("TOKEN_LOCAL_CACHE_TIMEOUT", "5"))
+TOKEN_LOCAL_CACHE_SIZE = int(os.getenv("TOKEN_LOCAL_CACHE_SIZE", "1024"))
+
+# Fleet dashboard snapshot:
+# Seconds that the snapshot of a user's vehicles is cached. Writes invalidate it earlier.
+FLEET_SNAPSHOT_CACHE_TIMEOUT = int(os.getenv("FLEET_SNAPSHOT_CACHE_TIMEOUT", "30"))
+# Seconds since the last activity of a device during which it is considered online.
+FLEET_DEVICE_ONLINE_WINDOW = int(os.getenv("FLEET_DEVICE_ONLINE_WINDOW", "600"))
+
+# Maintenance manuals and advance alerts:
+# Whether a work order is created for the vehicle's owner when an advance alert fires.
+MAINTENANCE_AUTO_WORK_ORDERS = os.getenv("MAINTENANCE_AUTO_WORK_ORDERS", "False") == "True"
+# Seconds of upcoming alerts that the scheduler keeps in memory before reading the index again.
+MAINTENANCE_SCHEDULER_INTERVAL = int(os.getenv("MAINTENANCE_SCHEDULER_INTERVAL", "60"))
+# Seconds between the refreshes of the vehicles with new readings, done by the scheduler.
+MAINTENANCE_REFRESH_INTERVAL = float(os.getenv("MAINTENANCE_REFRESH_INTERVAL", "5"))
+# Seconds that the serialized manuals of a vehicle type are cached. Changes invalidate them earlier.
+MAINTENANCE_MANUALS_CACHE_TIMEOUT = int(os.getenv("MAINTENANCE_MANUALS_CACHE_TIMEOUT", "86400"))
+
+# Threads of each process that generate the resized variants of the uploaded images.
+IMAGE_VARIANT_MAX_WORKERS = int(os.getenv("IMAGE_VARIANT_MAX_WORKERS", "2"))
@@ -0,0 +1,187 @@
+"""
+Sparse fieldsets (`?fields=`) and relation expansion (`?expand=`) for the API.
+
+    GET /vehicles/?fields=vuid,plate,device.imei
+    GET /mileages/?expand=vehicle
+
+`fields` lists the fields to return; nested fields are selected with dots.
+`expand` replaces the primary key of the relations listed in the serializer's
+`Meta.expandable_fields` with the nested object. Without these parameters the
+responses are unchanged. They only apply to safe (read) requests, so they never
+change what a write request validates.
+
+The serializers opt in with SparseFieldsetsMixin and the querysets are pruned
+to the fields that will be rendered by SparseFieldsetsFilter, which is one of
+the default filter backends.
+"""
+from typing import Dict, Optional, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_fields(value: str) -> Dict[str, dict]:
+    """
+    Parses the value of the 'fields' parameter into a tree of field names.
+    For example, 'vuid,device.imei' -> {'vuid': {}, 'device': {'imei': {}}}.
+    An empty dict selects the whole field.
+    """
+    tree: Dict[str, dict] = {}
+    for path in value.split(","):
+        names = [name.strip() for name in path.split(".") if name.strip()]
+        if not names:
+            continue
+        node = tree
+        for name in names[:-1]:
+            if name in node and not node[name]:
+                # The whole field is already selected.
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = {}
+    return tree
+
+
+def restrict_fields(serializer: serializers.BaseSerializer, tree: Dict[str, dict]) -> None:
+    """Removes from a serializer (and its nested serializers) the fields not in the tree."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if not isinstance(serializer, serializers.Serializer) or not tree:
+        return
+    for name in list(serializer.fields):
+        if name not in tree:
+            serializer.fields.pop(name)
+        elif tree[name]:
+            restrict_fields(serializer.fields[name], tree[name])
+
+
+def get_request_options(request) -> Tuple[Optional[Dict[str, dict]], Set[str]]:
+    """Returns the requested fields tree (None for every field) and relations to expand."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    fields = parse_fields(params[FIELDS_PARAM]) if params.get(FIELDS_PARAM) else None
+    expand = {name.strip() for name in params.get(EXPAND_PARAM, "").split(",") if name.strip()}
+    return fields, expand
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin that applies the 'fields' and 'expand' parameters of the request.
+
+    Only the serializer created by the view (the one that receives the request in
+    its context) reads the parameters; nested serializers are restricted by it.
+    The relations that can be expanded are declared in the Meta class:
+
+        class Meta:
+            expandable_fields = {"vehicle": "vehicles.serializers.VehicleSerializer"}
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = get_request_options(self._context.get("request"))
+        expandable = getattr(getattr(self, "Meta", None), "expandable_fields", {})
+        for name in expand:
+            if name in expandable and name in self.fields:
+                serializer_class = import_string(expandable[name])
+                source = self.fields[name].source
+                self.fields[name] = serializer_class(
+                    read_only=True, **({"source": source} if source != name else {})
+                )
+        if fields is not None:
+            restrict_fields(self, fields)
+
+
+def get_lookups(serializer, model, prefix: str = "") -> Optional[tuple]:
+    """
+    Returns the (only, select_related, prefetch_related) lookups needed to render
+    the fields of a serializer, or None if they cannot be known (e.g. because a
+    field reads a property or a method of the model).
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    only = {prefix + model._meta.pk.name}
+    select: Set[str] = set()
+    prefetch: Set[str] = set()
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or field.source == "*":
+            return None
+        relation = getattr(field, "child_relation", field)
+        if isinstance(relation, serializers.RelatedField) and not isinstance(
+            relation, serializers.PrimaryKeyRelatedField
+        ):
+            # The field renders the related object (e.g. its __str__).
+            return None
+        name = field.source.split(".")[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.is_relation:
+            only.add(prefix + name)
+        elif model_field.many_to_many or model_field.one_to_many:
+            prefetch.add(prefix + name)
+        elif not model_field.concrete:
+            # Reverse one-to-one relations cannot be restricted with only().
+            return None
+        else:
+            only.add(prefix + name)
+            if isinstance(field, serializers.BaseSerializer) or "." in field.source:
+                # Without lookups of its own fields, the related model is loaded whole.
+                select.add(prefix + name)
+                if isinstance(field, serializers.BaseSerializer):
+                    nested = get_lookups(field, model_field.related_model, f"{prefix}{name}__")
+                    if nested is not None:
+                        only.update(nested[0])
+                        select.update(nested[1])
+                        prefetch.update(nested[2])
+    return only, select, prefetch
+
+
+def _root(lookup) -> str:
+    path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+    return path.split("__")[0]
+
+
+class SparseFieldsetsFilter(BaseFilterBackend):
+    """
+    Prunes the queryset of a view to what its serializer will render when the
+    'fields' or 'expand' parameters are used: the columns are restricted with
+    only() and the relations that are not rendered are neither joined nor
+    prefetched, while the expanded ones are. If the needs of a field cannot be
+    known, the queryset is left as it is.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields, expand = get_request_options(request)
+        if fields is None and not expand:
+            return queryset
+        lookups = get_lookups(view.get_serializer(), queryset.model)
+        if lookups is None:
+            return queryset
+        only, select, prefetch = lookups
+
+        # The prefetches of the view (which may have custom querysets) are kept
+        # for the relations that are still rendered as objects.
+        roots = {lookup.split("__")[0] for lookup in select | prefetch}
+        kept_prefetch = [
+            lookup for lookup in queryset._prefetch_related_lookups if _root(lookup) in roots
+        ]
+        kept_roots = {_root(lookup) for lookup in kept_prefetch}
+        kept_prefetch += [lookup for lookup in prefetch if _root(lookup) not in kept_roots]
+
+        queryset = queryset.select_related(None).prefetch_related(None).only(*only)
+        if select:
+            queryset = queryset.select_related(*select)
+        if kept_prefetch:
+            queryset = queryset.prefetch_related(*kept_prefetch)
+        return queryset
@@ -0,0 +1,14 @@
+"""
+Settings of the test suite, which runs without Redis:
+
+    python manage.py test --settings=wt_iopgps.test_settings
+
+The cache is kept in memory (the code uses the same cache API on both), and
+the passwords are hashed with a fast hasher, since the tests create many users.
+"""
+
+# pylint: disable=wildcard-import, unused-wildcard-import
+from .settings import *
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,68 @@
+"""
+Factories shared by the tests of the apps.
+"""
+from decimal import Decimal
+from typing import Callable, Optional
+
+from django.contrib.auth.models import User
+
+from devices.models import Device
+from users.models import CustomUser
+from vehicles.models import Vehicle, VehicleType
+
+
+def create_account(username: str, **fields) -> CustomUser:
+    """Creates an account with its user, and the given fields of the account."""
+    user = User.objects.create_user(username, f"{username}@example.com", "password")
+    return CustomUser.objects.create(user=user, **fields)
+
+
+def create_vehicle_type(brand: str = "Brand") -> VehicleType:
+    """Creates a vehicle type with the required specifications."""
+    return VehicleType.objects.create(
+        year=2020,
+        brand=brand,
+        model="Model",
+        fuel_value=Decimal("1"),
+        engine_displacement=Decimal("1"),
+        city_mileage=Decimal("1"),
+        highway_mileage=Decimal("1"),
+        mixed_mileage=Decimal("1"),
+    )
+
+
+def create_vehicle(
+    vehicle_type: Optional[VehicleType] = None,
+    imei: str = "123456789012345",
+    plate: str = "ABC123",
+) -> Vehicle:
+    """Creates a vehicle with its device, and a vehicle type if none is given."""
+    return Vehicle.objects.create(
+        vehicle_type=vehicle_type or create_vehicle_type(),
+        device=Device.objects.create(imei=imei, user_name=f"device{imei}"),
+        plate=plate,
+        tonnage=Decimal("1"),
+    )
+
+
+class ListQueriesMixin:
+    """
+    Checks that a list endpoint makes the same number of queries for any
+    number of rows. Test cases using it have an authenticated `self.client`.
+    """
+
+    LIST_SIZES = (1, 100, 1000)
+
+    def assert_list_queries(self, url: str, queries: int, create_rows: Callable[[int], None]):
+        """
+        Lists the endpoint with each of LIST_SIZES rows, creating the missing
+        rows with `create_rows(count)` before each request.
+        """
+        created = 0
+        for count in self.LIST_SIZES:
+            create_rows(count - created)
+            created = count
+            with self.subTest(url=url, rows=count), self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), count)
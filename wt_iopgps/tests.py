@@ -0,0 +1,159 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from maintenance_manuals.models import MaintenanceManual, MaintenanceOperation
+from maintenance_manuals.views import MaintenanceManualViewSet
+from mileage.models import Mileage
+from mileage.views import MileageViewSet
+from users.models import CustomUser
+from users.views import CustomUserViewSet
+from vehicles.views import VehicleViewSet
+
+from .sparse_fields import SparseFieldsetsFilter, parse_fields
+from .testing import create_account, create_vehicle
+
+
+class ParseFieldsTests(TestCase):
+    """
+    The 'fields' parameter is parsed into a tree of field names.
+    """
+
+    def test_nested_fields(self):
+        self.assertEqual(
+            parse_fields("vuid,device.imei,device.user_name"),
+            {"vuid": {}, "device": {"imei": {}, "user_name": {}}},
+        )
+
+    def test_whole_field_wins_over_its_nested_fields(self):
+        self.assertEqual(parse_fields("device,device.imei"), {"device": {}})
+
+    def test_empty_names_are_ignored(self):
+        self.assertEqual(parse_fields(" vuid, ,.plate.,"), {"vuid": {}, "plate": {}})
+
+
+class SparseFieldsetsTests(TestCase):
+    """
+    The 'fields' and 'expand' parameters select what the responses render.
+    """
+
+    def setUp(self):
+        self.vehicle = create_vehicle()
+        Mileage.objects.create(
+            vehicle=self.vehicle, mileage=Decimal("10"), unit="km", unix_time_registered=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(create_account("driver").user)
+
+    def get(self, url: str) -> list:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields(self):
+        vehicles = self.get("/api/v1/vehicles/?fields=vuid,device.imei")
+        self.assertEqual(
+            vehicles,
+            [{"vuid": str(self.vehicle.vuid), "device": {"imei": self.vehicle.device_id}}],
+        )
+
+    def test_unknown_fields_are_ignored(self):
+        self.assertEqual(
+            self.get("/api/v1/vehicles/?fields=plate,unknown,device.unknown"),
+            [{"plate": self.vehicle.plate, "device": {}}],
+        )
+        self.assertEqual(self.get("/api/v1/vehicles/?fields=unknown"), [{}])
+
+    def test_expand(self):
+        self.assertEqual(
+            self.get("/api/v1/mileages/?fields=vehicle")[0]["vehicle"], str(self.vehicle.vuid)
+        )
+        mileages = self.get("/api/v1/mileages/?expand=vehicle&fields=vehicle.plate")
+        self.assertEqual(mileages, [{"vehicle": {"plate": self.vehicle.plate}}])
+
+    def test_unknown_expansions_are_ignored(self):
+        self.assertEqual(
+            self.get("/api/v1/mileages/?expand=unknown,mileage"), self.get("/api/v1/mileages/")
+        )
+
+    def test_writes_ignore_the_parameters(self):
+        response = self.client.post(
+            "/api/v1/mileages/?fields=id&expand=vehicle",
+            {
+                "vehicle": str(self.vehicle.vuid),
+                "mileage": "20",
+                "unit": "km",
+                "unix_time_registered": 2,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["vehicle"], str(self.vehicle.vuid))
+        self.assertIn("mileage", response.json())
+
+
+class SparseFieldsetsFilterTests(TestCase):
+    """
+    The querysets are pruned to the columns and relations that are rendered.
+    """
+
+    def filter(self, viewset_class, query: str, queryset=None):
+        request = Request(APIRequestFactory().get(f"/?{query}"))
+        view = viewset_class(request=request, format_kwarg=None, kwargs={}, action="list")
+        if queryset is None:
+            queryset = view.get_queryset()
+        return SparseFieldsetsFilter().filter_queryset(request, queryset, view)
+
+    def assertOnly(self, queryset, fields):
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(fields), False))
+
+    def test_without_parameters_the_queryset_is_unchanged(self):
+        queryset = self.filter(VehicleViewSet, "")
+        self.assertEqual(queryset.query.select_related, {"vehicle_type": {}, "device": {}})
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+
+    def test_relations_that_are_not_rendered_are_not_joined(self):
+        queryset = self.filter(VehicleViewSet, "fields=vuid,plate")
+        self.assertIs(queryset.query.select_related, False)
+        self.assertOnly(queryset, {"vuid", "plate"})
+
+    def test_nested_fields_are_joined(self):
+        queryset = self.filter(VehicleViewSet, "fields=vuid,device.user_name")
+        self.assertEqual(queryset.query.select_related, {"device": {}})
+        self.assertOnly(queryset, {"vuid", "device", "device__imei", "device__user_name"})
+
+    def test_expanded_relations_are_joined(self):
+        queryset = self.filter(MileageViewSet, "expand=vehicle&fields=mileage,vehicle.plate")
+        self.assertEqual(queryset.query.select_related, {"vehicle": {}})
+        self.assertOnly(queryset, {"id", "mileage", "vehicle", "vehicle__vuid", "vehicle__plate"})
+
+    def test_prefetches_that_are_not_rendered_are_dropped(self):
+        queryset = self.filter(MaintenanceManualViewSet, "fields=muid")
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+        queryset = self.filter(MaintenanceManualViewSet, "fields=muid,manual_tasks.task")
+        self.assertEqual(queryset._prefetch_related_lookups, ("manual_tasks",))
+
+    def test_prefetched_manuals_make_one_query_per_relation(self):
+        manual = MaintenanceManual.objects.create(
+            vehicle_type=create_vehicle().vehicle_type, start_date=date.today()
+        )
+        MaintenanceOperation.objects.create(
+            manual=manual, system="Engine", subsystem="Oil", task="R", frequency="5000km,-,6m"
+        )
+        with self.assertNumQueries(2):
+            manuals = list(self.filter(MaintenanceManualViewSet, "fields=muid,manual_tasks.task"))
+            self.assertEqual([task.task for task in manuals[0].manual_tasks.all()], ["R"])
+
+    def test_fields_with_unknown_needs_keep_the_queryset(self):
+        queryset = CustomUser.objects.with_related()
+        # The roles are rendered with their __str__.
+        pruned = self.filter(CustomUserViewSet, "fields=uuid,roles", queryset)
+        self.assertEqual(pruned._prefetch_related_lookups, queryset._prefetch_related_lookups)
+        self.assertEqual(pruned.query.select_related, {"user": {}})
+        pruned = self.filter(CustomUserViewSet, "fields=uuid,id_card", queryset)
+        self.assertEqual(pruned._prefetch_related_lookups, ())
+        self.assertIs(pruned.query.select_related, False)
+        self.assertOnly(pruned, {"uuid", "id_card"})
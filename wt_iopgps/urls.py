@@ -43,5 +43,6 @@ urlpatterns = [
     path(API_URL_BASE, include("mileage.urls")),
     path(API_URL_BASE, include("statuses.urls")),
     path(API_URL_BASE, include("tires.urls")),
+    path(API_URL_BASE, include("uploads.urls")),
     path(API_URL_BASE, include("work_orders.urls")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)